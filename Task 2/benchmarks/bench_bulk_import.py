@@ -0,0 +1,114 @@
+"""
+Bulk import throughput of POST /products:bulk, end to end and broken down by phase.
+
+"http" streams a generated NDJSON or CSV body through the ASGI app in 64 KiB pieces; "validate" times parsing
+and ProductCreate validation alone; "copy" times COPY of pre-built records alone. Needs the docker-compose
+database with migrations applied. Run from the Task 2 directory:
+    python -m benchmarks.bench_bulk_import --rows 200000 --formats ndjson,csv
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import time
+import uuid
+from datetime import timedelta
+
+import httpx
+from sqlalchemy import delete
+
+from src.database import async_session_maker, engine
+from src.main import app
+from src.models.db import ProductDB
+from src.routers.auth import ACCESS_TOKEN_MINUTES, create_token
+from src.services.bulk_import import COPY_COLUMNS, _validate, csv_rows, ndjson_rows
+
+BENCH_CATEGORY = "bench-bulk-import"
+PIECE_SIZE = 64 * 1024
+
+
+def product(i: int) -> dict:
+    return {"name": f"Imported product {i}", "description": f"Bulk imported product number {i}, {i % 97} in stock",
+            "price": round(1 + i % 10_000 / 7, 2), "stock": i % 1_000, "category": BENCH_CATEGORY,
+            "status": "ACTIVE"}
+
+
+def generate(fmt: str, rows: int) -> bytes:
+    if fmt == "ndjson":
+        return "".join(json.dumps(product(i)) + "\n" for i in range(rows)).encode()
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(product(0)))
+    writer.writeheader()
+    writer.writerows(product(i) for i in range(rows))
+    return out.getvalue().encode()
+
+
+async def pieces(body: bytes):
+    for pos in range(0, len(body), PIECE_SIZE):
+        yield body[pos:pos + PIECE_SIZE]
+
+
+async def cleanup():
+    async with async_session_maker() as session:
+        await session.execute(delete(ProductDB).where(ProductDB.category == BENCH_CATEGORY))
+        await session.commit()
+
+
+async def run_http(fmt: str, body: bytes, rows: int) -> dict:
+    token = create_token({"sub": str(uuid.uuid4()), "role": "ADMIN"}, timedelta(minutes=ACCESS_TOKEN_MINUTES))
+    headers = {"Authorization": f"Bearer {token}",
+               "Content-Type": "text/csv" if fmt == "csv" else "application/x-ndjson"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                 timeout=None) as client:
+        start = time.perf_counter()
+        response = await client.post("/products:bulk", content=pieces(body), headers=headers)
+        elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    assert response.json()["inserted"] == rows, response.json()
+    await cleanup()
+    return {"seconds": round(elapsed, 2), "rows_per_s": round(rows / elapsed)}
+
+
+async def run_validate(fmt: str, body: bytes, rows: int) -> dict:
+    start = time.perf_counter()
+    parsed = csv_rows(pieces(body)) if fmt == "csv" else ndjson_rows(pieces(body))
+    async for _, row in parsed:
+        _validate(row, fmt == "csv")
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 2), "rows_per_s": round(rows / elapsed)}
+
+
+async def run_copy(rows: int, chunk_size: int) -> dict:
+    records = [(p["name"], p["description"], p["price"], p["stock"], p["category"], p["status"], None)
+               for p in map(product, range(rows))]
+    async with engine.connect() as conn:
+        driver = (await conn.get_raw_connection()).driver_connection
+        start = time.perf_counter()
+        async with driver.transaction():
+            for pos in range(0, rows, chunk_size):
+                await driver.copy_records_to_table("products", records=records[pos:pos + chunk_size],
+                                                   columns=COPY_COLUMNS)
+        elapsed = time.perf_counter() - start
+    await cleanup()
+    return {"seconds": round(elapsed, 2), "rows_per_s": round(rows / elapsed)}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--formats", default="ndjson,csv")
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    args = parser.parse_args()
+
+    results = {"copy": await run_copy(args.rows, args.chunk_size)}
+    for fmt in args.formats.split(","):
+        body = generate(fmt, args.rows)
+        results[f"validate_{fmt}"] = await run_validate(fmt, body, args.rows)
+        results[f"http_{fmt}"] = await run_http(fmt, body, args.rows)
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
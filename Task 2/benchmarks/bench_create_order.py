@@ -0,0 +1,87 @@
+"""
+Stock reservation latency by cart size: per-item ORM loop vs. the set-based reserve_stock().
+
+Needs the docker-compose database with migrations applied. Run from the Task 2 directory:
+    python -m benchmarks.bench_create_order --iterations 200 --cart-sizes 1,5,10,30,50
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy import delete, select
+
+from src.database import async_session_maker, engine
+from src.models.db import ProductDB
+from src.models.generated import OrderItemInput, ProductStatus
+from src.services.stock import reserve_stock
+
+BENCH_CATEGORY = "bench-create-order"
+
+
+async def legacy_reserve(session, items):
+    for item in items:
+        product = (await session.execute(select(ProductDB).where(ProductDB.id == item.product_id))).scalars().first()
+        if not product or product.status != ProductStatus.ACTIVE or product.stock < item.quantity:
+            raise RuntimeError("seeded product rejected")
+        product.stock -= item.quantity
+    await session.flush()
+
+
+async def seed(count: int):
+    async with async_session_maker() as session:
+        products = [ProductDB(name=f"bench-{i}", price=10, stock=1_000_000, category=BENCH_CATEGORY,
+                              status=ProductStatus.ACTIVE) for i in range(count)]
+        session.add_all(products)
+        await session.commit()
+        return [p.id for p in products]
+
+
+async def cleanup():
+    async with async_session_maker() as session:
+        await session.execute(delete(ProductDB).where(ProductDB.category == BENCH_CATEGORY))
+        await session.commit()
+
+
+async def measure(fn, items, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        async with async_session_maker() as session:
+            start = time.perf_counter()
+            await fn(session, items)
+            timings.append((time.perf_counter() - start) * 1000)
+            await session.rollback()
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--cart-sizes", default="1,5,10,30,50")
+    args = parser.parse_args()
+    cart_sizes = [int(n) for n in args.cart_sizes.split(",")]
+
+    product_ids = await seed(max(cart_sizes))
+    try:
+        results = []
+        for size in cart_sizes:
+            items = [OrderItemInput(product_id=pid, quantity=1) for pid in product_ids[:size]]
+            results.append({
+                "cart_size": size,
+                "per_item": await measure(legacy_reserve, items, args.iterations),
+                "set_based": await measure(reserve_stock, items, args.iterations),
+            })
+        print(json.dumps(results, indent=2))
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+List response serialization throughput: response_model validation + jsonable_encoder + json.dumps
+(what FastAPI does for a returned model) vs. the orjson fast path over plain column rows.
+
+--target encode times serialization alone on synthetic rows (no database needed);
+--target http drives GET /products through the ASGI app against the docker-compose database.
+Run from the Task 2 directory:
+    python -m benchmarks.bench_list_serialization --target encode --page-sizes 20,100,500
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.config import settings
+from src.fast_json import PRODUCT_FIELDS, FastJSONResponse, product_items
+from src.main import app
+from src.models.generated import PaginatedProductResponse, ProductStatus
+from src.routers.auth import ACCESS_TOKEN_MINUTES, create_token
+
+ProductRow = namedtuple("ProductRow", PRODUCT_FIELDS)
+RESPONSE_FIELD = create_response_field(name="response", type_=PaginatedProductResponse)
+
+
+def synthetic_rows(count: int):
+    created = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    return [ProductRow(str(uuid.uuid4()), f"Product {i}", "A reasonably sized product description " * 3,
+                       19.99 + i, i % 50, "electronics", ProductStatus.ACTIVE,
+                       created + timedelta(seconds=i, microseconds=i), created + timedelta(days=1, seconds=i))
+            for i in range(count)]
+
+
+async def validated_page(rows) -> bytes:
+    page = PaginatedProductResponse.model_validate(
+        {"items": rows, "totalElements": 1000, "page": 0, "size": len(rows), "nextCursor": None},
+        from_attributes=True)
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=page)
+    return JSONResponse(content).body
+
+
+async def fast_page(rows) -> bytes:
+    return FastJSONResponse({"items": product_items(rows), "totalElements": 1000, "page": 0, "size": len(rows),
+                             "nextCursor": None}).body
+
+
+async def pages_per_second(encode, rows, seconds: float = 1.0) -> float:
+    await encode(rows)
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        await encode(rows)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+async def run_encode(page_sizes):
+    results = []
+    for size in page_sizes:
+        rows = synthetic_rows(size)
+        validated = await pages_per_second(validated_page, rows)
+        fast = await pages_per_second(fast_page, rows)
+        results.append({"page_size": size, "validated_pages_per_s": round(validated, 1),
+                        "fast_pages_per_s": round(fast, 1), "speedup": round(fast / validated, 2)})
+    return results
+
+
+async def http_rps(client, url: str, headers: dict, requests: int) -> float:
+    await client.get(url, headers=headers)
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
+    return requests / (time.perf_counter() - start)
+
+
+async def run_http(page_sizes, requests: int):
+    token = create_token({"sub": str(uuid.uuid4()), "role": "USER"}, timedelta(minutes=ACCESS_TOKEN_MINUTES))
+    headers = {"Authorization": f"Bearer {token}"}
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for size in page_sizes:
+            url = f"/products?size={size}&count=none"
+            settings.fast_json_responses = False
+            validated = await http_rps(client, url, headers, requests)
+            settings.fast_json_responses = True
+            fast = await http_rps(client, url, headers, requests)
+            results.append({"page_size": size, "validated_rps": round(validated, 1), "fast_rps": round(fast, 1),
+                            "speedup": round(fast / validated, 2)})
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", choices=["encode", "http"], default="encode")
+    parser.add_argument("--page-sizes", default="20,100,500")
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    page_sizes = [int(n) for n in args.page_sizes.split(",")]
+
+    if args.target == "http":
+        results = await run_http(page_sizes, args.requests)
+    else:
+        results = await run_encode(page_sizes)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
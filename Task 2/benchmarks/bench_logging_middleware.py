@@ -0,0 +1,69 @@
+"""
+Per-request overhead of RequestLoggingMiddleware, measured by driving a bare ASGI app directly
+(no server, no database). Run from the Task 2 directory:
+    python -m benchmarks.bench_logging_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from src.request_logging import LogWriter, RequestLoggingMiddleware
+
+BODY = json.dumps({"username": "bench_user", "password": "correct horse battery", "role": "USER"}).encode()
+
+
+async def bare_app(scope, receive, send):
+    more_body = True
+    while more_body:
+        message = await receive()
+        more_body = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"status":"ok"}'})
+
+
+async def drive(app, requests: int, method: str) -> float:
+    scope = {"type": "http", "method": method, "path": "/auth/register", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": BODY, "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+        # Give the writer task a turn, as a real server would between requests.
+        await asyncio.sleep(0)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample-rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        writer = LogWriter(max_queue=args.requests, batch_size=256, stream=devnull)
+        writer.start()
+        logged_app = RequestLoggingMiddleware(bare_app, writer, sample_rate=args.sample_rate)
+
+        results = {}
+        for method in ("GET", "POST"):
+            await drive(bare_app, 1000, method)
+            await drive(logged_app, 1000, method)
+            bare = await drive(bare_app, args.requests, method)
+            logged = await drive(logged_app, args.requests, method)
+            results[method] = {"bare_us": round(bare, 2), "logged_us": round(logged, 2),
+                               "overhead_us": round(logged - bare, 2)}
+        await writer.stop()
+
+    results["dropped_records"] = writer.dropped
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
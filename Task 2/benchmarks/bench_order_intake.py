@@ -0,0 +1,135 @@
+"""
+Flash-sale order throughput: synchronous POST /orders vs. queued intake with batching order workers.
+
+Every request orders from a handful of hot products as a fresh user, so all orders contend for the same rows.
+The app runs in-process (httpx ASGI transport) against the docker-compose database. Run from the Task 2 directory:
+    python -m benchmarks.bench_order_intake --hot-products 3 --concurrency 64 --duration 15 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from datetime import timedelta
+
+import httpx
+
+# Each order is placed by a new user, so the per-user limit never applies; the relay and sweeper stay out of it.
+os.environ.setdefault("ORDER_RATE_LIMIT", "1000000")
+os.environ.setdefault("OUTBOX_RELAY_ENABLED", "false")
+os.environ.setdefault("ORDER_EXPIRY_ENABLED", "false")
+
+from sqlalchemy import delete, func, select  # noqa: E402
+
+from benchmarks.loadtest.report import percentile  # noqa: E402
+from src.database import async_session_maker, engine  # noqa: E402
+from src.main import app, log_writer  # noqa: E402
+from src.models.db import OrderDB, OrderItemDB, OrderOutboxDB, OrderRequestDB, ProductDB  # noqa: E402
+from src.models.generated import ProductStatus  # noqa: E402
+from src.routers.auth import ACCESS_TOKEN_MINUTES, create_token  # noqa: E402
+from src.routers.orders import order_intake  # noqa: E402
+
+BENCH_CATEGORY = "bench-order-intake"
+
+
+async def seed(count: int):
+    async with async_session_maker() as session:
+        products = [ProductDB(name=f"flash-sale-{i}", price=10, stock=1_000_000_000, category=BENCH_CATEGORY,
+                              status=ProductStatus.ACTIVE) for i in range(count)]
+        session.add_all(products)
+        await session.commit()
+        return [str(product.id) for product in products]
+
+
+async def cleanup(user_ids):
+    async with async_session_maker() as session:
+        order_ids = select(OrderItemDB.order_id).where(
+            OrderItemDB.product_id.in_(select(ProductDB.id).where(ProductDB.category == BENCH_CATEGORY)))
+        await session.execute(delete(OrderRequestDB).where(OrderRequestDB.user_id == func.any(user_ids)))
+        await session.execute(delete(OrderOutboxDB).where(OrderOutboxDB.aggregate_id.in_(order_ids)))
+        order_ids = list((await session.execute(order_ids)).scalars())
+        await session.execute(delete(OrderItemDB).where(OrderItemDB.order_id == func.any(order_ids)))
+        await session.execute(delete(OrderDB).where(OrderDB.id == func.any(order_ids)))
+        await session.execute(delete(ProductDB).where(ProductDB.category == BENCH_CATEGORY))
+        await session.commit()
+
+
+async def client_loop(client, product_ids, rng, deadline, latencies, statuses, user_ids):
+    while time.perf_counter() < deadline:
+        user_id = uuid.uuid4()
+        user_ids.append(user_id)
+        token = create_token({"sub": str(user_id), "role": "USER"}, timedelta(minutes=ACCESS_TOKEN_MINUTES))
+        items = [{"product_id": rng.choice(product_ids), "quantity": 1}]
+        start = time.perf_counter()
+        response = await client.post("/orders", json={"items": items}, headers={"Authorization": f"Bearer {token}"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def queue_drained(user_ids) -> bool:
+    async with async_session_maker() as session:
+        return not (await session.execute(select(OrderRequestDB.id).where(
+            OrderRequestDB.user_id == func.any(user_ids), OrderRequestDB.status == "QUEUED").limit(1))).first()
+
+
+async def run(mode: str, args, product_ids, user_ids) -> dict:
+    order_intake.enabled = mode == "queued"
+    order_intake.workers = args.workers
+    order_intake.batch_size = args.batch_size
+    latencies, statuses, run_users = [], {}, []
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(*(client_loop(client, product_ids, random.Random(args.seed * 1000 + k), deadline,
+                                               latencies, statuses, run_users) for k in range(args.concurrency)))
+            intake_end = time.perf_counter()
+            # Queued orders count once a worker has applied them.
+            while mode == "queued" and not await queue_drained(run_users):
+                await asyncio.sleep(0.05)
+            applied_end = time.perf_counter()
+    user_ids.extend(run_users)
+
+    async with async_session_maker() as session:
+        created = (await session.execute(select(func.count()).select_from(OrderDB).where(
+            OrderDB.user_id == func.any(run_users)))).scalar_one()
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+        "accepted_per_s": round(len(latencies) / (intake_end - start), 1),
+        "orders_created": created,
+        "orders_per_s": round(created / (applied_end - start), 1),
+        "drain_s": round(applied_end - intake_end, 2),
+        "post_p50_ms": round(percentile(latencies, 50), 2),
+        "post_p95_ms": round(percentile(latencies, 95), 2),
+        "post_p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hot-products", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--workers", type=int, default=2, help="order workers in queued mode")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--modes", default="sync,queued")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    log_writer.stream = open(os.devnull, "w")
+    product_ids = await seed(args.hot_products)
+    user_ids = []
+    try:
+        results = {mode: await run(mode, args, product_ids, user_ids) for mode in args.modes.split(",")}
+        print(json.dumps({"config": vars(args), "results": results}, indent=2))
+    finally:
+        await cleanup(user_ids)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""
+Full-text product search latency on a large catalogue: GET /products/search (GIN index + ts_rank)
+vs. an ILIKE scan over name/description.
+
+Seeds --rows synthetic products (1M by default) with COPY, so the first run takes a while; pass --keep to
+leave them in place for later runs. Needs the docker-compose database with migrations applied.
+Run from the Task 2 directory:
+    python -m benchmarks.bench_search --rows 1000000 --iterations 20
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import delete, func, or_, select, text
+
+from src.database import async_session_maker, engine
+from src.models.db import ProductDB
+from src.models.generated import ProductCountMode
+from src.routers.products import search_products
+
+BENCH_CATEGORY = "bench-search"
+VOCABULARY_SIZE = 5_000
+COPY_CHUNK = 50_000
+
+
+def vocabulary(rng: random.Random) -> list:
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "xe", "zu", "pra", "gel", "dor", "fin"]
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def product_rows(rows: int, words: list, rng: random.Random):
+    # Zipf-like word frequencies, so the vocabulary has common, medium and rare terms.
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    for _ in range(rows):
+        name = " ".join(rng.choices(words, cum_weights=cum_weights, k=3))
+        description = " ".join(rng.choices(words, cum_weights=cum_weights, k=12))
+        yield name, description, 10.0, 100, BENCH_CATEGORY, "ACTIVE"
+
+
+async def seed(rows: int, words: list):
+    async with async_session_maker() as session:
+        existing = (await session.execute(
+            select(func.count()).where(ProductDB.category == BENCH_CATEGORY))).scalar_one()
+    if existing >= rows:
+        return
+    rng = random.Random(42)
+    async with engine.connect() as conn:
+        driver = (await conn.get_raw_connection()).driver_connection
+        chunk = []
+        for row in product_rows(rows - existing, words, rng):
+            chunk.append(row)
+            if len(chunk) == COPY_CHUNK:
+                await driver.copy_records_to_table(
+                    "products", records=chunk, columns=["name", "description", "price", "stock", "category", "status"])
+                chunk = []
+        if chunk:
+            await driver.copy_records_to_table(
+                "products", records=chunk, columns=["name", "description", "price", "stock", "category", "status"])
+        await driver.execute("ANALYZE products")
+
+
+async def cleanup():
+    async with async_session_maker() as session:
+        await session.execute(delete(ProductDB).where(ProductDB.category == BENCH_CATEGORY))
+        await session.commit()
+
+
+async def fts_search(session, term: str, cursor=None):
+    return await search_products(q=term, size=20, status=None, category=None, cursor=cursor,
+                                 count=ProductCountMode.none, session=session, user={})
+
+
+async def ilike_search(session, term: str):
+    pattern = f"%{term}%"
+    query = (select(ProductDB)
+             .where(or_(ProductDB.name.ilike(pattern), ProductDB.description.ilike(pattern)))
+             .order_by(ProductDB.created_at, ProductDB.id).limit(20))
+    return (await session.execute(query)).scalars().all()
+
+
+async def measure(fn, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        async with async_session_maker() as session:
+            start = time.perf_counter()
+            await fn(session)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[max(int(len(timings) * 0.95) - 1, 0)], 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded products for the next run")
+    args = parser.parse_args()
+
+    words = vocabulary(random.Random(7))
+    start = time.perf_counter()
+    await seed(args.rows, words)
+    seed_seconds = round(time.perf_counter() - start, 1)
+
+    try:
+        results = {"rows": args.rows, "seed_seconds": seed_seconds, "terms": []}
+        async with async_session_maker() as session:
+            frequencies = dict((await session.execute(text(
+                "SELECT word, ndoc FROM ts_stat($$SELECT search_vector FROM products WHERE category = '"
+                + BENCH_CATEGORY + "'$$)"))).all())
+        for label, term in (("common", words[0]), ("medium", words[len(words) // 20]), ("rare", words[-1])):
+            async with async_session_maker() as session:
+                first_page = await fts_search(session, term)
+            cursor = first_page.nextCursor
+            results["terms"].append({
+                "term": term,
+                "kind": label,
+                "matching_rows": frequencies.get(term, 0),
+                "fts_first_page": await measure(lambda s: fts_search(s, term), args.iterations),
+                "fts_next_page": await measure(lambda s: fts_search(s, term, cursor), args.iterations)
+                if cursor else None,
+                "ilike_first_page": await measure(lambda s: ilike_search(s, term), args.iterations),
+            })
+        print(json.dumps(results, indent=2))
+    finally:
+        if not args.keep:
+            await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
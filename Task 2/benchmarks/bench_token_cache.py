@@ -0,0 +1,70 @@
+"""
+Authenticated request throughput with and without the verified-token cache.
+
+--target dependency times the auth dependency alone (no database needed);
+--target http drives authenticated GET /products through the ASGI app against the docker-compose database.
+Run from the Task 2 directory:
+    python -m benchmarks.bench_token_cache --target http --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import timedelta
+
+import httpx
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.main import app
+from src.routers.auth import ACCESS_TOKEN_MINUTES, create_token, get_current_user, token_cache
+
+
+async def run_dependency(token: str, requests: int) -> float:
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await get_current_user(credentials)
+    return requests / (time.perf_counter() - start)
+
+
+async def run_http(token: str, requests: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/products?size=20&count=none", headers=headers)
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/products?size=20&count=none", headers=headers)
+            response.raise_for_status()
+        return requests / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", choices=["dependency", "http"], default="dependency")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    token = create_token({"sub": str(uuid.uuid4()), "role": "USER"}, timedelta(minutes=ACCESS_TOKEN_MINUTES))
+    run = run_http if args.target == "http" else run_dependency
+    cache_size = token_cache.maxsize
+
+    token_cache.maxsize = 0
+    token_cache.clear()
+    uncached = await run(token, args.requests)
+
+    token_cache.maxsize = cache_size
+    cached = await run(token, args.requests)
+
+    print(json.dumps({
+        "target": args.target,
+        "requests": args.requests,
+        "uncached_rps": round(uncached, 1),
+        "cached_rps": round(cached, 1),
+        "speedup": round(cached / uncached, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+In-process load test: drives src.main:app through httpx's ASGI transport against the docker-compose
+database with a weighted mix of scenarios and prints latency percentiles and requests/s per endpoint as JSON.
+Seeded data is reused between runs unless --cleanup is given. Run from the Task 2 directory:
+    python -m benchmarks.loadtest --products 10000 --users 200 --concurrency 32 --duration 30 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import httpx
+
+# Workers place and cancel orders back to back; lift the per-user order limit unless it is under test.
+if "--keep-rate-limit" not in sys.argv:
+    os.environ.setdefault("ORDER_RATE_LIMIT", "1000000")
+
+from benchmarks.loadtest.report import Recorder, git_commit  # noqa: E402
+from benchmarks.loadtest.scenarios import SCENARIOS, Worker  # noqa: E402
+from benchmarks.loadtest.seed import cleanup, seed_products, seed_users  # noqa: E402
+from src.database import engine  # noqa: E402
+from src.main import app, log_writer  # noqa: E402
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}, expected one of {sorted(SCENARIOS)}")
+        weights[name] = float(weight)
+    return weights
+
+
+async def run_worker(worker: Worker, mix: dict, deadline: float):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        await SCENARIOS[worker.rng.choices(names, weights)[0]](worker)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--mix", type=parse_mix, default="browse=50,view=35,login=5,order=10")
+    parser.add_argument("--browse-pages", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    parser.add_argument("--cleanup", action="store_true", help="delete the seeded data after the run")
+    parser.add_argument("--keep-rate-limit", action="store_true", help="keep the configured order rate limit")
+    parser.add_argument("--app-logs", action="store_true", help="keep the app's request log on stdout")
+    args = parser.parse_args()
+    if args.users < args.concurrency:
+        parser.error("--users must be at least --concurrency, every worker orders as its own users")
+
+    if not args.app_logs:
+        log_writer.stream = open(os.devnull, "w")
+    product_ids = [str(product_id) for product_id in await seed_products(args.products)]
+    users = await seed_users(args.users)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest") as client:
+            def workers(recorder: Recorder):
+                return [Worker(client, recorder, product_ids, users[k::args.concurrency], args.browse_pages,
+                               random.Random(args.seed * 1000 + k)) for k in range(args.concurrency)]
+
+            if args.warmup > 0:
+                deadline = time.perf_counter() + args.warmup
+                await asyncio.gather(*(run_worker(w, args.mix, deadline) for w in workers(Recorder())))
+            recorder = Recorder()
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(*(run_worker(w, args.mix, deadline) for w in workers(recorder)))
+            elapsed = time.perf_counter() - start
+
+    if args.cleanup:
+        await cleanup()
+    await engine.dispose()
+
+    result = {
+        "commit": git_commit(),
+        "config": {"products": args.products, "users": args.users, "concurrency": args.concurrency,
+                   "duration_s": args.duration, "mix": args.mix, "browse_pages": args.browse_pages,
+                   "seed": args.seed, "order_rate_limit": not args.keep_rate_limit},
+        **recorder.summary(elapsed),
+    }
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
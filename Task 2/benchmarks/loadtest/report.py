@@ -0,0 +1,45 @@
+import subprocess
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    # Nearest-rank percentile of an already sorted list.
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    # Latencies and status codes per endpoint, keyed by "METHOD /route/template".
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, status_code: int, seconds: float):
+        self.latencies[endpoint].append(seconds * 1000)
+        self.statuses[endpoint][status_code] += 1
+
+    def summary(self, duration: float) -> dict:
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            endpoints[endpoint] = {
+                "requests": len(latencies),
+                "requests_per_s": round(len(latencies) / duration, 1),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(latencies[-1], 2),
+                "status_codes": {str(code): n for code, n in sorted(self.statuses[endpoint].items())},
+            }
+        total = sum(len(latencies) for latencies in self.latencies.values())
+        return {"duration_s": round(duration, 2), "requests": total,
+                "requests_per_s": round(total / duration, 1), "endpoints": endpoints}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,68 @@
+import random
+import time
+from typing import List, Tuple
+
+import httpx
+
+from benchmarks.loadtest.report import Recorder
+from benchmarks.loadtest.seed import CATEGORIES, PASSWORD
+
+
+class Worker:
+    # One simulated client. Orders are placed by this worker's own users only, so concurrent workers never
+    # trip the one-active-order rule for each other.
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, product_ids: List[str],
+                 users: List[Tuple[str, str]], browse_pages: int, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.product_ids = product_ids
+        self.users = users
+        self.browse_pages = browse_pages
+        self.rng = rng
+        self._next_user = 0
+
+    def _user(self) -> Tuple[str, str]:
+        user = self.users[self._next_user % len(self.users)]
+        self._next_user += 1
+        return user
+
+    async def _request(self, endpoint: str, method: str, url: str, token: str = None, **kwargs) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        start = time.perf_counter()
+        response = await self.client.request(method, url, headers=headers, **kwargs)
+        self.recorder.record(endpoint, response.status_code, time.perf_counter() - start)
+        return response
+
+    async def browse(self):
+        # Catalogue listing: half of the sessions filter by category, then follow the cursor for a few pages.
+        _, token = self.rng.choice(self.users)
+        params = {"size": 20, "status": "ACTIVE"}
+        if self.rng.random() < 0.5:
+            params["category"] = self.rng.choice(CATEGORIES)
+        for _ in range(self.rng.randint(1, self.browse_pages)):
+            response = await self._request("GET /products", "GET", "/products", token, params=params)
+            cursor = response.json().get("nextCursor") if response.status_code == 200 else None
+            if not cursor:
+                return
+            params["cursor"] = cursor
+
+    async def view(self):
+        _, token = self.rng.choice(self.users)
+        await self._request("GET /products/{id}", "GET", f"/products/{self.rng.choice(self.product_ids)}", token)
+
+    async def login(self):
+        username, _ = self.rng.choice(self.users)
+        await self._request("POST /auth/login", "POST", "/auth/login",
+                            json={"username": username, "password": PASSWORD})
+
+    async def order(self):
+        _, token = self._user()
+        items = [{"product_id": product_id, "quantity": self.rng.randint(1, 3)}
+                 for product_id in self.rng.sample(self.product_ids, self.rng.randint(1, 3))]
+        response = await self._request("POST /orders", "POST", "/orders", token, json={"items": items})
+        if response.status_code == 201:
+            order_id = response.json()["details"]["id"]
+            await self._request("POST /orders/{id}/cancel", "POST", f"/orders/{order_id}/cancel", token)
+
+
+SCENARIOS = {"browse": Worker.browse, "view": Worker.view, "login": Worker.login, "order": Worker.order}
@@ -0,0 +1,69 @@
+import uuid
+from datetime import timedelta
+from typing import List, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.database import async_session_maker, engine
+from src.models.db import OrderDB, OrderItemDB, OrderOutboxDB, ProductDB, UserDB
+from src.routers.auth import ACCESS_TOKEN_MINUTES, create_token
+from src.services.password_hasher import password_hasher
+
+CATEGORIES = [f"loadtest-{i}" for i in range(10)]
+USERNAME_PREFIX = "loadtest_"
+PASSWORD = "loadtest-password"
+COPY_CHUNK = 10_000
+USER_CHUNK = 5_000
+
+
+async def seed_products(count: int) -> List[uuid.UUID]:
+    # Tops the catalogue up to `count` products, so reruns reuse an existing seed.
+    async with async_session_maker() as session:
+        existing = (await session.execute(
+            select(func.count()).where(ProductDB.category.in_(CATEGORIES)))).scalar_one()
+    if existing < count:
+        async with engine.connect() as conn:
+            driver = (await conn.get_raw_connection()).driver_connection
+            for start in range(existing, count, COPY_CHUNK):
+                records = [(f"Load test product {i}", f"Seeded product {i} for load tests", 10 + i % 990,
+                            1_000_000, CATEGORIES[i % len(CATEGORIES)], "ACTIVE")
+                           for i in range(start, min(start + COPY_CHUNK, count))]
+                await driver.copy_records_to_table(
+                    "products", records=records, columns=["name", "description", "price", "stock", "category", "status"])
+            await driver.execute("ANALYZE products")
+    async with async_session_maker() as session:
+        return list((await session.execute(
+            select(ProductDB.id).where(ProductDB.category.in_(CATEGORIES)).limit(count))).scalars().all())
+
+
+async def seed_users(count: int) -> List[Tuple[str, str]]:
+    # Returns (username, access token) per user. Every user shares one password, so it is hashed once,
+    # and tokens are minted directly instead of paying a bcrypt verify per user up front.
+    password_hash = await password_hasher.hash(PASSWORD)
+    usernames = [f"{USERNAME_PREFIX}{i}" for i in range(count)]
+    async with async_session_maker() as session:
+        for start in range(0, count, USER_CHUNK):
+            await session.execute(insert(UserDB).values(
+                [{"username": name, "password_hash": password_hash, "role": "USER"}
+                 for name in usernames[start:start + USER_CHUNK]]
+            ).on_conflict_do_nothing(index_elements=["username"]))
+        await session.commit()
+        users = (await session.execute(
+            select(UserDB.username, UserDB.id, UserDB.role).where(UserDB.username.in_(usernames)))).all()
+    return [(name, create_token({"sub": str(user_id), "role": role}, timedelta(minutes=ACCESS_TOKEN_MINUTES)))
+            for name, user_id, role in users]
+
+
+async def cleanup():
+    async with async_session_maker() as session:
+        user_ids = select(UserDB.id).where(UserDB.username.startswith(USERNAME_PREFIX))
+        order_ids = (await session.execute(select(OrderDB.id).where(OrderDB.user_id.in_(user_ids)))).scalars().all()
+        for start in range(0, len(order_ids), COPY_CHUNK):
+            chunk = order_ids[start:start + COPY_CHUNK]
+            await session.execute(delete(OrderItemDB).where(OrderItemDB.order_id.in_(chunk)))
+            await session.execute(delete(OrderOutboxDB).where(OrderOutboxDB.aggregate_id.in_(chunk)))
+            await session.execute(delete(OrderDB).where(OrderDB.id.in_(chunk)))
+        await session.execute(delete(UserDB).where(UserDB.username.startswith(USERNAME_PREFIX)))
+        await session.execute(delete(ProductDB).where(ProductDB.category.in_(CATEGORIES)))
+        await session.commit()
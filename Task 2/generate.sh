@@ -1,2 +1,2 @@
 #!/bin/bash
-datamodel-codegen --input openapi/openapi.yaml --input-file-type openapi --output src/models/generated.py --output-model-type pydantic_v2.BaseModel
\ No newline at end of file
+datamodel-codegen --input openapi/openapi.yaml --input-file-type openapi --output src/models/generated.py --output-model-type pydantic_v2.BaseModel --strict-nullable
\ No newline at end of file
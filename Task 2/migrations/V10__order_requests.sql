@@ -0,0 +1,22 @@
+-- Orders accepted by POST /orders in queued intake mode, waiting for an order worker. A processed row keeps
+-- the outcome (the order it created, or the error it was rejected with) for the status endpoint.
+CREATE TYPE order_request_status AS ENUM ('QUEUED', 'CREATED', 'REJECTED');
+
+CREATE TABLE order_requests (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL,
+    items JSONB NOT NULL,
+    promo_code VARCHAR(20),
+    status order_request_status NOT NULL DEFAULT 'QUEUED',
+    order_id UUID REFERENCES orders(id),
+    error_code VARCHAR(50),
+    error_message TEXT,
+    error_details JSONB,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP WITH TIME ZONE
+);
+
+-- The queue: oldest waiting requests first. Processed rows drop out of the index.
+CREATE INDEX idx_order_requests_queued ON order_requests(created_at) WHERE status = 'QUEUED';
+-- Purging processed requests past their retention.
+CREATE INDEX idx_order_requests_processed_at ON order_requests(processed_at) WHERE status <> 'QUEUED';
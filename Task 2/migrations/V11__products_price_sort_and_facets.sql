@@ -0,0 +1,71 @@
+-- Price filters and sorts, keyset-paged on (price, id); also used backwards for price_desc.
+CREATE INDEX idx_products_price_id ON products(price, id);
+CREATE INDEX idx_products_status_price_id ON products(status, price, id);
+CREATE INDEX idx_products_category_price_id ON products(category, price, id);
+
+-- Product counts per (category, status), kept current by the triggers below so facets never scan products.
+CREATE TABLE product_facet_counts (
+    category VARCHAR(100) NOT NULL,
+    status product_status NOT NULL,
+    count BIGINT NOT NULL,
+    PRIMARY KEY (category, status)
+);
+
+-- Inserts and deletes are counted per statement from the transition table, so a bulk import (COPY) touches
+-- each counter row once instead of once per product.
+CREATE OR REPLACE FUNCTION product_facet_counts_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO product_facet_counts (category, status, count)
+    SELECT category, status, count(*) FROM new_products GROUP BY category, status
+    ORDER BY category, status
+    ON CONFLICT (category, status) DO UPDATE SET count = product_facet_counts.count + EXCLUDED.count;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION product_facet_counts_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE product_facet_counts f
+    SET count = f.count - d.count
+    FROM (SELECT category, status, count(*) AS count FROM old_products GROUP BY category, status) d
+    WHERE f.category = d.category AND f.status = d.status;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Updates only fire when category or status changes, so stock and price updates (every order) pay nothing.
+CREATE OR REPLACE FUNCTION product_facet_counts_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE product_facet_counts SET count = count - 1 WHERE category = OLD.category AND status = OLD.status;
+    INSERT INTO product_facet_counts (category, status, count) VALUES (NEW.category, NEW.status, 1)
+    ON CONFLICT (category, status) DO UPDATE SET count = product_facet_counts.count + 1;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- No writes between the backfill and the triggers taking over.
+LOCK TABLE products IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TRIGGER product_facet_counts_insert
+AFTER INSERT ON products
+REFERENCING NEW TABLE AS new_products
+FOR EACH STATEMENT
+EXECUTE FUNCTION product_facet_counts_insert();
+
+CREATE TRIGGER product_facet_counts_delete
+AFTER DELETE ON products
+REFERENCING OLD TABLE AS old_products
+FOR EACH STATEMENT
+EXECUTE FUNCTION product_facet_counts_delete();
+
+CREATE TRIGGER product_facet_counts_update
+AFTER UPDATE OF category, status ON products
+FOR EACH ROW
+WHEN (OLD.category IS DISTINCT FROM NEW.category OR OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION product_facet_counts_update();
+
+INSERT INTO product_facet_counts (category, status, count)
+SELECT category, status, count(*) FROM products GROUP BY category, status;
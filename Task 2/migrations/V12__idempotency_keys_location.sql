@@ -0,0 +1,2 @@
+-- The Location header of a stored response (the status URL of a queued order), sent again on replay.
+ALTER TABLE idempotency_keys ADD COLUMN response_location TEXT;
@@ -0,0 +1,15 @@
+-- A transaction that sets app.defer_facet_counts (the bulk import) skips the insert trigger and applies its
+-- counts itself just before commit, so the counter rows are not locked for the whole load.
+CREATE OR REPLACE FUNCTION product_facet_counts_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('app.defer_facet_counts', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO product_facet_counts (category, status, count)
+    SELECT category, status, count(*) FROM new_products GROUP BY category, status
+    ORDER BY category, status
+    ON CONFLICT (category, status) DO UPDATE SET count = product_facet_counts.count + EXCLUDED.count;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
@@ -0,0 +1,8 @@
+UPDATE products SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE products ALTER COLUMN created_at SET NOT NULL;
+
+DROP INDEX idx_products_status;
+
+CREATE INDEX idx_products_created_at_id ON products(created_at, id);
+CREATE INDEX idx_products_status_created_at_id ON products(status, created_at, id);
+CREATE INDEX idx_products_category_created_at_id ON products(category, created_at, id);
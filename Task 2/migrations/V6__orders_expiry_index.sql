@@ -0,0 +1,5 @@
+-- Unpaid orders by age, for the expiry sweeper; only open orders are indexed, so the index stays small.
+CREATE INDEX idx_orders_unpaid_created_at ON orders(created_at) WHERE status IN ('CREATED', 'PAYMENT_PENDING');
+
+-- Joining a batch of orders to their items (sweeper and cancel_order).
+CREATE INDEX idx_order_items_order_id ON order_items(order_id);
@@ -0,0 +1,14 @@
+-- Responses of POST /orders by (user, Idempotency-Key). A row is claimed in the same transaction as the order
+-- it belongs to, so a committed row always carries the response and a rolled-back attempt leaves no row.
+CREATE TABLE idempotency_keys (
+    user_id UUID NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code SMALLINT,
+    response_body BYTEA,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (user_id, key)
+);
+
+CREATE INDEX idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
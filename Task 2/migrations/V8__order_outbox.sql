@@ -0,0 +1,12 @@
+-- Order lifecycle events written in the same transaction as the change they describe.
+-- The relay deletes rows once the sink has acknowledged them.
+CREATE TABLE order_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    aggregate_id UUID NOT NULL,
+    event_type VARCHAR(50) NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Head-of-line check: is there an older pending event for the same order?
+CREATE INDEX idx_order_outbox_aggregate_id ON order_outbox(aggregate_id, id);
@@ -0,0 +1,5 @@
+UPDATE orders SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE orders ALTER COLUMN created_at SET NOT NULL;
+
+-- A user's order history, newest first, keyset-paged on (created_at, id); scanned backwards.
+CREATE INDEX idx_orders_user_created_at_id ON orders(user_id, created_at, id);
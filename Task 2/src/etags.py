@@ -0,0 +1,42 @@
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Response
+
+# Product representations change only together with updated_at (a trigger bumps it on every UPDATE),
+# so id + updated_at identify the exact bytes of a product and the ETags can be strong.
+CACHE_CONTROL = "private, no-cache"
+
+
+def _tag(*parts) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\x1f")
+    return f'"{digest.hexdigest()}"'
+
+
+def product_etag(product_id, updated_at) -> str:
+    return _tag(product_id, updated_at)
+
+
+def page_etag(rows: Iterable, *page) -> str:
+    # rows need id and updated_at; page holds everything else in the body (counts, paging, cursor).
+    return _tag(*page, *(part for row in rows for part in (row.id, row.updated_at)))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored.
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -0,0 +1,28 @@
+from typing import List
+
+import orjson
+from fastapi import Response
+from sqlalchemy import Float, String, cast
+
+from src.models.db import ProductDB
+from src.models.generated import ProductResponse
+
+# ProductResponse fields, selected as plain columns in schema order. id is read as text (asyncpg's UUID type
+# is opaque to orjson) and price as float (the schema's number/double); enums and aware datetimes are encoded
+# natively by orjson exactly as pydantic does.
+PRODUCT_FIELDS = list(ProductResponse.model_fields)
+_COLUMN_CASTS = {"id": String, "price": Float}
+PRODUCT_COLUMNS = [cast(getattr(ProductDB, name), _COLUMN_CASTS[name]).label(name) if name in _COLUMN_CASTS
+                   else getattr(ProductDB, name) for name in PRODUCT_FIELDS]
+
+
+def product_items(rows) -> List[dict]:
+    return [dict(zip(PRODUCT_FIELDS, row)) for row in rows]
+
+
+class FastJSONResponse(Response):
+    # Encodes plain dicts/lists straight to bytes, skipping response_model re-validation and jsonable_encoder.
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
@@ -1,22 +1,53 @@
-import time
-import uuid
-import json
-from datetime import datetime, timezone
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from src.routers.products import router as products_router
-from src.routers.orders import router as orders_router
-from src.routers.auth import router as auth_router, get_current_user
-
-app = FastAPI(title="Marketplace API", version="1.0.0")
-
-
-async def set_body(request: Request, body: bytes):
-    async def receive():
-        return {"type": "http.request", "body": body}
-
-    request._receive = receive
+from src.routers.orders import (router as orders_router, idempotency_store, operation_audit, order_expiry_sweeper,
+                               order_intake, outbox_relay)
+from src.routers.auth import router as auth_router
+from src.config import settings
+from src.database import engine, replica_router
+from src.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from src.redis_client import close_redis
+from src.request_logging import LogWriter, RequestLoggingMiddleware
+from src.services.password_hasher import password_hasher
+from src.services.product_cache import product_cache
+
+log_writer = LogWriter(max_queue=settings.log_queue_size, batch_size=settings.log_batch_size)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_writer.start()
+    operation_audit.start()
+    order_expiry_sweeper.start()
+    idempotency_store.start()
+    outbox_relay.start()
+    order_intake.start()
+    invalidation_listener = asyncio.create_task(product_cache.listen_for_invalidations())
+    replica_monitor = asyncio.create_task(replica_router.monitor())
+    yield
+    invalidation_listener.cancel()
+    replica_monitor.cancel()
+    await order_intake.stop()
+    await order_expiry_sweeper.stop()
+    await idempotency_store.stop()
+    await outbox_relay.stop()
+    await operation_audit.stop()
+    await close_redis()
+    password_hasher.shutdown()
+    await replica_router.dispose()
+    await engine.dispose()
+    await log_writer.stop()
+
+
+app = FastAPI(title="Marketplace API", version="1.0.0", lifespan=lifespan)
+app.add_middleware(RequestLoggingMiddleware, writer=log_writer, sample_rate=settings.log_sample_rate,
+                   body_limit=settings.log_body_limit_bytes, query_headers=settings.debug,
+                   query_repeat_threshold=settings.query_repeat_threshold)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(RequestValidationError)
@@ -31,50 +62,39 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    request_id = str(uuid.uuid4())
-    start_time = time.time()
+@app.get("/ping", tags=["System"])
+async def ping():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", tags=["System"], include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
 
-    body_bytes = b""
-    if request.method in ["POST", "PUT", "DELETE"]:
-        body_bytes = await request.body()
-        await set_body(request, body_bytes)
 
-    response = await call_next(request)
-    duration_ms = int((time.time() - start_time) * 1000)
+@app.get("/stats/product-cache", tags=["System"])
+async def product_cache_stats():
+    return product_cache.stats()
 
-    body_log = None
-    if body_bytes:
-        try:
-            body_dict = json.loads(body_bytes)
-            if "password" in body_dict:
-                body_dict["password"] = "***"
-            body_log = body_dict
-        except json.JSONDecodeError:
-            pass
 
-    log_data = {
-        "request_id": request_id,
-        "method": request.method,
-        "endpoint": request.url.path,
-        "status_code": response.status_code,
-        "duration_ms": duration_ms,
-        "user_id": None,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
+@app.get("/stats/database", tags=["System"])
+async def database_stats():
+    return {"pool": engine.pool.status(), **replica_router.stats()}
 
-    if request.method in ["POST", "PUT", "DELETE"] and body_log is not None:
-        log_data["body"] = body_log
 
-    print(json.dumps(log_data))
-    response.headers["X-Request-Id"] = request_id
-    return response
+@app.get("/stats/idempotency", tags=["System"])
+async def idempotency_stats():
+    return idempotency_store.stats()
 
 
-@app.get("/ping", tags=["System"])
-async def ping():
-    return {"status": "ok"}
+@app.get("/stats/order-intake", tags=["System"])
+async def order_intake_stats():
+    return order_intake.stats()
+
+
+@app.get("/stats/password-hasher", tags=["System"])
+async def password_hasher_stats():
+    return password_hasher.stats()
 
 
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
@@ -0,0 +1,183 @@
+import bisect
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Prometheus text exposition (format 0.0.4) without a client library. Metrics are only updated from the event
+# loop thread, so plain dict/int updates are atomic with respect to each other and need no locks; all formatting
+# work happens at scrape time.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for labelvalues, value in list(self._values.items()):
+            lines.extend(self._samples(labelvalues, value))
+        return lines
+
+    def _samples(self, labelvalues: Tuple, value) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labelvalues):
+        self._values[labelvalues] = value
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) - amount
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labelvalues):
+        # Per label set: [count per bucket (the last one is +Inf), sum]; buckets are made cumulative on render.
+        series = self._values.get(labelvalues)
+        if series is None:
+            series = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def _samples(self, labelvalues: Tuple, value) -> List[str]:
+        counts, total = value
+        lines, cumulative = [], 0
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            cumulative += count
+            le = f'le="{_number(bound)}"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}")
+        labels = _labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {_number(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect: Callable[[], None]):
+        # Called on every scrape, before rendering, to refresh gauges that are cheaper to read than to track.
+        self._collectors.append(collect)
+
+    def render(self) -> bytes:
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode()
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ["method", "route", "status"]))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served."))
+
+db_pool_checkouts = registry.register(Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool.", ["pool"]))
+db_pool_timeouts = registry.register(Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after the pool timeout.", ["pool"]))
+db_pool_wait = registry.register(Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection.", ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)))
+db_pool_size = registry.register(Gauge("db_pool_size", "Configured pool size.", ["pool"]))
+db_pool_checked_out = registry.register(Gauge("db_pool_checked_out", "Connections in use.", ["pool"]))
+db_pool_overflow = registry.register(Gauge("db_pool_overflow", "Connections open beyond pool_size.", ["pool"]))
+
+orders_total = registry.register(Counter(
+    "orders_total", "Order creation attempts by result (CREATED or the error code returned).", ["result"]))
+
+outbox_published = registry.register(Counter(
+    "outbox_events_published_total", "Order events published by the outbox relay."))
+outbox_publish_failures = registry.register(Counter(
+    "outbox_publish_failures_total", "Outbox batches the sink failed to accept (retried on the next pass)."))
+outbox_publish_duration = registry.register(Histogram(
+    "outbox_publish_batch_seconds", "Time to publish one outbox batch to the sink."))
+outbox_event_age = registry.register(Histogram(
+    "outbox_event_age_seconds", "Time from writing an event to publishing it.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)))
+
+order_intake_wait = registry.register(Histogram(
+    "order_intake_wait_seconds", "Time queued orders waited for an order worker.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)))
+order_intake_batch_duration = registry.register(Histogram(
+    "order_intake_batch_seconds", "Time to apply one batch of queued orders."))
+
+
+class MetricsMiddleware:
+    # Records latency per route template (not the raw path, which would make a series per product id).
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec()
+            route = scope.get("route")
+            http_request_duration.observe(time.perf_counter() - start, scope["method"],
+                                          route.path if route is not None else "unmatched", status_code)
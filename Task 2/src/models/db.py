@@ -1,6 +1,7 @@
 import uuid
-from sqlalchemy import Column, String, Numeric, Integer, DateTime, Boolean, ForeignKey, Enum as SQLEnum, text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (BigInteger, Column, Computed, String, Numeric, Integer, SmallInteger, DateTime, Boolean,
+                        ForeignKey, LargeBinary, Text, Enum as SQLEnum, text)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from sqlalchemy.sql import func
 from src.database import Base
 from src.models.generated import ProductStatus, OrderStatus
@@ -10,7 +11,7 @@ class UserDB(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     username = Column(String(50), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
-    role = Column(String, nullable=False, default="USER")
+    role = Column(SQLEnum("USER", "SELLER", "ADMIN", name="user_role"), nullable=False, default="USER")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class ProductDB(Base):
@@ -21,16 +22,22 @@ class ProductDB(Base):
     price = Column(Numeric(12, 2), nullable=False)
     stock = Column(Integer, nullable=False)
     category = Column(String(100), nullable=False)
-    status = Column(SQLEnum(ProductStatus), nullable=False)
+    status = Column(SQLEnum(ProductStatus, name="product_status"), nullable=False)
     seller_id = Column(UUID(as_uuid=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Generated by Postgres (V5 migration). Kept on the table for search queries but left out of the mapper,
+    # so product loads and inserts never carry it.
+    search_vector = Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')", persisted=True))
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
 
 class PromoCodeDB(Base):
     __tablename__ = "promo_codes"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     code = Column(String(20), unique=True, nullable=False)
-    discount_type = Column(String, nullable=False)
+    discount_type = Column(SQLEnum("PERCENTAGE", "FIXED_AMOUNT", name="discount_type_enum"), nullable=False)
     discount_value = Column(Numeric(12, 2), nullable=False)
     min_order_amount = Column(Numeric(12, 2), nullable=False)
     max_uses = Column(Integer, nullable=False)
@@ -43,7 +50,7 @@ class OrderDB(Base):
     __tablename__ = "orders"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), nullable=False)
-    status = Column(SQLEnum(OrderStatus), nullable=False)
+    status = Column(SQLEnum(OrderStatus, name="order_status"), nullable=False)
     promo_code_id = Column(UUID(as_uuid=True), ForeignKey("promo_codes.id"), nullable=True)
     total_amount = Column(Numeric(12, 2), nullable=False)
     discount_amount = Column(Numeric(12, 2), nullable=False, default=0)
@@ -62,5 +69,46 @@ class UserOperationDB(Base):
     __tablename__ = "user_operations"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), nullable=False)
-    operation_type = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    operation_type = Column(SQLEnum("CREATE_ORDER", "UPDATE_ORDER", name="operation_type_enum"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class IdempotencyKeyDB(Base):
+    __tablename__ = "idempotency_keys"
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(SmallInteger, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    response_location = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+class OrderOutboxDB(Base):
+    __tablename__ = "order_outbox"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    aggregate_id = Column(UUID(as_uuid=True), nullable=False)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class OrderRequestDB(Base):
+    __tablename__ = "order_requests"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    items = Column(JSONB, nullable=False)
+    promo_code = Column(String(20), nullable=True)
+    status = Column(SQLEnum("QUEUED", "CREATED", "REJECTED", name="order_request_status"), nullable=False,
+                    default="QUEUED")
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=True)
+    error_code = Column(String(50), nullable=True)
+    error_message = Column(String, nullable=True)
+    error_details = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+class ProductFacetCountDB(Base):
+    # Maintained by triggers on products (V11 migration) and, for its own rows, by the bulk import (V13).
+    __tablename__ = "product_facet_counts"
+    category = Column(String(100), primary_key=True)
+    status = Column(SQLEnum(ProductStatus, name="product_status"), primary_key=True)
+    count = Column(BigInteger, nullable=False)
@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects import postgresql
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([_dump(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("cursor shape mismatch")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def keyset_after(columns, values, descending: bool = False):
+    # Row-value comparison, so Postgres can seek straight into a composite index on `columns`.
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+async def estimate_count(session, query) -> int:
+    # Planner row estimate: constant cost no matter how many rows match.
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    plan = (await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))).scalar_one()
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,110 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+STATEMENT_PREVIEW_CHARS = 300
+
+
+class QueryStats:
+    # Statements run while a scope is active. Scopes nest: a query counts towards every enclosing scope,
+    # so a test can wrap a request and see the same numbers the logging middleware records for it.
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.total += seconds
+            stats.statements[statement] += 1
+            if seconds >= stats.slowest:
+                stats.slowest = seconds
+                stats.slowest_statement = statement
+            stats = stats.parent
+
+    def most_repeated(self):
+        # (statement, times run), or (None, 0) if nothing ran.
+        return self.statements.most_common(1)[0] if self.statements else (None, 0)
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.count,
+            "db_ms": round(self.total * 1000, 2),
+            "slowest_ms": round(self.slowest * 1000, 2),
+            "slowest_statement": preview(self.slowest_statement),
+        }
+
+    def headers(self) -> list:
+        return [(b"x-db-query-count", str(self.count).encode()),
+                (b"x-db-time-ms", f"{self.total * 1000:.2f}".encode()),
+                (b"x-db-slowest-ms", f"{self.slowest * 1000:.2f}".encode())]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def preview(statement: Optional[str]) -> Optional[str]:
+    if statement is None:
+        return None
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= STATEMENT_PREVIEW_CHARS else statement[:STATEMENT_PREVIEW_CHARS] + "..."
+
+
+@contextmanager
+def track_queries():
+    stats = QueryStats(_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    # For tests: fails if the block runs more than max_queries statements, listing the repeated ones first.
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        statements = "\n".join(f"  {n}x {preview(statement)}" for statement, n in stats.statements.most_common())
+        raise QueryBudgetExceeded(f"{stats.count} queries, budget is {max_queries}:\n{statements}")
+
+
+# Registered on the Engine class, so the primary and every replica engine are covered. The async engines run
+# these hooks inside the calling task's context, which is how the per-request scope is found.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    start = getattr(context, "_query_stats_start", None)
+    if stats is not None and start is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Failed statements count too; after_cursor_execute is not called for them.
+    context = exception_context.execution_context
+    stats = _current_stats.get()
+    start = getattr(context, "_query_stats_start", None)
+    if stats is not None and start is not None:
+        stats.record(exception_context.statement, time.perf_counter() - start)
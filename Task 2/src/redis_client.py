@@ -0,0 +1,21 @@
+from typing import Optional
+
+from redis import asyncio as aioredis
+
+from src.config import settings
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    global _redis
+    if _redis is None and settings.redis_url:
+        _redis = aioredis.from_url(settings.redis_url)
+    return _redis
+
+
+async def close_redis():
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from src.query_stats import preview, track_queries
+
+SENSITIVE_FIELDS = {"password"}
+LOGGED_BODY_METHODS = {"POST", "PUT", "DELETE"}
+
+_SCALAR_START = {bytes([c]) for c in b"-0123456789tfn"}
+_SCALAR_TAIL = re.compile(rb"[^\s,}\]]*")
+_CONTAINER_START = {b"[", b"{"}
+_BRACKETS = re.compile(rb"[\[\]{}]")
+
+
+class BodyMasker:
+    # Copies a JSON body through as chunks arrive, replacing values of sensitive keys (at any depth) with "***".
+    # Only string boundaries are tracked, so each chunk is handled with a few bytes.find() calls.
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.out = bytearray()
+        self.truncated = False
+        self._pending = b""
+        self._last_string = None
+        self._expect_value = False
+        self._mask_next = False
+        self._masking_scalar = False
+        self._masking_depth = 0
+
+    def feed(self, chunk: bytes):
+        if self.truncated or not chunk:
+            return
+        if len(self.out) + len(self._pending) + len(chunk) > self.limit:
+            self.truncated = True
+            return
+        data = self._pending + chunk
+        pos = 0
+        while True:
+            start = data.find(b'"', pos)
+            self._structural(data[pos:start if start != -1 else len(data)])
+            if start == -1:
+                self._pending = b""
+                return
+            end = self._string_end(data, start + 1)
+            if end == -1:
+                self._pending = data[start:]
+                return
+            self._string(data[start:end + 1])
+            pos = end + 1
+
+    @staticmethod
+    def _string_end(data: bytes, pos: int) -> int:
+        while True:
+            end = data.find(b'"', pos)
+            if end == -1:
+                return -1
+            backslashes = 0
+            while data[end - 1 - backslashes] == 0x5C:
+                backslashes += 1
+            if backslashes % 2 == 0:
+                return end
+            pos = end + 1
+
+    def _structural(self, segment: bytes):
+        if self._masking_depth:
+            segment = self._skip_container(segment)
+            if self._masking_depth:
+                return
+        if self._masking_scalar:
+            tail = _SCALAR_TAIL.match(segment).end()
+            self._masking_scalar = tail == len(segment)
+            segment = segment[tail:]
+        if not self._expect_value:
+            colon = segment.find(b":")
+            if colon == -1:
+                self.out += segment
+                return
+            self.out += segment[:colon + 1]
+            segment = segment[colon + 1:]
+            self._expect_value = True
+            self._mask_next = self._last_string in SENSITIVE_FIELDS
+        stripped = segment.lstrip()
+        if stripped:
+            # A non-string value: number, literal, object or array.
+            if self._mask_next and stripped[:1] in _SCALAR_START:
+                scalar = _SCALAR_TAIL.match(stripped)
+                segment = segment[:len(segment) - len(stripped)] + b'"***"' + stripped[scalar.end():]
+                self._masking_scalar = scalar.end() == len(stripped)
+            elif self._mask_next and stripped[:1] in _CONTAINER_START:
+                # The whole object or array is replaced; its strings are dropped until it closes.
+                self.out += segment[:len(segment) - len(stripped)] + b'"***"'
+                self._expect_value = False
+                self._mask_next = False
+                self._masking_depth = 1
+                self._structural(stripped[1:])
+                return
+            self._expect_value = False
+            self._mask_next = False
+        self.out += segment
+
+    def _skip_container(self, segment: bytes) -> bytes:
+        # Returns what follows the masked container, or b"" while it is still open.
+        for bracket in _BRACKETS.finditer(segment):
+            self._masking_depth += 1 if bracket.group() in _CONTAINER_START else -1
+            if not self._masking_depth:
+                return segment[bracket.end():]
+        return b""
+
+    def _string(self, token: bytes):
+        if self._masking_depth:
+            return
+        if self._expect_value:
+            self.out += b'"***"' if self._mask_next else token
+            self._expect_value = False
+            self._mask_next = False
+            self._last_string = None
+        else:
+            self.out += token
+            self._last_string = token[1:-1].decode("utf-8", "replace")
+
+
+class LogWriter:
+    # Bounded queue drained by one background task; records are serialized and written in batches off the loop.
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float = 0.05, stream=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stream = stream or sys.stdout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._task = None
+
+    def submit(self, record: dict):
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Let the task write the batch it holds and everything queued, then cancel it while it waits for more.
+            join = asyncio.ensure_future(self.queue.join())
+            await asyncio.wait([join, self._task], return_when=asyncio.FIRST_COMPLETED)
+            join.cancel()
+            self._task.cancel()
+            self._task = None
+        batch = self._drain([])
+        if batch:
+            self._write(batch)
+
+    def _drain(self, batch: list) -> list:
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.queue.qsize() < self.batch_size:
+                await asyncio.sleep(self.flush_interval)
+            batch = self._drain(batch)
+            await asyncio.to_thread(self._write, batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    def _write(self, batch: list):
+        self.stream.write("".join(json.dumps(_finalize(record)) + "\n" for record in batch))
+        self.stream.flush()
+
+
+def _finalize(record: dict) -> dict:
+    record["timestamp"] = datetime.fromtimestamp(record["timestamp"], timezone.utc).isoformat()
+    body = record.pop("body", None)
+    if body:
+        try:
+            record["body"] = json.loads(body)
+        except ValueError:
+            pass
+    return record
+
+
+class RequestLoggingMiddleware:
+    def __init__(self, app, writer: LogWriter, sample_rate: float = 1.0, body_limit: int = 4096,
+                 query_headers: bool = False, query_repeat_threshold: int = 10):
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+        self.body_limit = body_limit
+        self.query_headers = query_headers
+        self.query_repeat_threshold = query_repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = str(uuid.uuid4())
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        masker = BodyMasker(self.body_limit) if sampled and scope["method"] in LOGGED_BODY_METHODS else None
+        status_code = 500
+
+        async def receive_and_mask():
+            message = await receive()
+            if message["type"] == "http.request":
+                masker.feed(message.get("body", b""))
+            return message
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = [*message.get("headers", ()), (b"x-request-id", request_id.encode())]
+                if self.query_headers:
+                    # Queries run after the headers are sent (streamed bodies) are only in the log record.
+                    headers += queries.headers()
+                message["headers"] = headers
+            await send(message)
+
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive_and_mask if masker else receive, send_with_request_id)
+            finally:
+                db = queries.summary()
+                # The same statement run over and over in one request is almost always an N+1 loop.
+                repeated_statement, repeated = queries.most_repeated()
+                if repeated >= self.query_repeat_threshold:
+                    db["repeated_statement"] = preview(repeated_statement)
+                    db["repeated"] = repeated
+                if sampled or status_code >= 500 or "repeated" in db:
+                    record = {
+                        "request_id": request_id,
+                        "method": scope["method"],
+                        "endpoint": scope["path"],
+                        "status_code": status_code,
+                        "duration_ms": int((time.perf_counter() - start) * 1000),
+                        # Set by get_current_user once the token is decoded; None for anonymous requests.
+                        "user_id": scope.get("state", {}).get("user_id"),
+                        "timestamp": time.time(),
+                        "db": db,
+                    }
+                    if masker is not None and not masker.truncated:
+                        record["body"] = bytes(masker.out)
+                    self.writer.submit(record)
@@ -1,44 +1,71 @@
+import hashlib
+import time
 import jwt
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from src.cache import TTLCache
+from src.config import settings
 from src.database import get_async_session
 from src.models.db import UserDB
 from src.models.generated import UserRegister, UserLogin, TokenResponse, RefreshRequest
+from src.services.password_hasher import HasherSaturatedError, password_hasher
 
 router = APIRouter()
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 SECRET_KEY = "marketplace_secret"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_MINUTES = 30
 REFRESH_TOKEN_DAYS = 30
 
+# Payloads of access tokens that already passed jwt.decode, keyed by token digest and expiring at the token's exp.
+token_cache = TTLCache(settings.token_cache_size, ttl=ACCESS_TOKEN_MINUTES * 60)
+
 
 def error_resp(code: int, err_code: str, msg: str):
     return JSONResponse(status_code=code, content={"error_code": err_code, "message": msg})
 
 
+def hasher_saturated_resp():
+    resp = error_resp(503, "SERVICE_OVERLOADED", "Too many concurrent authentication requests, retry later")
+    resp.headers["Retry-After"] = "1"
+    return resp
+
+
 def create_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
     to_encode.update({"exp": datetime.now(timezone.utc) + expires_delta})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def decode_access_token(token: str) -> dict:
+    # Every caller gets its own copy, so a caller that changes it can't affect later requests with the token.
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl > 0:
+        token_cache.set(key, payload, ttl)
+    return dict(payload)
+
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        payload = decode_access_token(credentials.credentials)
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    # Kept in the request state for RequestLoggingMiddleware's user_id.
+    request.state.user_id = payload.get("sub")
+    return payload
 
 
 class RoleChecker:
@@ -59,7 +86,10 @@ async def register(user_in: UserRegister, session: AsyncSession = Depends(get_as
     if (await session.execute(query)).scalars().first():
         return error_resp(400, "USER_EXISTS", "Username already exists")
 
-    hashed_pw = pwd_context.hash(user_in.password)
+    try:
+        hashed_pw = await password_hasher.hash(user_in.password)
+    except HasherSaturatedError:
+        return hasher_saturated_resp()
     new_user = UserDB(username=user_in.username, password_hash=hashed_pw, role=user_in.role.value)
     session.add(new_user)
     await session.commit()
@@ -71,7 +101,11 @@ async def login(user_in: UserLogin, session: AsyncSession = Depends(get_async_se
     query = select(UserDB).where(UserDB.username == user_in.username)
     user = (await session.execute(query)).scalars().first()
 
-    if not user or not pwd_context.verify(user_in.password, user.password_hash):
+    try:
+        verified = user is not None and await password_hasher.verify(user_in.password, user.password_hash)
+    except HasherSaturatedError:
+        return hasher_saturated_resp()
+    if not verified:
         return error_resp(401, "AUTH_FAILED", "Incorrect username or password")
 
     access = create_token({"sub": str(user.id), "role": user.role}, timedelta(minutes=ACCESS_TOKEN_MINUTES))
@@ -1,17 +1,49 @@
 import uuid
-from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, status, Path
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query, status, Path
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 
-from src.database import get_async_session
-from src.models.db import ProductDB, OrderDB, OrderItemDB, UserOperationDB, PromoCodeDB
-from src.models.generated import OrderCreate, OrderUpdate, OrderResponse, OrderStatus, ProductStatus
+from src.config import settings
+from src.database import get_async_session, get_read_session
+from src.metrics import orders_total
+from src.models.db import OrderDB, OrderItemDB, OrderRequestDB
+from src.models.generated import (OrderCreate, OrderUpdate, OrderResponse, OrderStatus, PaginatedOrderResponse,
+                                  OrderRequestResponse)
+from src.pagination import InvalidCursorError, decode_cursor, encode_cursor
 from src.routers.auth import RoleChecker
+from src.services.idempotency import IdempotencyStore, request_hash
+from src.services.operation_audit import OperationAuditLog
+from src.services.outbox import OutboxRelay, add_order_created, create_outbox_sink
+from src.services.product_cache import product_cache
+from src.services.order_cancellation import OrderExpirySweeper, cancel_order_atomically
+from src.services.order_history import get_order, list_user_orders
+from src.services.order_intake import OrderIntakeWorkers, enqueue_order, request_response
+from src.services.promo import PromoRedemptionError, redeem_promo
+from src.services.rate_limit import create_rate_limiter
+from src.services.stock import StockReservationError, reserve_stock
 
 router = APIRouter()
-RATE_LIMIT_MINUTES = 1
+order_rate_limiter = create_rate_limiter("create-order", settings.order_rate_limit,
+                                         settings.order_rate_limit_window_seconds)
+operation_audit = OperationAuditLog(enabled=settings.audit_user_operations, batch_size=settings.audit_batch_size,
+                                    flush_interval=settings.audit_flush_interval_seconds,
+                                    max_buffer=settings.audit_max_buffer)
+order_expiry_sweeper = OrderExpirySweeper(enabled=settings.order_expiry_enabled,
+                                          deadline_seconds=settings.order_payment_deadline_seconds,
+                                          interval=settings.order_expiry_interval_seconds,
+                                          batch_size=settings.order_expiry_batch_size)
+outbox_relay = OutboxRelay(create_outbox_sink(), enabled=settings.outbox_relay_enabled,
+                           batch_size=settings.outbox_batch_size, interval=settings.outbox_poll_interval_seconds)
+order_intake = OrderIntakeWorkers(enabled=settings.order_intake_mode == "queued", workers=settings.order_workers,
+                                  batch_size=settings.order_worker_batch_size,
+                                  interval=settings.order_worker_poll_interval_seconds,
+                                  retention=settings.order_request_retention_seconds, audit=operation_audit)
+idempotency_store = IdempotencyStore(ttl=settings.idempotency_key_ttl_seconds,
+                                     purge_interval=settings.idempotency_purge_interval_seconds,
+                                     purge_batch_size=settings.idempotency_purge_batch_size)
 
 allow_users_admins = RoleChecker(["USER", "ADMIN"])
 
@@ -20,58 +52,78 @@ def error_resp(code: int, err_code: str, msg: str, details: dict = None):
     return JSONResponse(status_code=code, content={"error_code": err_code, "message": msg, "details": details})
 
 
+def order_result(code: int, err_code: str, msg: str, details: dict = None):
+    # Every outcome of an order attempt is counted under its error code (CREATED on success).
+    orders_total.inc(err_code)
+    return error_resp(code, err_code, msg, details)
+
+
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_order(order_in: OrderCreate, session: AsyncSession = Depends(get_async_session),
-                       user: dict = Depends(allow_users_admins)):
+                       user: dict = Depends(allow_users_admins),
+                       idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255)):
     user_id = uuid.UUID(user["sub"])
-    now = datetime.now(timezone.utc)
-
-    time_threshold = now - timedelta(minutes=RATE_LIMIT_MINUTES)
-    recent_op_query = select(UserOperationDB).where(
-        and_(UserOperationDB.user_id == user_id, UserOperationDB.operation_type == 'CREATE_ORDER',
-             UserOperationDB.created_at >= time_threshold))
-    if (await session.execute(recent_op_query)).scalars().first():
-        return error_resp(429, "ORDER_LIMIT_EXCEEDED", "Rate limit exceeded")
-
+    if idempotency_key is None:
+        return await create_order_once(order_in, session, user_id)
+    payload_hash = request_hash(order_in.model_dump_json())
+    return await idempotency_store.run(session, user_id, idempotency_key, payload_hash,
+                                       lambda: create_order_once(order_in, session, user_id,
+                                                                 idempotency_key, payload_hash))
+
+
+async def create_order_once(order_in: OrderCreate, session: AsyncSession, user_id: uuid.UUID,
+                            idempotency_key: Optional[str] = None, payload_hash: Optional[str] = None):
+    if idempotency_key is not None:
+        # Claimed before the rate limit, so a duplicate on another worker waits here for the first attempt and
+        # gets its response back instead of being counted, and possibly refused, as a new order.
+        response = await idempotency_store.claim(session, user_id, idempotency_key, payload_hash)
+        if response is not None:
+            return response
+
+    if not await order_rate_limiter.acquire(str(user_id)):
+        return order_result(429, "ORDER_LIMIT_EXCEEDED", "Rate limit exceeded")
+
+    # In queued mode the order is only validated and stored here; order workers apply it later.
+    apply = queue_order if order_intake.enabled else place_order
+    try:
+        response = await apply(order_in, session, user_id, idempotency_key)
+    except BaseException:
+        await order_rate_limiter.release(str(user_id))
+        orders_total.inc("ERROR")
+        raise
+    if response.status_code not in (status.HTTP_201_CREATED, status.HTTP_202_ACCEPTED):
+        await order_rate_limiter.release(str(user_id))
+    return response
+
+
+async def place_order(order_in: OrderCreate, session: AsyncSession, user_id: uuid.UUID,
+                      idempotency_key: Optional[str] = None) -> JSONResponse:
+    # With an idempotency key, the caller has claimed it in this session; the response is stored with the order.
     active_order_query = select(OrderDB).where(
         and_(OrderDB.user_id == user_id, OrderDB.status.in_([OrderStatus.CREATED, OrderStatus.PAYMENT_PENDING])))
     if (await session.execute(active_order_query)).scalars().first():
-        return error_resp(409, "ORDER_HAS_ACTIVE", "User has active order")
+        return order_result(409, "ORDER_HAS_ACTIVE", "User has active order")
+
+    try:
+        lines = await reserve_stock(session, order_in.items)
+    except StockReservationError as e:
+        return order_result(e.status_code, e.error_code, e.message,
+                            {"product_id": e.product_id} if e.product_id else None)
 
     total_amount = 0
     items_to_create = []
-    for item in order_in.items:
-        product = (await session.execute(
-            select(ProductDB).where(ProductDB.id == uuid.UUID(item.product_id)))).scalars().first()
-        if not product: return error_resp(404, "PRODUCT_NOT_FOUND", "Product not found")
-        if product.status != ProductStatus.ACTIVE: return error_resp(409, "PRODUCT_INACTIVE", "Product inactive")
-        if product.stock < item.quantity: return error_resp(409, "INSUFFICIENT_STOCK", "Not enough stock",
-                                                            {"product_id": item.product_id})
-
-        product.stock -= item.quantity
-        price_at_order = float(product.price)
-        total_amount += price_at_order * item.quantity
-        items_to_create.append(
-            OrderItemDB(product_id=product.id, quantity=item.quantity, price_at_order=price_at_order))
+    for product_id, quantity, price in lines:
+        price_at_order = float(price)
+        total_amount += price_at_order * quantity
+        items_to_create.append(OrderItemDB(product_id=product_id, quantity=quantity, price_at_order=price_at_order))
 
     discount_amount = 0
     promo_code_id = None
     if order_in.promo_code:
-        promo = (
-            await session.execute(select(PromoCodeDB).where(PromoCodeDB.code == order_in.promo_code))).scalars().first()
-        if not promo or not promo.active or promo.current_uses >= promo.max_uses or not (
-                promo.valid_from <= now <= promo.valid_until):
-            return error_resp(422, "PROMO_CODE_INVALID", "Promo invalid")
-        if total_amount < float(promo.min_order_amount):
-            return error_resp(422, "PROMO_CODE_MIN_AMOUNT", "Below minimum amount")
-
-        if promo.discount_type == 'PERCENTAGE':
-            discount_amount = total_amount * (float(promo.discount_value) / 100)
-            if discount_amount > total_amount * 0.7: discount_amount = 0
-        else:
-            discount_amount = min(float(promo.discount_value), total_amount)
-        promo.current_uses += 1
-        promo_code_id = promo.id
+        try:
+            promo_code_id, discount_amount = await redeem_promo(session, order_in.promo_code, total_amount)
+        except PromoRedemptionError as e:
+            return order_result(422, e.error_code, e.message)
         total_amount -= discount_amount
 
     new_order = OrderDB(user_id=user_id, status=OrderStatus.CREATED, total_amount=total_amount,
@@ -82,10 +134,65 @@ async def create_order(order_in: OrderCreate, session: AsyncSession = Depends(ge
     for oi in items_to_create:
         oi.order_id = new_order.id
         session.add(oi)
+    add_order_created(session, new_order, items_to_create)
 
-    session.add(UserOperationDB(user_id=user_id, operation_type='CREATE_ORDER'))
+    response = error_resp(201, "CREATED", "Use actual schema mapping in prod", {"id": str(new_order.id)})
+    if idempotency_key is not None:
+        await idempotency_store.save(session, user_id, idempotency_key, response)
+    await session.commit()
+    orders_total.inc("CREATED")
+    operation_audit.record(user_id, "CREATE_ORDER")
+    await product_cache.invalidate(*(product_id for product_id, _, _ in lines))
+    return response
+
+
+async def queue_order(order_in: OrderCreate, session: AsyncSession, user_id: uuid.UUID,
+                      idempotency_key: Optional[str] = None) -> JSONResponse:
+    request = await enqueue_order(session, user_id, order_in)
+    response = JSONResponse(status_code=202, content=request_response(request),
+                            headers={"Location": f"/orders/requests/{request.id}"})
+    if idempotency_key is not None:
+        await idempotency_store.save(session, user_id, idempotency_key, response)
     await session.commit()
-    return error_resp(201, "CREATED", "Use actual schema mapping in prod", {"id": str(new_order.id)})
+    order_intake.notify()
+    return response
+
+
+@router.get("/requests/{id}", response_model=OrderRequestResponse)
+async def read_order_request(id: uuid.UUID = Path(...), session: AsyncSession = Depends(get_async_session),
+                             user: dict = Depends(allow_users_admins)):
+    # Read from the primary: the status is polled right after the 202 and changes as soon as a worker commits.
+    request = await session.get(OrderRequestDB, id)
+    if not request:
+        return error_resp(404, "ORDER_REQUEST_NOT_FOUND", "Order request not found")
+    if user["role"] != "ADMIN" and request.user_id != uuid.UUID(user["sub"]):
+        return error_resp(403, "ORDER_OWNERSHIP_VIOLATION", "Access denied")
+    return request_response(request)
+
+
+@router.get("", response_model=PaginatedOrderResponse)
+async def list_orders(size: int = Query(20, ge=1, le=100), cursor: Optional[str] = None,
+                      session: AsyncSession = Depends(get_read_session), user: dict = Depends(allow_users_admins)):
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+        except InvalidCursorError:
+            return error_resp(400, "INVALID_CURSOR", "Invalid cursor")
+    orders, has_more = await list_user_orders(session, uuid.UUID(user["sub"]), size, after)
+    next_cursor = encode_cursor(orders[-1]["created_at"], orders[-1]["id"]) if has_more else None
+    return {"items": orders, "size": size, "nextCursor": next_cursor}
+
+
+@router.get("/{id}", response_model=OrderResponse)
+async def read_order(id: uuid.UUID = Path(...), session: AsyncSession = Depends(get_read_session),
+                     user: dict = Depends(allow_users_admins)):
+    order = await get_order(session, id)
+    if not order:
+        return error_resp(404, "ORDER_NOT_FOUND", "Order not found")
+    if user["role"] != "ADMIN" and order["user_id"] != uuid.UUID(user["sub"]):
+        return error_resp(403, "ORDER_OWNERSHIP_VIOLATION", "Access denied")
+    return order
 
 
 @router.post("/{id}/cancel", status_code=status.HTTP_200_OK)
@@ -101,16 +208,9 @@ async def cancel_order(id: uuid.UUID = Path(...), session: AsyncSession = Depend
     if order.status not in [OrderStatus.CREATED, OrderStatus.PAYMENT_PENDING]:
         return error_resp(409, "INVALID_STATE_TRANSITION", "Invalid state")
 
-    items = (await session.execute(select(OrderItemDB).where(OrderItemDB.order_id == order.id))).scalars().all()
-    for item in items:
-        product = (await session.execute(select(ProductDB).where(ProductDB.id == item.product_id))).scalars().first()
-        if product: product.stock += item.quantity
-
-    if order.promo_code_id:
-        promo = (
-            await session.execute(select(PromoCodeDB).where(PromoCodeDB.id == order.promo_code_id))).scalars().first()
-        if promo: promo.current_uses -= 1
-
-    order.status = OrderStatus.CANCELED
+    canceled, product_ids = await cancel_order_atomically(session, order.id)
+    if not canceled:
+        return error_resp(409, "INVALID_STATE_TRANSITION", "Invalid state")
     await session.commit()
+    await product_cache.invalidate(*product_ids)
     return {"status": "success"}
\ No newline at end of file
@@ -1,14 +1,26 @@
 import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from typing import Optional
-from fastapi import APIRouter, Depends, Query, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, literal_column
 
-from src.database import get_async_session
+from src.config import settings
+from src.database import client_key, get_async_session, get_read_session, replica_router
+from src.etags import etag_headers, etag_matches, not_modified_response, page_etag, product_etag
+from src.fast_json import PRODUCT_COLUMNS, FastJSONResponse, product_items
 from src.models.db import ProductDB
-from src.models.generated import ProductCreate, ProductUpdate, ProductResponse, PaginatedProductResponse, ProductStatus
+from src.models.generated import (ProductCreate, ProductUpdate, ProductResponse, PaginatedProductResponse, ProductStatus,
+                                  ProductCountMode, ProductExportFormat, BulkImportResponse, ProductFacetsResponse,
+                                  ProductSort)
+from src.pagination import InvalidCursorError, decode_cursor, encode_cursor, estimate_count, keyset_after
 from src.routers.auth import RoleChecker
+from src.services.bulk_import import import_products
+from src.services.product_cache import product_cache
+from src.services.product_export import MEDIA_TYPES, export_products
+from src.services.product_facets import facet_total, product_facets
 
 router = APIRouter()
 
@@ -18,11 +30,59 @@ def product_not_found_response():
                         content={"error_code": "PRODUCT_NOT_FOUND", "message": "Product not found", "details": None})
 
 
+def invalid_cursor_response():
+    return JSONResponse(status_code=400,
+                        content={"error_code": "INVALID_CURSOR", "message": "Invalid cursor", "details": None})
+
+
 def access_denied_response():
     return JSONResponse(status_code=403,
                         content={"error_code": "ACCESS_DENIED", "message": "Access denied", "details": None})
 
 
+def unsupported_media_type_response():
+    return JSONResponse(status_code=415,
+                        content={"error_code": "UNSUPPORTED_MEDIA_TYPE",
+                                 "message": "Use application/x-ndjson or text/csv", "details": None})
+
+
+def product_page_response(rows, total_elements: Optional[int], page: int, size: int, next_cursor: Optional[str],
+                          response: Response, if_none_match: Optional[str]):
+    # rows are PRODUCT_COLUMNS tuples; the fast path encodes them directly, the other validates them first.
+    # A client that already holds this exact page gets a 304 before anything is serialized.
+    etag = page_etag(rows, total_elements, page, size, next_cursor)
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    if settings.fast_json_responses:
+        return FastJSONResponse({"items": product_items(rows), "totalElements": total_elements, "page": page,
+                                 "size": size, "nextCursor": next_cursor}, headers=etag_headers(etag))
+    response.headers.update(etag_headers(etag))
+    return PaginatedProductResponse.model_validate(
+        {"items": rows, "totalElements": total_elements, "page": page, "size": size, "nextCursor": next_cursor},
+        from_attributes=True)
+
+
+def parse_price(value) -> Decimal:
+    # Cursor prices are bound as numeric: a float parameter would make Postgres compare as double precision
+    # and skip the (price, id) index.
+    try:
+        price = Decimal(str(value))
+    except InvalidOperation as e:
+        raise ValueError("invalid price") from e
+    if not price.is_finite():
+        raise ValueError("invalid price")
+    return price
+
+
+# Keyset per sort: the sort column (id breaks ties), whether it runs backwards, and the cursor value parser.
+PRODUCT_SORTS = {
+    ProductSort.oldest: (ProductDB.created_at, False, datetime.fromisoformat),
+    ProductSort.newest: (ProductDB.created_at, True, datetime.fromisoformat),
+    ProductSort.price_asc: (ProductDB.price, False, parse_price),
+    ProductSort.price_desc: (ProductDB.price, True, parse_price),
+}
+
+
 allow_all = RoleChecker(["USER", "SELLER", "ADMIN"])
 allow_sellers_admins = RoleChecker(["SELLER", "ADMIN"])
 
@@ -41,25 +101,149 @@ async def create_product(product_in: ProductCreate, session: AsyncSession = Depe
     return new_product
 
 
+@router.post(":bulk", response_model=BulkImportResponse)
+async def bulk_import_products(request: Request, user: dict = Depends(allow_sellers_admins)):
+    if not user:
+        return access_denied_response()
+    content_type = request.headers.get("content-type", "application/x-ndjson").split(";")[0].strip()
+    if content_type not in ("application/x-ndjson", "application/jsonl", "text/csv"):
+        return unsupported_media_type_response()
+
+    result = await import_products(
+        request.stream(), is_csv=content_type == "text/csv",
+        seller_id=uuid.UUID(user["sub"]) if user["role"] == "SELLER" else None,
+        chunk_size=settings.bulk_import_chunk_size, max_errors=settings.bulk_import_max_errors)
+    # The import writes on its own connection, outside get_async_session, so it marks the write itself.
+    if result.inserted:
+        replica_router.mark_write(client_key(request))
+    return result.to_dict()
+
+
+@router.get("/export")
+async def export_product_catalogue(request: Request, format: ProductExportFormat = ProductExportFormat.ndjson,
+                                   status: Optional[ProductStatus] = None, category: Optional[str] = None,
+                                   user: dict = Depends(allow_all)):
+    return StreamingResponse(export_products(format, status, category, settings.export_batch_size,
+                                             client_key(request)),
+                             media_type=MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f"attachment; filename=products.{format.value}"})
+
+
+@router.get("/facets", response_model=ProductFacetsResponse)
+async def get_product_facets(status: Optional[ProductStatus] = None, category: Optional[str] = None,
+                             session: AsyncSession = Depends(get_read_session), user: dict = Depends(allow_all)):
+    return await product_facets(session, status, category)
+
+
+@router.get("/search", response_model=PaginatedProductResponse)
+async def search_products(q: str = Query(..., min_length=1, max_length=200), size: int = Query(20, ge=1),
+                          status: Optional[ProductStatus] = None, category: Optional[str] = None,
+                          cursor: Optional[str] = None, count: ProductCountMode = ProductCountMode.none,
+                          response: Response = None, if_none_match: Optional[str] = Header(None),
+                          session: AsyncSession = Depends(get_read_session), user: dict = Depends(allow_all)):
+    search_vector = ProductDB.__table__.c.search_vector
+    # The config is inlined rather than bound so estimate_count() can render the query with literal values.
+    ts_query = func.websearch_to_tsquery(literal_column("'simple'"), q)
+    rank = func.ts_rank(search_vector, ts_query)
+
+    query = select(ProductDB).where(search_vector.op("@@")(ts_query))
+    if status: query = query.where(ProductDB.status == status)
+    if category: query = query.where(ProductDB.category == category)
+
+    # Best match first; id breaks ties so (rank, id) is a stable keyset.
+    page_query = (query.with_only_columns(*PRODUCT_COLUMNS, rank.label("rank"))
+                  .order_by(rank.desc(), ProductDB.id.desc()).limit(size + 1))
+    if cursor:
+        try:
+            last_rank, last_id = decode_cursor(cursor, float, uuid.UUID)
+        except InvalidCursorError:
+            return invalid_cursor_response()
+        page_query = page_query.where(keyset_after((rank, ProductDB.id), (last_rank, last_id), descending=True))
+    rows = (await session.execute(page_query)).all()
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        # ts_rank is a float4: it survives the cursor's JSON float exactly and is compared back as float8 without
+        # rounding, so equal and nearly equal ranks neither skip nor repeat rows at page boundaries.
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1].id)
+
+    total_elements = None
+    if count == ProductCountMode.exact:
+        total_elements = (await session.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+    elif count == ProductCountMode.estimate:
+        total_elements = await estimate_count(session, query)
+
+    return product_page_response(rows, total_elements, 0, size, next_cursor, response, if_none_match)
+
+
+def product_response(data: dict, if_none_match: Optional[str]):
+    etag = product_etag(data["id"], data["updated_at"])
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    return FastJSONResponse(data, headers=etag_headers(etag))
+
+
 @router.get("/{id}", response_model=ProductResponse)
-async def get_product(id: uuid.UUID, session: AsyncSession = Depends(get_async_session),
-                      user: dict = Depends(allow_all)):
+async def get_product(id: uuid.UUID, if_none_match: Optional[str] = Header(None),
+                      session: AsyncSession = Depends(get_read_session), user: dict = Depends(allow_all)):
+    # Cached entries are already ProductResponse JSON, so a hit (304 or 200) never touches the database.
+    cached = await product_cache.get(id)
+    if cached is not None:
+        return product_response(cached, if_none_match)
+
+    load = await product_cache.load_started(id)
+    # Treat a replica row as read max_staleness ago, so a fill that may predate a recent write is dropped.
+    staleness = replica_router.max_staleness if session.info.get("replica") else 0.0
     product = (await session.execute(select(ProductDB).where(ProductDB.id == id))).scalar_one_or_none()
     if not product:
         return product_not_found_response()
-    return product
+    data = ProductResponse.model_validate(product, from_attributes=True).model_dump(mode="json")
+    await product_cache.set(id, data, load, staleness)
+    return product_response(data, if_none_match)
 
 
 @router.get("", response_model=PaginatedProductResponse)
 async def list_products(page: int = Query(0, ge=0), size: int = Query(20, ge=1), status: Optional[ProductStatus] = None,
-                        category: Optional[str] = None, session: AsyncSession = Depends(get_async_session),
-                        user: dict = Depends(allow_all)):
+                        category: Optional[str] = None, min_price: Optional[float] = Query(None, ge=0),
+                        max_price: Optional[float] = Query(None, ge=0), sort: ProductSort = ProductSort.oldest,
+                        cursor: Optional[str] = None, count: ProductCountMode = ProductCountMode.exact,
+                        response: Response = None, if_none_match: Optional[str] = Header(None),
+                        session: AsyncSession = Depends(get_read_session), user: dict = Depends(allow_all)):
     query = select(ProductDB)
     if status: query = query.where(ProductDB.status == status)
     if category: query = query.where(ProductDB.category == category)
-    total_elements = (await session.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
-    products = (await session.execute(query.offset(page * size).limit(size))).scalars().all()
-    return PaginatedProductResponse(items=products, totalElements=total_elements, page=page, size=size)
+    if min_price is not None: query = query.where(ProductDB.price >= parse_price(min_price))
+    if max_price is not None: query = query.where(ProductDB.price <= parse_price(max_price))
+
+    sort_column, descending, parse_sort_value = PRODUCT_SORTS[sort]
+    keyset = (sort_column, ProductDB.id)
+    page_query = (query.with_only_columns(*PRODUCT_COLUMNS)
+                  .order_by(*(column.desc() if descending else column for column in keyset)).limit(size + 1))
+    if cursor:
+        try:
+            last_value, last_id = decode_cursor(cursor, parse_sort_value, uuid.UUID)
+        except InvalidCursorError:
+            return invalid_cursor_response()
+        page_query = page_query.where(keyset_after(keyset, (last_value, last_id), descending=descending))
+    else:
+        page_query = page_query.offset(page * size)
+    products = (await session.execute(page_query)).all()
+
+    next_cursor = None
+    if len(products) > size:
+        products = products[:size]
+        next_cursor = encode_cursor(getattr(products[-1], sort_column.key), products[-1].id)
+
+    total_elements = None
+    if count == ProductCountMode.exact and min_price is None and max_price is None:
+        total_elements = await facet_total(session, status, category)
+    elif count == ProductCountMode.exact:
+        total_elements = (await session.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+    elif count == ProductCountMode.estimate:
+        total_elements = await estimate_count(session, query)
+
+    return product_page_response(products, total_elements, page, size, next_cursor, response, if_none_match)
 
 
 @router.put("/{id}", response_model=ProductResponse)
@@ -74,6 +258,7 @@ async def update_product(id: uuid.UUID, product_in: ProductUpdate, session: Asyn
     product.name, product.description, product.price, product.stock, product.category, product.status = \
         product_in.name, product_in.description, product_in.price, product_in.stock, product_in.category, product_in.status
     await session.commit()
+    await product_cache.invalidate(id)
     await session.refresh(product)
     return product
 
@@ -89,4 +274,5 @@ async def delete_product(id: uuid.UUID, session: AsyncSession = Depends(get_asyn
 
     product.status = ProductStatus.ARCHIVED
     await session.commit()
+    await product_cache.invalidate(id)
     return None
\ No newline at end of file
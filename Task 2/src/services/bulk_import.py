@@ -0,0 +1,184 @@
+import codecs
+import csv
+import io
+import pickle
+import tempfile
+import uuid
+from collections import Counter
+from typing import AsyncIterator, BinaryIO, Iterator, List, Optional, Tuple
+
+import asyncpg
+from pydantic import ValidationError
+
+from src.database import engine
+from src.models.generated import ProductCreate
+
+COPY_COLUMNS = ["name", "description", "price", "stock", "category", "status", "seller_id"]
+CSV_NULLABLE = {"description"}
+# Validated rows are spooled in memory up to this size, then on disk.
+SPOOL_MEMORY_BYTES = 16 * 1024 * 1024
+# Rows that pass validation but that the database still refuses (e.g. NUL characters) are reported per row.
+ROW_ERRORS = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+
+# The facet counters of the imported rows, added in one statement at the end of the import transaction instead
+# of by the insert trigger after every chunk, which would hold their row locks for the rest of the load.
+DEFER_FACET_COUNTS_SQL = "SELECT set_config('app.defer_facet_counts', 'on', true)"
+ADD_FACET_COUNTS_SQL = """
+    INSERT INTO product_facet_counts (category, status, count)
+    SELECT * FROM unnest($1::varchar[], $2::product_status[], $3::bigint[])
+    ON CONFLICT (category, status) DO UPDATE SET count = product_facet_counts.count + EXCLUDED.count
+"""
+
+
+async def ndjson_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    pending = b""
+    row = 0
+    async for chunk in stream:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            row += 1
+            yield row, line
+    if pending:
+        yield row + 1, pending
+
+
+def _record_boundary(text: str) -> int:
+    # End of the last complete CSV record: the last newline that is not inside a quoted field.
+    # Walks back over newlines keeping the count of quotes before the candidate, so each quote is counted once.
+    cut = text.rfind("\n")
+    quotes = text.count('"', 0, cut)
+    while cut != -1 and quotes % 2:
+        previous = text.rfind("\n", 0, cut)
+        quotes -= text.count('"', previous + 1, cut)
+        cut = previous
+    return cut + 1
+
+
+async def csv_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, dict]]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    header: Optional[List[str]] = None
+    row = 0
+
+    def parse(text: str) -> Iterator[List[str]]:
+        return (values for values in csv.reader(io.StringIO(text)) if values)
+
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        cut = _record_boundary(pending)
+        if not cut:
+            continue
+        text, pending = pending[:cut], pending[cut:]
+        for values in parse(text):
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row += 1
+            yield row, dict(zip(header, values))
+    pending += decoder.decode(b"", final=True)
+    for values in parse(pending):
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        yield row, dict(zip(header, values))
+
+
+class BulkImportResult:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "message": message})
+
+    def to_dict(self) -> dict:
+        return {"inserted": self.inserted, "failed": self.failed,
+                "errors": sorted(self.errors, key=lambda error: error["row"])}
+
+
+def _validate(row, is_csv: bool) -> ProductCreate:
+    if is_csv:
+        return ProductCreate.model_validate({k: (None if k in CSV_NULLABLE and v == "" else v) for k, v in row.items()})
+    return ProductCreate.model_validate_json(row)
+
+
+async def _spool(rows, is_csv: bool, seller_id: Optional[uuid.UUID], chunk_size: int, spool: BinaryIO,
+                 result: BulkImportResult) -> int:
+    # Validates rows as they arrive and pickles each chunk of COPY records, with their row numbers, into the
+    # spool. Returns the number of chunks.
+    chunks = 0
+    row_numbers, records = [], []
+    async for row_number, row in rows:
+        if not is_csv and not row.strip():
+            continue
+        try:
+            product = _validate(row, is_csv)
+        except ValidationError as e:
+            result.add_error(row_number, "; ".join(
+                f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()))
+            continue
+        row_numbers.append(row_number)
+        records.append((product.name, product.description, product.price, product.stock,
+                        product.category, product.status.value, seller_id))
+        if len(records) >= chunk_size:
+            pickle.dump((row_numbers, records), spool, pickle.HIGHEST_PROTOCOL)
+            chunks += 1
+            row_numbers, records = [], []
+    if records:
+        pickle.dump((row_numbers, records), spool, pickle.HIGHEST_PROTOCOL)
+        chunks += 1
+    return chunks
+
+
+async def _copy(driver, row_numbers: List[int], records: List[tuple], result: BulkImportResult,
+                facet_counts: Counter):
+    # One savepoint per chunk. A chunk the database refuses is split in halves until the bad rows are
+    # isolated and reported; the rest of it is still loaded.
+    try:
+        async with driver.transaction():
+            await driver.copy_records_to_table("products", records=records, columns=COPY_COLUMNS)
+    except ROW_ERRORS as e:
+        if len(records) == 1:
+            result.add_error(row_numbers[0], f"row: {e}")
+            return
+        half = len(records) // 2
+        await _copy(driver, row_numbers[:half], records[:half], result, facet_counts)
+        await _copy(driver, row_numbers[half:], records[half:], result, facet_counts)
+        return
+    result.inserted += len(records)
+    facet_counts.update((record[4], record[5]) for record in records)
+
+
+async def import_products(stream: AsyncIterator[bytes], is_csv: bool, seller_id: Optional[uuid.UUID],
+                          chunk_size: int, max_errors: int) -> BulkImportResult:
+    # Rows are validated against the generated ProductCreate model while the upload arrives and spooled;
+    # the transaction only opens once the whole body is in, so its length is bounded by the database and not
+    # by the client. Valid rows are loaded with COPY in chunks, all inside that one transaction: either every
+    # valid row of the upload lands or none does.
+    result = BulkImportResult(max_errors)
+    rows = csv_rows(stream) if is_csv else ndjson_rows(stream)
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES) as spool:
+        chunks = await _spool(rows, is_csv, seller_id, chunk_size, spool, result)
+        if not chunks:
+            return result
+        spool.seek(0)
+        async with engine.connect() as conn:
+            driver = (await conn.get_raw_connection()).driver_connection
+            async with driver.transaction():
+                await driver.execute(DEFER_FACET_COUNTS_SQL)
+                facet_counts = Counter()
+                for _ in range(chunks):
+                    row_numbers, records = pickle.load(spool)
+                    await _copy(driver, row_numbers, records, result, facet_counts)
+                if facet_counts:
+                    facets = sorted(facet_counts.items())
+                    await driver.execute(ADD_FACET_COUNTS_SQL, [category for (category, _), _ in facets],
+                                         [status for (_, status), _ in facets], [count for _, count in facets])
+    return result
@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Takes the key for this transaction, or an expired row of it. A concurrent claim of the same key blocks on the
+# unique index until the first transaction ends, then returns nothing if it committed (its response is stored).
+CLAIM_KEY_SQL = text("""
+    INSERT INTO idempotency_keys (user_id, key, request_hash, expires_at)
+    VALUES (:user_id, :key, :request_hash, now() + make_interval(secs => :ttl))
+    ON CONFLICT (user_id, key) DO UPDATE
+    SET request_hash = EXCLUDED.request_hash, status_code = NULL, response_body = NULL, response_location = NULL,
+        created_at = now(), expires_at = EXCLUDED.expires_at
+    WHERE idempotency_keys.expires_at <= now()
+    RETURNING 1
+""")
+
+STORED_RESPONSE_SQL = text("""
+    SELECT request_hash, status_code, response_body, response_location
+    FROM idempotency_keys
+    WHERE user_id = :user_id AND key = :key AND expires_at > now() AND status_code IS NOT NULL
+""")
+
+SAVE_RESPONSE_SQL = text("""
+    UPDATE idempotency_keys
+    SET status_code = :status_code, response_body = :response_body, response_location = :response_location
+    WHERE user_id = :user_id AND key = :key
+""")
+
+PURGE_EXPIRED_SQL = text("""
+    DELETE FROM idempotency_keys
+    WHERE ctid IN (SELECT ctid FROM idempotency_keys WHERE expires_at <= now() LIMIT :batch_size)
+""")
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: int
+    body: bytes
+    location: Optional[str]
+
+
+def request_hash(payload: str) -> str:
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    # Stored responses live in Postgres, claimed inside the transaction they describe. Duplicates that arrive
+    # while the first request is still running wait for it: in-process on a shared future, across workers on
+    # the row lock taken by the claim.
+    def __init__(self, ttl: float, purge_interval: float, purge_batch_size: int):
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.purge_batch_size = purge_batch_size
+        self.replays = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Tuple[uuid.UUID, str], asyncio.Future] = {}
+        self._task = None
+
+    async def run(self, session: AsyncSession, user_id: uuid.UUID, key: str, payload_hash: str,
+                  execute: Callable[[], Awaitable[Response]]) -> Response:
+        # Returns the stored response for the key, or the response of execute(), which must claim the key
+        # (claim) and store its response (save) in its own transaction. Waiters only replay what the first
+        # request stored, read back like a duplicate on another worker would; if it stored nothing (it failed,
+        # or was refused before the order), the next waiter runs itself.
+        flight = (user_id, key)
+        waited = False
+        while flight in self._in_flight:
+            await asyncio.shield(self._in_flight[flight])
+            waited = True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[flight] = future
+        try:
+            stored = await self.get(session, user_id, key)
+            if stored is not None:
+                if waited:
+                    self.coalesced += 1
+                return self.replay(stored, payload_hash)
+            return await execute()
+        finally:
+            del self._in_flight[flight]
+            future.set_result(None)
+
+    async def get(self, session: AsyncSession, user_id: uuid.UUID, key: str) -> Optional[StoredResponse]:
+        row = (await session.execute(STORED_RESPONSE_SQL, {"user_id": user_id, "key": key})).first()
+        return None if row is None else StoredResponse(row.request_hash, row.status_code, row.response_body,
+                                                     row.response_location)
+
+    async def claim(self, session: AsyncSession, user_id: uuid.UUID, key: str,
+                    payload_hash: str) -> Optional[Response]:
+        # None if this transaction now owns the key; otherwise the response to send instead of executing.
+        claimed = (await session.execute(CLAIM_KEY_SQL, {
+            "user_id": user_id, "key": key, "request_hash": payload_hash, "ttl": self.ttl,
+        })).first()
+        if claimed is not None:
+            return None
+        stored = await self.get(session, user_id, key)
+        if stored is None:
+            return JSONResponse(status_code=409, content={
+                "error_code": "IDEMPOTENCY_KEY_IN_USE",
+                "message": "A request with this Idempotency-Key is still being processed",
+                "details": None,
+            })
+        return self.replay(stored, payload_hash)
+
+    async def save(self, session: AsyncSession, user_id: uuid.UUID, key: str, response: Response):
+        await session.execute(SAVE_RESPONSE_SQL, {
+            "user_id": user_id, "key": key, "status_code": response.status_code, "response_body": bytes(response.body),
+            "response_location": response.headers.get("location"),
+        })
+
+    def replay(self, stored: StoredResponse, payload_hash: str) -> Response:
+        if stored.request_hash != payload_hash:
+            return JSONResponse(status_code=422, content={
+                "error_code": "IDEMPOTENCY_KEY_REUSED",
+                "message": "Idempotency-Key was already used with a different request",
+                "details": None,
+            })
+        self.replays += 1
+        headers = {REPLAYED_HEADER: "true"}
+        if stored.location is not None:
+            headers["Location"] = stored.location
+        return Response(stored.body, status_code=stored.status_code, media_type="application/json",
+                        headers=headers)
+
+    async def purge_expired(self) -> int:
+        purged = 0
+        while True:
+            async with async_session_maker() as session:
+                deleted = (await session.execute(PURGE_EXPIRED_SQL, {"batch_size": self.purge_batch_size})).rowcount
+                await session.commit()
+            purged += deleted
+            if deleted < self.purge_batch_size:
+                return purged
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                await self.purge_expired()
+            except Exception as e:
+                logger.error(f"Idempotency key purge failed: {e}")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"replays": self.replays, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from src.database import async_session_maker
+from src.models.db import UserOperationDB
+
+logger = logging.getLogger(__name__)
+
+
+class OperationAuditLog:
+    # Optional audit trail of user operations: buffered in memory and inserted in batches by a background task.
+    def __init__(self, enabled: bool, batch_size: int, flush_interval: float, max_buffer: int):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._buffer = []
+        self._task = None
+
+    def record(self, user_id: uuid.UUID, operation_type: str):
+        if not self.enabled:
+            return
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append({"user_id": user_id, "operation_type": operation_type,
+                             "created_at": datetime.now(timezone.utc)})
+
+    def _requeue(self, batch: list):
+        # A batch that failed to insert goes back in front of the records that arrived meanwhile, for the next
+        # flush. The newest records past max_buffer are dropped.
+        self._buffer = batch + self._buffer
+        if len(self._buffer) > self.max_buffer:
+            self.dropped += len(self._buffer) - self.max_buffer
+            del self._buffer[self.max_buffer:]
+
+    async def flush(self):
+        if self.dropped > self._reported_dropped:
+            logger.warning(f"Dropped {self.dropped - self._reported_dropped} audit records: buffer is full")
+            self._reported_dropped = self.dropped
+        while self._buffer:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            try:
+                async with async_session_maker() as session:
+                    await session.execute(insert(UserOperationDB), batch)
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} audit records, keeping them for the next flush: {e}")
+                self._requeue(batch)
+                return
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import uuid
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import async_session_maker
+from src.services.product_cache import product_cache
+
+logger = logging.getLogger(__name__)
+
+# Cancels the orders selected by the `target` CTE (id, promo_code_id; rows locked FOR UPDATE) in one statement:
+# flips their status, puts the reserved quantities back on the products, gives back their promo uses and writes
+# an OrderCanceled outbox event per order with the given `reason`.
+# Locks are taken in the same order as order creation (orders, then products and promo codes by id),
+# so cancellations, the sweeper and new orders can't deadlock each other.
+_CANCEL_ORDERS_SQL = """
+    WITH target AS ({target}),
+    canceled AS (
+        UPDATE orders o
+        SET status = 'CANCELED'
+        FROM target t
+        WHERE o.id = t.id
+        RETURNING o.id, o.user_id, o.promo_code_id
+    ),
+    events AS (
+        INSERT INTO order_outbox (aggregate_id, event_type, payload)
+        SELECT id, 'OrderCanceled', json_build_object('order_id', id, 'user_id', user_id, 'status', 'CANCELED',
+                                                      'reason', '{reason}', 'canceled_at', now())
+        FROM canceled
+    ),
+    restock AS (
+        SELECT i.product_id, sum(i.quantity) AS quantity
+        FROM order_items i
+        JOIN canceled c ON c.id = i.order_id
+        GROUP BY i.product_id
+    ),
+    locked_products AS (
+        SELECT p.id
+        FROM products p
+        JOIN restock r ON r.product_id = p.id
+        ORDER BY p.id
+        FOR UPDATE OF p
+    ),
+    restocked AS (
+        UPDATE products p
+        SET stock = p.stock + r.quantity
+        FROM restock r, locked_products l
+        WHERE p.id = r.product_id AND l.id = r.product_id
+        RETURNING p.id
+    ),
+    released AS (
+        SELECT promo_code_id, count(*) AS uses
+        FROM canceled
+        WHERE promo_code_id IS NOT NULL
+        GROUP BY promo_code_id
+    ),
+    locked_promos AS (
+        SELECT pc.id
+        FROM promo_codes pc
+        JOIN released r ON r.promo_code_id = pc.id
+        ORDER BY pc.id
+        FOR UPDATE OF pc
+    ),
+    unused AS (
+        UPDATE promo_codes pc
+        SET current_uses = pc.current_uses - r.uses
+        FROM released r, locked_promos l
+        WHERE pc.id = r.promo_code_id AND l.id = r.promo_code_id
+        RETURNING pc.id
+    )
+    SELECT (SELECT count(*) FROM canceled) AS canceled,
+           ARRAY(SELECT id FROM restocked) AS product_ids,
+           (SELECT count(*) FROM unused) AS promo_codes
+"""
+
+CANCEL_ORDER_SQL = text(_CANCEL_ORDERS_SQL.format(reason="CANCELED_BY_USER", target="""
+        SELECT id, promo_code_id
+        FROM orders
+        WHERE id = :order_id AND status IN ('CREATED', 'PAYMENT_PENDING')
+        FOR UPDATE
+"""))
+
+# Oldest unpaid orders past the deadline; SKIP LOCKED lets several workers sweep disjoint batches concurrently.
+EXPIRE_ORDERS_SQL = text(_CANCEL_ORDERS_SQL.format(reason="PAYMENT_EXPIRED", target="""
+        SELECT id, promo_code_id
+        FROM orders
+        WHERE status IN ('CREATED', 'PAYMENT_PENDING')
+          AND created_at < now() - make_interval(secs => :deadline_seconds)
+        ORDER BY created_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+"""))
+
+
+async def cancel_order_atomically(session: AsyncSession, order_id: uuid.UUID) -> Tuple[bool, List[uuid.UUID]]:
+    # Returns (canceled, restocked product ids); canceled is False if the order left the cancellable states.
+    row = (await session.execute(CANCEL_ORDER_SQL, {"order_id": order_id})).one()
+    return row.canceled > 0, list(row.product_ids)
+
+
+class OrderExpirySweeper:
+    # Cancels orders left unpaid past the payment deadline, in batches, on every API worker.
+    def __init__(self, enabled: bool, deadline_seconds: float, interval: float, batch_size: int):
+        self.enabled = enabled
+        self.deadline_seconds = deadline_seconds
+        self.interval = interval
+        self.batch_size = batch_size
+        self.expired = 0
+        self._task = None
+
+    async def sweep_batch(self) -> int:
+        async with async_session_maker() as session:
+            row = (await session.execute(EXPIRE_ORDERS_SQL, {
+                "deadline_seconds": self.deadline_seconds,
+                "batch_size": self.batch_size,
+            })).one()
+            await session.commit()
+        await product_cache.invalidate(*row.product_ids)
+        self.expired += row.canceled
+        return row.canceled
+
+    async def sweep(self) -> int:
+        expired = 0
+        while True:
+            canceled = await self.sweep_batch()
+            expired += canceled
+            if canceled < self.batch_size:
+                return expired
+
+    async def _run(self):
+        while True:
+            try:
+                expired = await self.sweep()
+                if expired:
+                    logger.info(f"Expired {expired} unpaid orders")
+            except Exception as e:
+                logger.error(f"Order expiry sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,53 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Orders with their items and a snapshot of each item's product, one statement for any number of orders:
+# items are aggregated per order in a LATERAL subquery (index on order_items(order_id)) instead of being
+# loaded order by order. Money is read as float8, the schema's number/double.
+_ORDERS_SQL = """
+    SELECT o.id, o.user_id, o.status, o.promo_code_id, o.total_amount::float8 AS total_amount,
+           o.discount_amount::float8 AS discount_amount, o.created_at, o.updated_at,
+           coalesce(i.items, '[]'::json) AS items
+    FROM orders o
+    CROSS JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+                   'id', oi.id, 'product_id', oi.product_id, 'quantity', oi.quantity,
+                   'price_at_order', oi.price_at_order::float8,
+                   'product', json_build_object('name', p.name, 'category', p.category, 'status', p.status)
+               ) ORDER BY oi.id) AS items
+        FROM order_items oi
+        JOIN products p ON p.id = oi.product_id
+        WHERE oi.order_id = o.id
+    ) i
+    WHERE {where}
+    ORDER BY o.created_at DESC, o.id DESC
+    LIMIT :limit
+"""
+
+ORDER_SQL = text(_ORDERS_SQL.format(where="o.id = :id"))
+# Newest first; the row-value comparison seeks into idx_orders_user_created_at_id.
+USER_ORDERS_SQL = text(_ORDERS_SQL.format(where="o.user_id = :user_id"))
+USER_ORDERS_AFTER_SQL = text(_ORDERS_SQL.format(
+    where="o.user_id = :user_id AND (o.created_at, o.id) < (:created_at, :last_id)"))
+
+
+async def get_order(session: AsyncSession, order_id: uuid.UUID) -> Optional[dict]:
+    row = (await session.execute(ORDER_SQL, {"id": order_id, "limit": 1})).mappings().first()
+    return None if row is None else dict(row)
+
+
+async def list_user_orders(session: AsyncSession, user_id: uuid.UUID, size: int,
+                           after: Optional[Tuple[datetime, uuid.UUID]] = None) -> Tuple[List[dict], bool]:
+    # Returns up to `size` orders older than `after` (created_at, id) and whether more follow.
+    params = {"user_id": user_id, "limit": size + 1}
+    if after is None:
+        query = USER_ORDERS_SQL
+    else:
+        query = USER_ORDERS_AFTER_SQL
+        params["created_at"], params["last_id"] = after
+    rows = [dict(row) for row in (await session.execute(query, params)).mappings()]
+    return rows[:size], len(rows) > size
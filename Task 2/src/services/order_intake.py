@@ -0,0 +1,338 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import async_session_maker
+from src.metrics import order_intake_batch_duration, order_intake_wait, orders_total
+from src.models.db import OrderDB, OrderItemDB, OrderRequestDB
+from src.models.generated import OrderCreate, OrderStatus
+from src.services.outbox import add_order_created
+from src.services.product_cache import product_cache
+from src.services.promo import PromoRedemptionError, redeem_promo
+from src.services.stock import merge_cart
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL_SECONDS = 60
+INTERNAL_ERROR = "INTERNAL_ERROR"
+
+# Oldest waiting requests; SKIP LOCKED gives every worker (in this process or another) a disjoint batch.
+CLAIM_REQUESTS_SQL = text("""
+    SELECT id, user_id, items, promo_code, created_at
+    FROM order_requests
+    WHERE status = 'QUEUED'
+    ORDER BY created_at
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+""")
+
+# Every product the batch touches, locked once in primary-key order like reserve_stock does.
+LOCK_PRODUCTS_SQL = text("""
+    SELECT id, status::text AS status, stock, price
+    FROM products
+    WHERE id = ANY(CAST(:product_ids AS uuid[]))
+    ORDER BY id
+    FOR UPDATE
+""")
+
+# The batch's promo codes, locked up front in code order: redeeming them request by request would take the row
+# locks in arrival order, and two batches sharing codes in a different order could deadlock.
+LOCK_PROMOS_SQL = text("""
+    SELECT id
+    FROM promo_codes
+    WHERE code = ANY(CAST(:codes AS text[]))
+    ORDER BY code
+    FOR UPDATE
+""")
+
+ACTIVE_USERS_SQL = text("""
+    SELECT DISTINCT user_id
+    FROM orders
+    WHERE user_id = ANY(CAST(:user_ids AS uuid[])) AND status IN ('CREATED', 'PAYMENT_PENDING')
+""")
+
+# The whole batch's stock changes in one statement: one decrement per product, however many orders took it.
+DECREMENT_STOCK_SQL = text("""
+    UPDATE products p
+    SET stock = p.stock - d.quantity
+    FROM unnest(CAST(:product_ids AS uuid[]), CAST(:quantities AS integer[])) AS d (product_id, quantity)
+    WHERE p.id = d.product_id
+""")
+
+PURGE_PROCESSED_SQL = text("""
+    DELETE FROM order_requests
+    WHERE id IN (SELECT id FROM order_requests
+                 WHERE status <> 'QUEUED' AND processed_at < now() - make_interval(secs => :retention)
+                 LIMIT :batch_size)
+""")
+
+
+class BatchFailed(Exception):
+    # An unexpected error while applying claimed requests; nothing of the batch was written.
+    def __init__(self, request_ids: List[uuid.UUID]):
+        super().__init__(f"batch of {len(request_ids)} order requests failed")
+        self.request_ids = request_ids
+
+
+class OrderRejected(Exception):
+    def __init__(self, error_code: str, message: str, details: Optional[dict] = None):
+        super().__init__(message)
+        self.error_code = error_code
+        self.message = message
+        self.details = details
+
+
+def request_response(request: OrderRequestDB) -> dict:
+    # OrderRequestResponse, for the 202 of POST /orders and for GET /orders/requests/{id}.
+    error = None
+    if request.error_code is not None:
+        error = {"error_code": request.error_code, "message": request.error_message, "details": request.error_details}
+    return {
+        "id": str(request.id),
+        "status": request.status,
+        "order_id": str(request.order_id) if request.order_id else None,
+        "error": error,
+        "created_at": request.created_at.isoformat(),
+        "processed_at": request.processed_at.isoformat() if request.processed_at else None,
+    }
+
+
+async def enqueue_order(session: AsyncSession, user_id: uuid.UUID, order_in: OrderCreate) -> OrderRequestDB:
+    # Call inside the caller's transaction; the request is only visible to workers once it commits.
+    request = OrderRequestDB(user_id=user_id, status="QUEUED", promo_code=order_in.promo_code,
+                             items=[item.model_dump(mode="json") for item in order_in.items])
+    session.add(request)
+    await session.flush()
+    return request
+
+
+class _Batch:
+    # Products locked for one batch, with the stock left after the orders accepted so far.
+    def __init__(self, products: dict, active_users: Set[uuid.UUID]):
+        self.products = products
+        self.stock = {product_id: row.stock for product_id, row in products.items()}
+        self.taken: Dict[uuid.UUID, int] = {}
+        self.active_users = active_users
+
+    def reserve(self, cart) -> Dict[uuid.UUID, float]:
+        # Same checks, in the same order, as reserve_stock; returns the price per product.
+        for product_id, quantity in cart.items():
+            row = self.products.get(product_id)
+            if row is None:
+                raise OrderRejected("PRODUCT_NOT_FOUND", "Product not found")
+            if row.status != "ACTIVE":
+                raise OrderRejected("PRODUCT_INACTIVE", "Product inactive")
+            if self.stock[product_id] < quantity:
+                raise OrderRejected("INSUFFICIENT_STOCK", "Not enough stock", {"product_id": str(product_id)})
+        for product_id, quantity in cart.items():
+            self.stock[product_id] -= quantity
+            self.taken[product_id] = self.taken.get(product_id, 0) + quantity
+        return {product_id: float(self.products[product_id].price) for product_id in cart}
+
+    def release(self, cart):
+        for product_id, quantity in cart.items():
+            self.stock[product_id] += quantity
+            self.taken[product_id] -= quantity
+
+
+class OrderIntakeWorkers:
+    # Drains order_requests in FIFO batches. A batch is one transaction: it locks the union of the batch's
+    # products once, applies the orders one by one against the stock in memory, then writes a single stock
+    # decrement per product with all the orders, items and events. Hot products are locked once per batch
+    # instead of once per order.
+    def __init__(self, enabled: bool, workers: int, batch_size: int, interval: float, retention: float, audit=None):
+        self.enabled = enabled
+        self.workers = workers
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retention = retention
+        self.audit = audit
+        self.created = 0
+        self.rejected = 0
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._last_purge = 0.0
+
+    def notify(self):
+        # Called after a request is committed, so an idle worker in this process picks it up right away.
+        self._wakeup.set()
+
+    async def process_batch(self) -> int:
+        try:
+            return await self._process(self.batch_size)
+        except BatchFailed as e:
+            logger.error(f"Order intake batch failed, applying its requests one at a time: {e.__cause__!r}")
+            retries = len(e.request_ids)
+
+        # The failed batch's requests are still the oldest queued ones. Applied alone, a request that can't be
+        # applied is rejected by itself instead of failing every batch it is claimed in.
+        processed = 0
+        for _ in range(retries):
+            try:
+                claimed = await self._process(1)
+            except BatchFailed as e:
+                await self._reject_failed(e.request_ids[0], e.__cause__)
+                claimed = 1
+            if not claimed:
+                break
+            processed += claimed
+        return processed
+
+    async def _process(self, limit: int) -> int:
+        start = time.perf_counter()
+        async with async_session_maker() as session:
+            requests = (await session.execute(CLAIM_REQUESTS_SQL, {"batch_size": limit})).all()
+            if not requests:
+                return 0
+            try:
+                outcomes, taken, processed_at = await self._apply_batch(session, requests)
+            except Exception as e:
+                # A lost connection says nothing about the requests; leave them queued for the next cycle.
+                if isinstance(e, OSError) or getattr(e, "connection_invalidated", False):
+                    raise
+                raise BatchFailed([request.id for request in requests]) from e
+
+        await product_cache.invalidate(*taken)
+        for request, outcome in zip(requests, outcomes):
+            orders_total.inc(outcome["error_code"] or "CREATED")
+            order_intake_wait.observe((processed_at - request.created_at).total_seconds())
+            if outcome["status"] == "CREATED" and self.audit is not None:
+                self.audit.record(request.user_id, "CREATE_ORDER")
+        created = sum(1 for outcome in outcomes if outcome["status"] == "CREATED")
+        self.created += created
+        self.rejected += len(outcomes) - created
+        order_intake_batch_duration.observe(time.perf_counter() - start)
+        return len(requests)
+
+    async def _reject_failed(self, request_id: uuid.UUID, error: BaseException):
+        logger.error(f"Order request {request_id} could not be applied: {error!r}")
+        async with async_session_maker() as session:
+            await session.execute(update(OrderRequestDB).where(
+                OrderRequestDB.id == request_id, OrderRequestDB.status == "QUEUED").values(
+                status="REJECTED", error_code=INTERNAL_ERROR, error_message="Order could not be processed",
+                processed_at=datetime.now(timezone.utc)))
+            await session.commit()
+        orders_total.inc(INTERNAL_ERROR)
+        self.rejected += 1
+
+    async def _apply_batch(self, session: AsyncSession, requests):
+        # Applies the claimed requests and commits; returns each request's outcome, the stock taken per product
+        # and when the batch was processed.
+        carts = [OrderCreate.model_validate({"items": r.items, "promo_code": r.promo_code}) for r in requests]
+        product_ids = sorted({item.product_id for cart in carts for item in cart.items})
+        products = {row.id: row for row in
+                    (await session.execute(LOCK_PRODUCTS_SQL, {"product_ids": product_ids})).all()}
+        promo_codes = sorted({cart.promo_code for cart in carts if cart.promo_code})
+        if promo_codes:
+            await session.execute(LOCK_PROMOS_SQL, {"codes": promo_codes})
+        active_users = set((await session.execute(
+            ACTIVE_USERS_SQL, {"user_ids": list({r.user_id for r in requests})})).scalars())
+        batch = _Batch(products, active_users)
+
+        outcomes = []
+        for request, order_in in zip(requests, carts):
+            try:
+                order, items = await self._apply(session, batch, request, order_in)
+                outcomes.append({"id": request.id, "status": "CREATED", "order_id": order.id, "error_code": None,
+                                 "error_message": None, "error_details": None})
+                add_order_created(session, order, items)
+            except OrderRejected as e:
+                outcomes.append({"id": request.id, "status": "REJECTED", "order_id": None,
+                                 "error_code": e.error_code, "error_message": e.message,
+                                 "error_details": e.details})
+
+        taken = {product_id: quantity for product_id, quantity in batch.taken.items() if quantity}
+        if taken:
+            await session.execute(DECREMENT_STOCK_SQL, {"product_ids": list(taken),
+                                                        "quantities": list(taken.values())})
+        processed_at = datetime.now(timezone.utc)
+        await session.execute(update(OrderRequestDB), [{**outcome, "processed_at": processed_at}
+                                                       for outcome in outcomes])
+        await session.commit()
+        return outcomes, taken, processed_at
+
+    async def _apply(self, session: AsyncSession, batch: _Batch, request, order_in: OrderCreate):
+        if request.user_id in batch.active_users:
+            raise OrderRejected("ORDER_HAS_ACTIVE", "User has active order")
+        cart = merge_cart(order_in.items)
+        prices = batch.reserve(cart)
+        total_amount = sum(prices[item.product_id] * item.quantity for item in order_in.items)
+
+        discount_amount = 0
+        promo_code_id = None
+        if order_in.promo_code:
+            # In a savepoint: a rejected code must not undo the rest of the batch, and redeem_promo may have
+            # taken a use before rejecting.
+            try:
+                async with session.begin_nested():
+                    promo_code_id, discount_amount = await redeem_promo(session, order_in.promo_code, total_amount)
+            except PromoRedemptionError as e:
+                batch.release(cart)
+                raise OrderRejected(e.error_code, e.message)
+            total_amount -= discount_amount
+
+        # Key and timestamps are set here rather than by server defaults: with nothing to fetch back, the
+        # batch's orders are inserted in one executemany instead of one INSERT ... RETURNING per order.
+        now = datetime.now(timezone.utc)
+        order = OrderDB(id=uuid.uuid4(), user_id=request.user_id, status=OrderStatus.CREATED,
+                        total_amount=total_amount, discount_amount=discount_amount, promo_code_id=promo_code_id,
+                        created_at=now, updated_at=now)
+        session.add(order)
+        items = [OrderItemDB(order_id=order.id, product_id=item.product_id, quantity=item.quantity,
+                             price_at_order=prices[item.product_id]) for item in order_in.items]
+        session.add_all(items)
+        batch.active_users.add(request.user_id)
+        return order, items
+
+    async def drain(self) -> int:
+        processed = 0
+        while True:
+            batch = await self.process_batch()
+            processed += batch
+            if batch < self.batch_size:
+                return processed
+
+    async def purge_processed(self) -> int:
+        purged = 0
+        while True:
+            async with async_session_maker() as session:
+                deleted = (await session.execute(PURGE_PROCESSED_SQL, {
+                    "retention": self.retention, "batch_size": self.batch_size})).rowcount
+                await session.commit()
+            purged += deleted
+            if deleted < self.batch_size:
+                return purged
+
+    async def _run(self):
+        while True:
+            try:
+                await self.drain()
+                if time.monotonic() - self._last_purge > PURGE_INTERVAL_SECONDS:
+                    self._last_purge = time.monotonic()
+                    await self.purge_processed()
+            except Exception as e:
+                logger.error(f"Order intake batch failed: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self.enabled:
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "workers": len(self._tasks), "created": self.created,
+                "rejected": self.rejected}
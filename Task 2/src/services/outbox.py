@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import List
+
+import orjson
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.database import async_session_maker
+from src.metrics import outbox_event_age, outbox_publish_duration, outbox_publish_failures, outbox_published
+from src.models.db import OrderDB, OrderOutboxDB
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "OrderCreated"
+ORDER_CANCELED = "OrderCanceled"
+
+# Oldest pending events that are the head of their order's queue. Rows a relay has locked still count as
+# pending for the NOT EXISTS check, so an order's next event is only claimed after the previous one was
+# published and deleted, and events of one order are published in order by any number of relays.
+CLAIM_EVENTS_SQL = text("""
+    SELECT o.id, o.aggregate_id, o.event_type, o.payload, o.created_at
+    FROM order_outbox o
+    WHERE NOT EXISTS (SELECT 1 FROM order_outbox e WHERE e.aggregate_id = o.aggregate_id AND e.id < o.id)
+    ORDER BY o.id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+""")
+
+DELETE_EVENTS_SQL = text("DELETE FROM order_outbox WHERE id = ANY(:ids)")
+
+
+def add_order_created(session: AsyncSession, order: OrderDB, items: list):
+    # Call after the order is flushed (id and created_at are known) and before the commit.
+    session.add(OrderOutboxDB(aggregate_id=order.id, event_type=ORDER_CREATED, payload={
+        "order_id": str(order.id),
+        "user_id": str(order.user_id),
+        "status": order.status.value,
+        "total_amount": float(order.total_amount),
+        "discount_amount": float(order.discount_amount),
+        "promo_code_id": str(order.promo_code_id) if order.promo_code_id else None,
+        "items": [{"product_id": str(item.product_id), "quantity": item.quantity,
+                   "price_at_order": float(item.price_at_order)} for item in items],
+        "created_at": order.created_at.isoformat(),
+    }))
+
+
+def encode_event(row) -> bytes:
+    # event_id is unique and increasing per order, so consumers can drop the duplicates at-least-once delivery allows.
+    return orjson.dumps({
+        "event_id": row.id,
+        "event_type": row.event_type,
+        "aggregate_id": str(row.aggregate_id),
+        "occurred_at": row.created_at,
+        "payload": row.payload,
+    }, option=orjson.OPT_UTC_Z)
+
+
+class OutboxSink(ABC):
+    async def start(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, events: List[tuple]):
+        # events: (key, value) pairs in order; returns once every event is durably accepted.
+        ...
+
+    async def stop(self):
+        pass
+
+
+class FileSink(OutboxSink):
+    # Appends one JSON event per line; for local runs and tests.
+    def __init__(self, path: str):
+        self.path = path
+
+    def _append(self, events: List[tuple]):
+        with open(self.path, "ab") as f:
+            f.write(b"".join(value + b"\n" for _, value in events))
+
+    async def publish(self, events: List[tuple]):
+        await asyncio.to_thread(self._append, events)
+
+
+class KafkaSink(OutboxSink):
+    # Keyed by order id, so all events of an order land on one partition and keep their order there.
+    def __init__(self, bootstrap_servers: str, topic: str):
+        self.bootstrap_servers = bootstrap_servers
+        self.topic = topic
+        self._producer = None
+
+    async def start(self):
+        from aiokafka import AIOKafkaProducer
+
+        producer = AIOKafkaProducer(bootstrap_servers=self.bootstrap_servers, acks="all",
+                                    enable_idempotence=True, linger_ms=5)
+        try:
+            await producer.start()
+        except Exception:
+            await producer.stop()
+            raise
+        self._producer = producer
+
+    async def publish(self, events: List[tuple]):
+        deliveries = [await self._producer.send(self.topic, key=key, value=value) for key, value in events]
+        await asyncio.gather(*deliveries)
+
+    async def stop(self):
+        if self._producer is not None:
+            await self._producer.stop()
+            self._producer = None
+
+
+def create_outbox_sink() -> OutboxSink:
+    if settings.outbox_sink == "kafka":
+        return KafkaSink(settings.kafka_bootstrap_servers, settings.outbox_kafka_topic)
+    return FileSink(settings.outbox_file_path)
+
+
+class OutboxRelay:
+    # Publishes outbox rows in batches and deletes them in the same transaction that locked them. A crash
+    # between publish and commit re-publishes the batch (at-least-once); SKIP LOCKED lets every worker run one.
+    def __init__(self, sink: OutboxSink, enabled: bool, batch_size: int, interval: float):
+        self.sink = sink
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task = None
+        self._sink_started = False
+
+    async def relay_batch(self) -> int:
+        async with async_session_maker() as session:
+            rows = (await session.execute(CLAIM_EVENTS_SQL, {"batch_size": self.batch_size})).all()
+            if not rows:
+                return 0
+            start = time.perf_counter()
+            try:
+                await self.sink.publish([(str(row.aggregate_id).encode(), encode_event(row)) for row in rows])
+            except Exception:
+                outbox_publish_failures.inc()
+                raise
+            await session.execute(DELETE_EVENTS_SQL, {"ids": [row.id for row in rows]})
+            await session.commit()
+
+        outbox_publish_duration.observe(time.perf_counter() - start)
+        outbox_published.inc(amount=len(rows))
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            outbox_event_age.observe((now - row.created_at).total_seconds())
+        return len(rows)
+
+    async def relay(self) -> int:
+        relayed = 0
+        while True:
+            published = await self.relay_batch()
+            relayed += published
+            if published < self.batch_size:
+                return relayed
+
+    async def _run(self):
+        # The sink is connected here rather than at startup, so orders keep being accepted (and their events
+        # kept in the outbox) while the broker is down.
+        while True:
+            try:
+                if not self._sink_started:
+                    await self.sink.start()
+                    self._sink_started = True
+                await self.relay()
+            except Exception as e:
+                logger.error(f"Outbox relay failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.enabled:
+            self._task = asyncio.create_task(self._run())
+        else:
+            logger.warning("Outbox relay is disabled: order events stay in order_outbox until a relay runs")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._sink_started:
+            await self.sink.stop()
+            self._sink_started = False
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Iterable, NamedTuple, Optional
+
+from redis.exceptions import RedisError
+
+from src.cache import TTLCache
+from src.config import settings
+from src.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "product-cache:invalidate"
+
+
+# KEYS[1] - entry, KEYS[2] - its version; ARGV: version read before the load, staleness of the load in ms,
+# payload, ttl. Refuses the fill if the product was invalidated since the version was read, or so recently
+# (by the Redis clock) that a load of that staleness may predate the write.
+FILL_LUA = """
+local version = redis.call('HMGET', KEYS[2], 'version', 'at')
+if (version[1] or '0') ~= ARGV[1] then
+    return 0
+end
+if version[2] then
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+    if now - tonumber(version[2]) < tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[4])
+return 1
+"""
+
+# KEYS - entry and version key pairs; ARGV: version ttl, channel, message.
+INVALIDATE_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+for i = 1, #KEYS, 2 do
+    redis.call('DEL', KEYS[i])
+    redis.call('HINCRBY', KEYS[i + 1], 'version', 1)
+    redis.call('HSET', KEYS[i + 1], 'at', now)
+    redis.call('EXPIRE', KEYS[i + 1], ARGV[1])
+end
+redis.call('PUBLISH', ARGV[2], ARGV[3])
+return 1
+"""
+
+
+def _key(product_id) -> str:
+    return f"product:{product_id}"
+
+
+def _version_key(product_id) -> str:
+    return f"product:{product_id}:version"
+
+
+class Load(NamedTuple):
+    started: float
+    # Shared version of the entry when the load started; None when Redis is unavailable.
+    version: Optional[str]
+
+
+class ProductCache:
+    # Read-through cache for ProductResponse payloads: a per-process LRU in front of a shared Redis.
+    # Entries carry updated_at, so a fill never replaces a newer version of the same product. Every
+    # invalidation bumps the product's version in Redis, and a shared fill is a compare-and-set against the
+    # version read before the load, so a worker can't put back a row read before another worker's write.
+    def __init__(self, maxsize: int, local_ttl: float, shared_ttl: int, invalidation_window: float):
+        self.local = TTLCache(maxsize, local_ttl)
+        self.shared_ttl = shared_ttl
+        self._invalidated_at = TTLCache(maxsize, invalidation_window)
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._fill = None
+        self._invalidate = None
+
+    def _scripts(self, redis):
+        # Scripts are bound to a client; get_redis() hands out a new one after close_redis().
+        if self._fill is None or self._fill.registered_client is not redis:
+            self._fill = redis.register_script(FILL_LUA)
+            self._invalidate = redis.register_script(INVALIDATE_LUA)
+        return self._fill, self._invalidate
+
+    async def load_started(self, product_id: uuid.UUID) -> Load:
+        version = None
+        redis = get_redis()
+        if redis is not None:
+            try:
+                version = (await redis.hget(_version_key(product_id), "version") or b"0").decode()
+            except RedisError as e:
+                logger.warning(f"Product cache read failed: {e}")
+        return Load(time.monotonic(), version)
+
+    async def get(self, product_id: uuid.UUID) -> Optional[dict]:
+        data = self.local.get(product_id)
+        if data is not None:
+            self.local_hits += 1
+            return data
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(_key(product_id))
+            except RedisError as e:
+                logger.warning(f"Product cache read failed: {e}")
+                raw = None
+            if raw is not None:
+                data = json.loads(raw)
+                self.local.set(product_id, data)
+                self.shared_hits += 1
+                return data
+
+        self.misses += 1
+        return None
+
+    async def set(self, product_id: uuid.UUID, data: dict, load: Load, staleness: float = 0.0):
+        # A fill that started before the last invalidation may carry a row read before the write; drop it.
+        # `staleness` is how far behind the primary the row may be (replica reads).
+        invalidated_at = self._invalidated_at.get(product_id)
+        if invalidated_at is not None and invalidated_at >= load.started - staleness:
+            return
+        current = self.local.get(product_id)
+        if current is not None and current["updated_at"] > data["updated_at"]:
+            return
+        self.local.set(product_id, data)
+
+        redis = get_redis()
+        if redis is not None and load.version is not None:
+            fill, _ = self._scripts(redis)
+            try:
+                await fill(keys=[_key(product_id), _version_key(product_id)],
+                           args=[load.version, int(staleness * 1000), json.dumps(data), self.shared_ttl])
+            except RedisError as e:
+                logger.warning(f"Product cache write failed: {e}")
+
+    def _evict_local(self, product_ids: Iterable):
+        now = time.monotonic()
+        for product_id in product_ids:
+            self.local.pop(product_id)
+            self._invalidated_at.set(product_id, now)
+
+    async def invalidate(self, *product_ids: uuid.UUID):
+        product_ids = list(dict.fromkeys(product_ids))
+        if not product_ids:
+            return
+        self.invalidations += len(product_ids)
+        self._evict_local(product_ids)
+
+        redis = get_redis()
+        if redis is not None:
+            _, invalidate = self._scripts(redis)
+            try:
+                # The version outlives any fill still in flight for the entry.
+                await invalidate(keys=[key for pid in product_ids for key in (_key(pid), _version_key(pid))],
+                                 args=[self.shared_ttl, INVALIDATION_CHANNEL,
+                                       json.dumps([str(pid) for pid in product_ids])])
+            except RedisError as e:
+                logger.warning(f"Product cache invalidation failed: {e}")
+
+    async def listen_for_invalidations(self):
+        # Evicts entries other workers invalidated, so their local copies don't outlive the write.
+        redis = get_redis()
+        if redis is None:
+            return
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._evict_local(uuid.UUID(pid) for pid in json.loads(message["data"]))
+            except RedisError as e:
+                logger.warning(f"Product cache invalidation listener failed: {e}")
+                self.local.clear()
+                await asyncio.sleep(1)
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "local_size": len(self.local),
+        }
+
+
+product_cache = ProductCache(
+    maxsize=settings.product_cache_size,
+    local_ttl=settings.product_cache_local_ttl_seconds,
+    shared_ttl=settings.product_cache_shared_ttl_seconds,
+    # Invalidations are remembered as long as a replica read can lag behind them.
+    invalidation_window=max(settings.product_cache_local_ttl_seconds,
+                            settings.replica_max_lag_seconds + settings.replica_lag_check_interval_seconds),
+)
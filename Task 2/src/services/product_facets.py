@@ -0,0 +1,36 @@
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.db import ProductFacetCountDB
+from src.models.generated import ProductStatus
+
+# product_facet_counts has one row per (category, status) pair, so these read a handful of rows no matter how
+# large the catalogue is.
+
+
+async def product_facets(session: AsyncSession, status: Optional[ProductStatus] = None,
+                         category: Optional[str] = None) -> dict:
+    # Each facet is narrowed by the other one's filter, not its own, so every value stays selectable.
+    rows = (await session.execute(select(ProductFacetCountDB).where(ProductFacetCountDB.count > 0))).scalars().all()
+    categories, statuses = Counter(), Counter()
+    for row in rows:
+        if status is None or row.status == status:
+            categories[row.category] += row.count
+        if category is None or row.category == category:
+            statuses[row.status.value] += row.count
+    return {
+        "categories": [{"value": value, "count": count} for value, count in sorted(categories.items())],
+        "statuses": [{"value": value, "count": count} for value, count in sorted(statuses.items())],
+    }
+
+
+async def facet_total(session: AsyncSession, status: Optional[ProductStatus] = None,
+                      category: Optional[str] = None) -> int:
+    # Exact number of products matching the status/category filters, without counting products.
+    query = select(func.coalesce(func.sum(ProductFacetCountDB.count), 0))
+    if status: query = query.where(ProductFacetCountDB.status == status)
+    if category: query = query.where(ProductFacetCountDB.category == category)
+    return int((await session.execute(query)).scalar_one())
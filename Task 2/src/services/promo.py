@@ -0,0 +1,90 @@
+import uuid
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import TTLCache
+from src.config import settings
+from src.models.db import PromoCodeDB
+
+# Checks and takes one use of the code in a single statement. Concurrent redemptions queue on the row lock
+# and re-evaluate the WHERE clause after it, so a code can never be redeemed more than max_uses times.
+REDEEM_PROMO_SQL = text("""
+    UPDATE promo_codes
+    SET current_uses = current_uses + 1
+    WHERE id = :promo_id
+      AND active
+      AND current_uses < max_uses
+      AND now() BETWEEN valid_from AND valid_until
+    RETURNING discount_type::text AS discount_type, discount_value, min_order_amount
+""")
+
+
+class PromoDefinition(NamedTuple):
+    id: uuid.UUID
+    min_order_amount: float
+    valid_from: datetime
+    valid_until: datetime
+    active: bool
+
+
+class PromoRedemptionError(Exception):
+    def __init__(self, error_code: str, message: str):
+        super().__init__(message)
+        self.error_code = error_code
+        self.message = message
+
+
+class PromoCodeCache:
+    # Promo definitions by code, including misses, so unknown or expired codes are rejected without a query.
+    # Usage counters are never cached: they are only read and changed by REDEEM_PROMO_SQL.
+    _UNKNOWN = object()
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._definitions = TTLCache(maxsize, ttl)
+
+    async def get(self, session: AsyncSession, code: str) -> Optional[PromoDefinition]:
+        definition = self._definitions.get(code)
+        if definition is None:
+            promo = (await session.execute(select(PromoCodeDB).where(PromoCodeDB.code == code))).scalars().first()
+            definition = self._UNKNOWN if promo is None else PromoDefinition(
+                promo.id, float(promo.min_order_amount), promo.valid_from, promo.valid_until, promo.active)
+            self._definitions.set(code, definition)
+        return None if definition is self._UNKNOWN else definition
+
+    def invalidate(self, code: str):
+        self._definitions.pop(code)
+
+
+promo_cache = PromoCodeCache(settings.promo_cache_size, settings.promo_cache_ttl_seconds)
+
+
+def discount_for(discount_type: str, discount_value: float, total_amount: float) -> float:
+    if discount_type == "PERCENTAGE":
+        discount_amount = total_amount * (discount_value / 100)
+        return 0 if discount_amount > total_amount * 0.7 else discount_amount
+    return min(discount_value, total_amount)
+
+
+async def redeem_promo(session: AsyncSession, code: str, total_amount: float) -> Tuple[uuid.UUID, float]:
+    # Returns (promo_id, discount_amount). The use is taken inside the caller's transaction,
+    # so it is given back automatically if the order is rolled back.
+    promo = await promo_cache.get(session, code)
+    now = datetime.now(timezone.utc)
+    if promo is None or not promo.active or not promo.valid_from <= now <= promo.valid_until:
+        raise PromoRedemptionError("PROMO_CODE_INVALID", "Promo invalid")
+    if total_amount < promo.min_order_amount:
+        raise PromoRedemptionError("PROMO_CODE_MIN_AMOUNT", "Below minimum amount")
+
+    redeemed = (await session.execute(REDEEM_PROMO_SQL, {"promo_id": promo.id})).first()
+    if redeemed is None:
+        # Used up, or changed since it was cached; reload the definition on the next attempt.
+        promo_cache.invalidate(code)
+        raise PromoRedemptionError("PROMO_CODE_INVALID", "Promo invalid")
+    if total_amount < float(redeemed.min_order_amount):
+        promo_cache.invalidate(code)
+        raise PromoRedemptionError("PROMO_CODE_MIN_AMOUNT", "Below minimum amount")
+    return promo.id, discount_for(redeemed.discount_type, float(redeemed.discount_value), total_amount)
+
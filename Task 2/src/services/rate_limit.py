@@ -0,0 +1,97 @@
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict
+
+from src.config import settings
+from src.redis_client import get_redis
+
+
+class RateLimiter(ABC):
+    @abstractmethod
+    async def acquire(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def release(self, key: str):
+        # Gives back a slot taken by acquire() when the guarded operation did not go through.
+        ...
+
+
+class SlidingWindowRateLimiter(RateLimiter):
+    # Per-process limiter for single-worker deployments: at most `limit` hits per key in any `window` seconds.
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._hits: Dict[str, Deque[float]] = {}
+        self._next_prune = 0.0
+
+    async def acquire(self, key: str) -> bool:
+        now = time.monotonic()
+        if now >= self._next_prune:
+            self._prune(now)
+        hits = self._hits.setdefault(key, deque())
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            return False
+        hits.append(now)
+        return True
+
+    async def release(self, key: str):
+        hits = self._hits.get(key)
+        if hits:
+            hits.pop()
+
+    def _prune(self, now: float):
+        self._hits = {key: hits for key, hits in self._hits.items() if hits and hits[-1] > now - self.window}
+        self._next_prune = now + self.window
+
+
+# KEYS[1] - bucket key; ARGV: capacity, window in ms, tokens to take (negative refunds).
+# The bucket refills continuously at capacity tokens per window, timed by the Redis clock.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * capacity / window_ms)
+local allowed = 0
+if requested <= 0 or tokens >= requested then
+    tokens = math.min(capacity, tokens - requested)
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], window_ms)
+return allowed
+"""
+
+
+class RedisTokenBucketRateLimiter(RateLimiter):
+    # Shared limiter for multi-worker deployments: one atomic Lua call per check.
+    def __init__(self, limit: int, window: float, prefix: str):
+        self.limit = limit
+        self.window_ms = int(window * 1000)
+        self.prefix = prefix
+        self._script = None
+
+    def _bucket(self):
+        if self._script is None:
+            self._script = get_redis().register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    async def acquire(self, key: str) -> bool:
+        return bool(await self._bucket()(keys=[f"{self.prefix}:{key}"], args=[self.limit, self.window_ms, 1]))
+
+    async def release(self, key: str):
+        await self._bucket()(keys=[f"{self.prefix}:{key}"], args=[self.limit, self.window_ms, -1])
+
+
+def create_rate_limiter(name: str, limit: int, window: float) -> RateLimiter:
+    if settings.rate_limit_backend == "redis":
+        return RedisTokenBucketRateLimiter(limit, window, prefix=f"rate-limit:{name}")
+    return SlidingWindowRateLimiter(limit, window)
@@ -0,0 +1,85 @@
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Locks every requested product in primary-key order (so concurrent carts can't deadlock),
+# then decrements stock for all of them in one UPDATE, but only if every line passes the checks.
+RESERVE_STOCK_SQL = text("""
+    WITH req (product_id, quantity) AS (
+        SELECT * FROM unnest(CAST(:product_ids AS uuid[]), CAST(:quantities AS integer[]))
+    ),
+    locked AS (
+        SELECT p.id, p.status, p.stock, p.price
+        FROM products p
+        JOIN req r ON r.product_id = p.id
+        ORDER BY p.id
+        FOR UPDATE OF p
+    ),
+    rejected AS (
+        SELECT 1
+        FROM req r
+        LEFT JOIN locked l ON l.id = r.product_id
+        WHERE l.id IS NULL OR l.status <> 'ACTIVE' OR l.stock < r.quantity
+        LIMIT 1
+    ),
+    reserved AS (
+        UPDATE products p
+        SET stock = p.stock - r.quantity
+        FROM req r, locked l
+        WHERE p.id = r.product_id AND l.id = r.product_id AND NOT EXISTS (SELECT 1 FROM rejected)
+        RETURNING p.id
+    )
+    SELECT r.product_id, l.status::text AS status, l.stock, l.price,
+           EXISTS (SELECT 1 FROM reserved) AS reserved
+    FROM req r
+    LEFT JOIN locked l ON l.id = r.product_id
+""")
+
+
+class StockReservationError(Exception):
+    def __init__(self, status_code: int, error_code: str, message: str, product_id: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+        self.message = message
+        self.product_id = product_id
+
+
+def merge_cart(items) -> "OrderedDict[uuid.UUID, int]":
+    # The same product may appear on several cart lines; it is reserved once with the summed quantity.
+    cart: "OrderedDict[uuid.UUID, int]" = OrderedDict()
+    for item in items:
+        product_id = item.product_id
+        cart[product_id] = cart.get(product_id, 0) + item.quantity
+    return cart
+
+
+async def reserve_stock(session: AsyncSession, items) -> List[Tuple[uuid.UUID, int, Decimal]]:
+    # Returns (product_id, quantity, price) per cart line. On failure nothing has been written and the
+    # error names the first offending line, same as the old per-item checks.
+    cart = merge_cart(items)
+    rows = (await session.execute(RESERVE_STOCK_SQL, {
+        "product_ids": list(cart.keys()),
+        "quantities": list(cart.values()),
+    })).all()
+    products = {row.product_id: row for row in rows}
+
+    if not rows or not rows[0].reserved:
+        for product_id, quantity in cart.items():
+            row = products.get(product_id)
+            if row is None or row.status is None:
+                raise StockReservationError(404, "PRODUCT_NOT_FOUND", "Product not found")
+            if row.status != "ACTIVE":
+                raise StockReservationError(409, "PRODUCT_INACTIVE", "Product inactive")
+            if row.stock < quantity:
+                raise StockReservationError(409, "INSUFFICIENT_STOCK", "Not enough stock", str(product_id))
+        raise StockReservationError(409, "INSUFFICIENT_STOCK", "Not enough stock")
+
+    lines = []
+    for item in items:
+        lines.append((item.product_id, item.quantity, products[item.product_id].price))
+    return lines
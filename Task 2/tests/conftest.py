@@ -0,0 +1,109 @@
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, or_, select
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.database import async_session_maker, engine  # noqa: E402
+from src.main import app  # noqa: E402
+from src.models.db import (IdempotencyKeyDB, OrderDB, OrderItemDB, OrderOutboxDB, OrderRequestDB,  # noqa: E402
+                           ProductDB, PromoCodeDB)
+from src.models.generated import ProductStatus  # noqa: E402
+from src.routers.auth import ACCESS_TOKEN_MINUTES, create_token  # noqa: E402
+
+
+class Seed:
+    # Rows created by one test. Products go in a category named after the test module; after the test, they are
+    # deleted together with the test's users' orders, order requests and idempotency keys, every order that
+    # refers to the products, and the test's promo codes.
+    def __init__(self, category: str):
+        self.category = category
+        self.user_ids: List[uuid.UUID] = []
+        self.promo_ids: List[uuid.UUID] = []
+
+    def user(self) -> uuid.UUID:
+        user_id = uuid.uuid4()
+        self.user_ids.append(user_id)
+        return user_id
+
+    async def products(self, *rows: dict) -> List[ProductDB]:
+        async with async_session_maker() as session:
+            products = [ProductDB(**{"name": self.category, "price": 10, "stock": 1, "category": self.category,
+                                     "status": ProductStatus.ACTIVE, **row}) for row in rows]
+            session.add_all(products)
+            await session.commit()
+        return products
+
+    async def product(self, **fields) -> ProductDB:
+        [product] = await self.products(fields)
+        return product
+
+    async def promo(self, **fields) -> PromoCodeDB:
+        now = datetime.now(timezone.utc)
+        async with async_session_maker() as session:
+            promo = PromoCodeDB(**{"code": f"T{uuid.uuid4().hex[:12].upper()}", "discount_type": "PERCENTAGE",
+                                   "discount_value": 10, "min_order_amount": 0, "max_uses": 10, "current_uses": 0,
+                                   "valid_from": now - timedelta(hours=1), "valid_until": now + timedelta(hours=1),
+                                   "active": True, **fields})
+            session.add(promo)
+            await session.commit()
+        self.promo_ids.append(promo.id)
+        return promo
+
+    async def cleanup(self):
+        async with async_session_maker() as session:
+            product_ids = select(ProductDB.id).where(ProductDB.category == self.category)
+            order_ids = (await session.execute(select(OrderDB.id).where(or_(
+                OrderDB.user_id.in_(self.user_ids),
+                OrderDB.id.in_(select(OrderItemDB.order_id).where(OrderItemDB.product_id.in_(product_ids))))))
+            ).scalars().all()
+            await session.execute(delete(OrderRequestDB).where(OrderRequestDB.user_id.in_(self.user_ids)))
+            await session.execute(delete(IdempotencyKeyDB).where(IdempotencyKeyDB.user_id.in_(self.user_ids)))
+            await session.execute(delete(OrderOutboxDB).where(OrderOutboxDB.aggregate_id.in_(order_ids)))
+            await session.execute(delete(OrderItemDB).where(OrderItemDB.order_id.in_(order_ids)))
+            await session.execute(delete(OrderDB).where(OrderDB.id.in_(order_ids)))
+            await session.execute(delete(PromoCodeDB).where(PromoCodeDB.id.in_(self.promo_ids)))
+            await session.execute(delete(ProductDB).where(ProductDB.category == self.category))
+            await session.commit()
+
+
+@pytest_asyncio.fixture
+async def db():
+    # Skips the test when the database is not available. The engine's pooled connections belong to the test's
+    # event loop, so they are closed after it.
+    try:
+        async with engine.connect():
+            pass
+    except Exception:
+        pytest.skip("database is not available")
+    yield
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def seed(db, request) -> Seed:
+    seed = Seed(request.module.__name__.replace("_", "-"))
+    yield seed
+    await seed.cleanup()
+
+
+@pytest_asyncio.fixture
+async def client() -> httpx.AsyncClient:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def auth_headers():
+    def headers(user_id: Optional[uuid.UUID] = None, role: str = "USER") -> dict:
+        token = create_token({"sub": str(user_id or uuid.uuid4()), "role": role},
+                             timedelta(minutes=ACCESS_TOKEN_MINUTES))
+        return {"Authorization": f"Bearer {token}"}
+    return headers
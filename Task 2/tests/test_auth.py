@@ -0,0 +1,55 @@
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from src.routers import auth
+from src.routers.auth import ACCESS_TOKEN_MINUTES, create_token, decode_access_token
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    # Counts the signature checks behind decode_access_token.
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    auth.token_cache.clear()
+    yield calls
+    auth.token_cache.clear()
+
+
+def test_verified_tokens_are_served_from_the_cache_as_copies(decodes):
+    token = create_token({"sub": "user", "role": "USER"}, timedelta(minutes=ACCESS_TOKEN_MINUTES))
+    first = decode_access_token(token)
+    first["role"] = "ADMIN"
+    second = decode_access_token(token)
+
+    assert len(decodes) == 1
+    assert second["role"] == "USER" and second["sub"] == "user"
+
+
+def test_cached_tokens_expire_at_exp(decodes):
+    token = create_token({"sub": "user", "role": "USER"}, timedelta(seconds=1))
+    exp = decode_access_token(token)["exp"]
+    time.sleep(max(0.0, exp - time.time()) + 0.05)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_access_token(token)
+    assert len(decodes) == 2
+
+
+def test_a_tampered_token_is_verified_and_rejected(decodes):
+    token = create_token({"sub": "user", "role": "USER"}, timedelta(minutes=ACCESS_TOKEN_MINUTES))
+    decode_access_token(token)
+    header, _, signature = token.split(".")
+    forged_payload = create_token({"sub": "user", "role": "ADMIN"}, timedelta(minutes=ACCESS_TOKEN_MINUTES))
+    forged = ".".join([header, forged_payload.split(".")[1], signature])
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        decode_access_token(forged)
+    assert decodes == [token, forged]
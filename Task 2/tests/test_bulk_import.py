@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from src.database import async_session_maker
+from src.models.db import ProductDB, ProductFacetCountDB
+
+
+def product(category: str, name: str, **overrides) -> dict:
+    return {"name": name, "price": 10, "stock": 1, "category": category, "status": "ACTIVE", **overrides}
+
+
+async def pieces(body: bytes, size: int = 7):
+    for pos in range(0, len(body), size):
+        yield body[pos:pos + size]
+
+
+async def imported_names(category: str) -> list:
+    async with async_session_maker() as session:
+        return sorted((await session.execute(
+            select(ProductDB.name).where(ProductDB.category == category))).scalars())
+
+
+async def bulk_import(client, auth_headers, body: bytes, content_type: str, size: int = 7):
+    return await client.post("/products:bulk", content=pieces(body, size),
+                             headers={**auth_headers(role="ADMIN"), "Content-Type": content_type})
+
+
+@pytest.mark.asyncio
+async def test_rows_the_database_refuses_are_reported_per_row(seed, client, auth_headers):
+    rows = [
+        product(seed.category, "bulk-1"),
+        product(seed.category, "bulk-2", price=10_000_000_000),
+        product(seed.category, "bulk-3\u0000"),
+        product(seed.category, "bulk-4", stock=2**31),
+        product(seed.category, "bulk-5"),
+    ]
+    body = "".join(json.dumps(row) + "\n" for row in rows).encode()
+    response = await bulk_import(client, auth_headers, body, "application/x-ndjson")
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (2, 3)
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4]
+    assert result["errors"][0]["message"].startswith("price:")
+    assert result["errors"][1]["message"].startswith("row:")
+    assert await imported_names(seed.category) == ["bulk-1", "bulk-5"]
+
+
+@pytest.mark.asyncio
+async def test_csv_records_may_span_chunks_and_lines(seed, client, auth_headers):
+    body = (f'name,description,price,stock,category,status\n'
+            f'"bulk, ""quoted""","first line\nsecond line",5.5,3,{seed.category},ACTIVE\n'
+            f'bulk-plain,,1,0,{seed.category},INACTIVE\n').encode()
+    response = await bulk_import(client, auth_headers, body, "text/csv", size=5)
+    assert response.json() == {"inserted": 2, "failed": 0, "errors": []}
+    async with async_session_maker() as session:
+        descriptions = dict((await session.execute(select(ProductDB.name, ProductDB.description).where(
+            ProductDB.category == seed.category))).all())
+    assert descriptions == {'bulk, "quoted"': "first line\nsecond line", "bulk-plain": None}
+
+
+@pytest.mark.asyncio
+async def test_facet_counts_take_the_imported_rows_at_commit(seed, client, auth_headers):
+    rows = [product(seed.category, "bulk-a"), product(seed.category, "bulk-b\u0000"),
+            product(seed.category, "bulk-c", status="INACTIVE"), product(seed.category, "bulk-d")]
+    body = "".join(json.dumps(row) + "\n" for row in rows).encode()
+    response = await bulk_import(client, auth_headers, body, "application/x-ndjson")
+    assert response.json()["inserted"] == 3, response.text
+    async with async_session_maker() as session:
+        counts = dict((await session.execute(select(ProductFacetCountDB.status, ProductFacetCountDB.count).where(
+            ProductFacetCountDB.category == seed.category, ProductFacetCountDB.count > 0))).all())
+    assert {status.value: count for status, count in counts.items()} == {"ACTIVE": 2, "INACTIVE": 1}
@@ -0,0 +1,51 @@
+import uuid
+
+import pytest
+
+from src.etags import etag_matches, product_etag
+from src.query_stats import track_queries
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    (None, False),
+    ("", False),
+    ("*", True),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", W/"abc"', True),
+    ('"xyz"', False),
+    ('"abcd"', False),
+])
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(if_none_match, '"abc"') is matches
+
+
+def test_product_etag_changes_with_updated_at():
+    product_id = uuid.uuid4()
+    assert product_etag(product_id, "2024-03-01T12:00:00Z") == product_etag(product_id, "2024-03-01T12:00:00Z")
+    assert product_etag(product_id, "2024-03-01T12:00:00Z") != product_etag(product_id, "2024-03-01T12:00:01Z")
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_returns_304_until_the_product_changes(seed, client, auth_headers):
+    headers = auth_headers(role="ADMIN")
+    product = await seed.product(name="etag", stock=5)
+
+    first = await client.get(f"/products/{product.id}", headers=headers)
+    etag = first.headers["etag"]
+    with track_queries() as queries:
+        cached = await client.get(f"/products/{product.id}", headers={**headers, "If-None-Match": etag})
+    updated = await client.put(f"/products/{product.id}", headers=headers, json={
+        "name": "etag", "price": 11, "stock": 5, "category": seed.category, "status": "ACTIVE"})
+    changed = await client.get(f"/products/{product.id}", headers={**headers, "If-None-Match": etag})
+
+    page = await client.get(f"/products?category={seed.category}&size=5", headers=headers)
+    same_page = await client.get(f"/products?category={seed.category}&size=5",
+                                 headers={**headers, "If-None-Match": page.headers["etag"]})
+
+    assert first.status_code == 200
+    assert cached.status_code == 304 and cached.content == b"" and cached.headers["etag"] == etag
+    assert queries.count == 0
+    assert updated.status_code == 200
+    assert changed.status_code == 200 and changed.headers["etag"] != etag and changed.json()["price"] == 11
+    assert page.status_code == 200 and same_page.status_code == 304
@@ -0,0 +1,102 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from src.database import async_session_maker
+from src.models.db import OrderDB, ProductDB
+from src.models.generated import OrderCreate
+from src.routers import orders as orders_router
+from src.routers.orders import create_order_once
+from src.services.idempotency import request_hash
+from src.services.rate_limit import SlidingWindowRateLimiter
+
+DUPLICATES = 10
+
+
+async def stock_and_orders(product_id, user_id):
+    async with async_session_maker() as session:
+        stock = (await session.execute(select(ProductDB.stock).where(ProductDB.id == product_id))).scalar_one()
+        orders = (await session.execute(select(OrderDB.id).where(OrderDB.user_id == user_id))).scalars().all()
+    return stock, orders
+
+
+@pytest.mark.asyncio
+async def test_concurrent_and_repeated_requests_create_one_order(seed, client, auth_headers):
+    user_id = seed.user()
+    headers = {**auth_headers(user_id), "Idempotency-Key": f"checkout-{uuid.uuid4()}"}
+    product = await seed.product(name="idempotency", stock=100)
+    body = {"items": [{"product_id": str(product.id), "quantity": 2}]}
+    concurrent = await asyncio.gather(*(client.post("/orders", json=body, headers=headers)
+                                        for _ in range(DUPLICATES)))
+    retry = await client.post("/orders", json=body, headers=headers)
+    reused = await client.post("/orders", json={"items": [{"product_id": str(product.id), "quantity": 1}]},
+                               headers=headers)
+
+    assert [r.status_code for r in concurrent] == [201] * DUPLICATES
+    assert len({r.content for r in concurrent}) == 1
+    assert sum(1 for r in concurrent if "idempotent-replayed" in r.headers) == DUPLICATES - 1
+    assert retry.status_code == 201 and retry.content == concurrent[0].content
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert reused.status_code == 422 and reused.json()["error_code"] == "IDEMPOTENCY_KEY_REUSED"
+
+    stock, orders = await stock_and_orders(product.id, user_id)
+    assert stock == 98
+    assert [str(order_id) for order_id in orders] == [concurrent[0].json()["details"]["id"]]
+
+
+@pytest.mark.asyncio
+async def test_duplicates_on_separate_workers_wait_for_the_first_transaction(seed):
+    # Bypasses the in-process coalescing: every attempt has its own session, like requests on different workers.
+    user_id = seed.user()
+    key = f"checkout-{uuid.uuid4()}"
+    product = await seed.product(name="idempotency", stock=100)
+    order_in = OrderCreate.model_validate({"items": [{"product_id": str(product.id), "quantity": 3}]})
+    payload_hash = request_hash(order_in.model_dump_json())
+
+    async def attempt():
+        async with async_session_maker() as session:
+            return await create_order_once(order_in, session, user_id, key, payload_hash)
+
+    responses = await asyncio.gather(*(attempt() for _ in range(DUPLICATES)))
+    assert [r.status_code for r in responses] == [201] * DUPLICATES
+    assert len({bytes(r.body) for r in responses}) == 1
+
+    stock, orders = await stock_and_orders(product.id, user_id)
+    assert stock == 97
+    assert len(orders) == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicates_wait_for_the_claim_before_the_rate_limit(seed, monkeypatch):
+    # One order left in the user's window: the duplicate on another worker must replay it, not get a 429.
+    monkeypatch.setattr(orders_router, "order_rate_limiter", SlidingWindowRateLimiter(limit=1, window=60))
+    user_id = seed.user()
+    key = f"checkout-{uuid.uuid4()}"
+    product = await seed.product(name="idempotency", stock=100)
+    order_in = OrderCreate.model_validate({"items": [{"product_id": str(product.id), "quantity": 1}]})
+    payload_hash = request_hash(order_in.model_dump_json())
+
+    async def attempt():
+        async with async_session_maker() as session:
+            return await create_order_once(order_in, session, user_id, key, payload_hash)
+
+    first, duplicate = await asyncio.gather(attempt(), attempt())
+    assert first.status_code == duplicate.status_code == 201, bytes(duplicate.body)
+    assert bytes(first.body) == bytes(duplicate.body)
+    _, created = await stock_and_orders(product.id, user_id)
+    assert len(created) == 1
+
+
+@pytest.mark.asyncio
+async def test_in_process_waiters_do_not_replay_responses_that_were_not_stored(seed, client, auth_headers):
+    user_id = seed.user()
+    headers = {**auth_headers(user_id), "Idempotency-Key": f"checkout-{uuid.uuid4()}"}
+    product = await seed.product(name="idempotency", stock=1)
+    body = {"items": [{"product_id": str(product.id), "quantity": 2}]}
+    responses = await asyncio.gather(*(client.post("/orders", json=body, headers=headers) for _ in range(3)))
+
+    # The 409 is not stored, so every duplicate runs the order itself and none is a replay.
+    assert [r.json()["error_code"] for r in responses] == ["INSUFFICIENT_STOCK"] * 3
+    assert not any("idempotent-replayed" in r.headers for r in responses)
@@ -0,0 +1,63 @@
+import uuid
+
+import pytest
+
+from src.metrics import Histogram
+
+
+def samples(text: str) -> dict:
+    # Sample name with labels -> value, from Prometheus text format.
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines() if line and not line.startswith("#")}
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test.", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "/a")
+    rendered = samples("\n".join(histogram.render()))
+    assert rendered == {
+        'test_seconds_bucket{route="/a",le="0.1"}': 1,
+        'test_seconds_bucket{route="/a",le="1.0"}': 3,
+        'test_seconds_bucket{route="/a",le="+Inf"}': 4,
+        'test_seconds_sum{route="/a"}': 6.05,
+        'test_seconds_count{route="/a"}': 4,
+    }
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_pool_and_order_outcomes(seed, client, auth_headers):
+    user_id = seed.user()
+    headers = auth_headers(user_id)
+    product = await seed.product(name="metrics", stock=1)
+    before = samples((await client.get("/metrics")).text)
+
+    assert (await client.get(f"/products/{product.id}", headers=headers)).status_code == 200
+    assert (await client.get(f"/products/{uuid.uuid4()}", headers=headers)).status_code == 404
+    too_many = await client.post("/orders", json={"items": [{"product_id": str(product.id), "quantity": 2}]},
+                                 headers=headers)
+    assert too_many.status_code == 409
+    created = await client.post("/orders", json={"items": [{"product_id": str(product.id), "quantity": 1}]},
+                                headers=headers)
+    assert created.status_code == 201
+
+    response = await client.get("/metrics")
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    after = samples(response.text)
+
+    def delta(name: str) -> float:
+        return after.get(name, 0) - before.get(name, 0)
+
+    # Latency is labelled by route template, never by the raw path.
+    assert delta('http_request_duration_seconds_count{method="GET",route="/products/{id}",status="200"}') == 1
+    assert delta('http_request_duration_seconds_count{method="GET",route="/products/{id}",status="404"}') == 1
+    assert delta('http_request_duration_seconds_count{method="POST",route="/orders",status="201"}') == 1
+    assert str(product.id) not in response.text
+    # Only the scrape itself is in flight while it renders.
+    assert after["http_requests_in_progress"] == 1
+    assert delta('db_pool_wait_seconds_count{pool="primary"}') > 0
+    assert delta('db_pool_checkouts_total{pool="primary"}') > 0
+    assert 'db_pool_wait_seconds_bucket{pool="primary",le="+Inf"}' in after
+    assert 'db_pool_size{pool="primary"}' in after
+    assert delta('orders_total{result="CREATED"}') == 1
+    assert delta('orders_total{result="INSUFFICIENT_STOCK"}') == 1
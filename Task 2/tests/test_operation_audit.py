@@ -0,0 +1,77 @@
+import uuid
+
+import pytest
+
+from src.services import operation_audit
+from src.services.operation_audit import OperationAuditLog
+
+
+class Database:
+    # Stands in for async_session_maker: one session per call, failing while `down` is set. `during_insert`
+    # runs inside each insert, as other requests would while it waits on the database.
+    def __init__(self):
+        self.down = False
+        self.during_insert = None
+        self.rows = []
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, rows):
+        if self.during_insert is not None:
+            self.during_insert()
+        if self.down:
+            raise ConnectionError("database is down")
+        self.rows.extend(rows)
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_a_failed_batch_is_kept_for_the_next_flush(monkeypatch):
+    database = Database()
+    monkeypatch.setattr(operation_audit, "async_session_maker", database)
+    audit = OperationAuditLog(enabled=True, batch_size=2, flush_interval=1, max_buffer=5)
+    users = [uuid.uuid4() for _ in range(7)]
+
+    for user_id in users[:4]:
+        audit.record(user_id, "CREATE_ORDER")
+    database.down = True
+    await audit.flush()
+    assert audit.dropped == 0
+
+    # The buffer still holds the four records in order; only one more fits.
+    for user_id in users[4:]:
+        audit.record(user_id, "CREATE_ORDER")
+    assert audit.dropped == 2
+
+    database.down = False
+    await audit.flush()
+    assert [row["user_id"] for row in database.rows] == users[:5]
+
+
+@pytest.mark.asyncio
+async def test_records_that_arrive_during_a_failed_insert_stay_behind_it(monkeypatch):
+    database = Database()
+    monkeypatch.setattr(operation_audit, "async_session_maker", database)
+    audit = OperationAuditLog(enabled=True, batch_size=2, flush_interval=1, max_buffer=3)
+    users = [uuid.uuid4() for _ in range(4)]
+    audit.record(users[0], "CREATE_ORDER")
+    audit.record(users[1], "CREATE_ORDER")
+
+    database.down = True
+    database.during_insert = lambda: [audit.record(user_id, "CREATE_ORDER") for user_id in users[2:]]
+    await audit.flush()
+    # The failed batch goes back in front; the newest record no longer fits.
+    assert audit.dropped == 1
+
+    database.down, database.during_insert = False, None
+    await audit.flush()
+    assert [row["user_id"] for row in database.rows] == users[:3]
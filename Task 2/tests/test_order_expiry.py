@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from src.database import async_session_maker
+from src.models.db import OrderDB, OrderItemDB, OrderOutboxDB, ProductDB, PromoCodeDB
+from src.models.generated import OrderStatus
+from src.services.order_cancellation import OrderExpirySweeper
+
+DEADLINE_SECONDS = 3600
+EXPIRED = 20
+SWEEPERS = 2
+
+
+async def add_order(user_id, status: OrderStatus, age: timedelta, items, promo=None) -> OrderDB:
+    async with async_session_maker() as session:
+        order = OrderDB(user_id=user_id, status=status, total_amount=10, discount_amount=0,
+                        promo_code_id=promo.id if promo else None, created_at=datetime.now(timezone.utc) - age)
+        session.add(order)
+        await session.flush()
+        session.add_all(OrderItemDB(order_id=order.id, product_id=product.id, quantity=quantity, price_at_order=1)
+                        for product, quantity in items)
+        await session.commit()
+        return order
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sweepers_cancel_each_expired_order_once(seed):
+    user_id = seed.user()
+    # Stock and promo uses as left by the orders below: everything reserved is already taken off.
+    hot, cold = await seed.products({"name": "expiry-hot", "stock": 0}, {"name": "expiry-cold", "stock": 0})
+    promo = await seed.promo(max_uses=100, current_uses=EXPIRED // 2 + 1)
+
+    expired = [await add_order(user_id, OrderStatus.PAYMENT_PENDING if n % 2 else OrderStatus.CREATED,
+                               timedelta(hours=2, minutes=n), [(hot, 2), (cold, 1)], promo if n % 2 else None)
+               for n in range(EXPIRED)]
+    fresh = await add_order(user_id, OrderStatus.CREATED, timedelta(minutes=5), [(hot, 3)], promo)
+    paid = await add_order(user_id, OrderStatus.PAID, timedelta(hours=3), [(hot, 4)])
+
+    sweepers = [OrderExpirySweeper(enabled=True, deadline_seconds=DEADLINE_SECONDS, interval=0, batch_size=3)
+                for _ in range(SWEEPERS)]
+    await asyncio.gather(*(sweeper.sweep() for sweeper in sweepers))
+    # Other expired orders in the database may be swept too; ours must all be among them.
+    assert sum(sweeper.expired for sweeper in sweepers) >= EXPIRED
+
+    async with async_session_maker() as session:
+        statuses = dict((await session.execute(
+            select(OrderDB.id, OrderDB.status).where(OrderDB.user_id == user_id))).all())
+        events = dict((await session.execute(
+            select(OrderOutboxDB.aggregate_id, func.count()).where(
+                OrderOutboxDB.aggregate_id.in_(statuses), OrderOutboxDB.event_type == "OrderCanceled",
+                OrderOutboxDB.payload["reason"].astext == "PAYMENT_EXPIRED")
+            .group_by(OrderOutboxDB.aggregate_id))).all())
+        stock = dict((await session.execute(
+            select(ProductDB.id, ProductDB.stock).where(ProductDB.category == seed.category))).all())
+        current_uses = (await session.execute(
+            select(PromoCodeDB.current_uses).where(PromoCodeDB.id == promo.id))).scalar_one()
+
+    assert all(statuses[order.id] == OrderStatus.CANCELED for order in expired)
+    assert statuses[fresh.id] == OrderStatus.CREATED
+    assert statuses[paid.id] == OrderStatus.PAID
+    assert events == {order.id: 1 for order in expired}
+    assert stock == {hot.id: 2 * EXPIRED, cold.id: EXPIRED}
+    assert current_uses == 1
@@ -0,0 +1,73 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.database import async_session_maker
+from src.models.db import OrderDB, OrderItemDB
+from src.models.generated import OrderResponse, OrderStatus
+from src.query_stats import query_budget
+
+
+async def add_orders(seed, user_id: uuid.UUID, orders: int, items_per_order: int):
+    # Orders one minute apart, returned oldest first.
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    products = await seed.products(*({"name": f"order-history-{i}", "price": 5, "stock": 10}
+                                      for i in range(items_per_order)))
+    async with async_session_maker() as session:
+        created = []
+        for n in range(orders):
+            order = OrderDB(user_id=user_id, status=OrderStatus.PAID, total_amount=5 * items_per_order,
+                            discount_amount=0, created_at=start + timedelta(minutes=n))
+            session.add(order)
+            await session.flush()
+            session.add_all(OrderItemDB(order_id=order.id, product_id=product.id, quantity=1, price_at_order=5)
+                            for product in products)
+            created.append(str(order.id))
+        await session.commit()
+        return created
+
+
+@pytest.mark.asyncio
+async def test_order_history_is_keyset_paged_in_one_query_per_page(seed, client, auth_headers):
+    user_id = seed.user()
+    headers = auth_headers(user_id)
+    order_ids = await add_orders(seed, user_id, orders=5, items_per_order=3)
+    seen, cursor = [], None
+    while True:
+        with query_budget(1):
+            page = await client.get("/orders", params={"size": 2, **({"cursor": cursor} if cursor else {})},
+                                    headers=headers)
+        assert page.status_code == 200, page.text
+        body = page.json()
+        for order in body["items"]:
+            OrderResponse.model_validate(order)
+            assert len(order["items"]) == 3
+            assert order["items"][0]["product"]["category"] == seed.category
+        seen.extend(order["id"] for order in body["items"])
+        cursor = body["nextCursor"]
+        if cursor is None:
+            break
+    assert seen == order_ids[::-1]
+
+    invalid = await client.get("/orders", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_read_order_checks_ownership(seed, client, auth_headers):
+    user_id = seed.user()
+    [order_id] = await add_orders(seed, user_id, orders=1, items_per_order=2)
+    with query_budget(1):
+        own = await client.get(f"/orders/{order_id}", headers=auth_headers(user_id))
+    assert own.status_code == 200, own.text
+    assert own.json()["id"] == order_id
+    assert own.json()["total_amount"] == 10.0
+    assert len(own.json()["items"]) == 2
+
+    admin = await client.get(f"/orders/{order_id}", headers=auth_headers(role="ADMIN"))
+    assert admin.status_code == 200
+    other = await client.get(f"/orders/{order_id}", headers=auth_headers())
+    assert other.json()["error_code"] == "ORDER_OWNERSHIP_VIOLATION"
+    missing = await client.get(f"/orders/{uuid.uuid4()}", headers=auth_headers(user_id))
+    assert missing.json()["error_code"] == "ORDER_NOT_FOUND"
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, text
+
+from src.database import async_session_maker
+from src.models.db import OrderDB, OrderOutboxDB, ProductDB, PromoCodeDB
+from src.query_stats import query_budget
+from src.routers.orders import order_intake
+
+# A batch costs the same number of statements however many orders it applies (no promo codes).
+BATCH_BUDGET = 8
+
+
+@pytest.fixture
+def queued():
+    order_intake.enabled = True
+    yield order_intake
+    order_intake.enabled = False
+
+
+async def hot_and_cold(seed, stock: int):
+    return await seed.products({"name": "order-intake-hot", "price": 10, "stock": stock},
+                               {"name": "order-intake-cold", "price": 3, "stock": 100})
+
+
+async def stock(seed) -> dict:
+    async with async_session_maker() as session:
+        return dict((await session.execute(
+            select(ProductDB.id, ProductDB.stock).where(ProductDB.category == seed.category))).all())
+
+
+@pytest.mark.asyncio
+async def test_queued_orders_are_applied_in_one_batch_in_arrival_order(seed, client, auth_headers, queued):
+    user_ids = [seed.user() for _ in range(6)]
+    hot, cold = await hot_and_cold(seed, stock=4)
+    requests = []
+    for user_id in user_ids:
+        items = [{"product_id": str(hot.id), "quantity": 1}, {"product_id": str(cold.id), "quantity": 2}]
+        response = await client.post("/orders", json={"items": items}, headers=auth_headers(user_id))
+        assert response.status_code == 202, response.text
+        assert response.json()["status"] == "QUEUED"
+        assert response.headers["location"] == f"/orders/requests/{response.json()['id']}"
+        requests.append(response.json()["id"])
+
+    with query_budget(BATCH_BUDGET):
+        assert await queued.process_batch() == len(user_ids)
+
+    outcomes = []
+    for user_id, request_id in zip(user_ids, requests):
+        response = await client.get(f"/orders/requests/{request_id}", headers=auth_headers(user_id))
+        assert response.status_code == 200, response.text
+        outcomes.append(response.json())
+    other = await client.get(f"/orders/requests/{requests[0]}", headers=auth_headers())
+    assert other.json()["error_code"] == "ORDER_OWNERSHIP_VIOLATION"
+
+    # First come, first served: four orders fit the hot product's stock.
+    assert [outcome["status"] for outcome in outcomes] == ["CREATED"] * 4 + ["REJECTED"] * 2
+    assert outcomes[-1]["error"] == {"error_code": "INSUFFICIENT_STOCK", "message": "Not enough stock",
+                                     "details": {"product_id": str(hot.id)}}
+    order = await client.get(f"/orders/{outcomes[0]['order_id']}", headers=auth_headers(user_ids[0]))
+    assert order.json()["total_amount"] == 16.0
+
+    assert await stock(seed) == {hot.id: 0, cold.id: 92}
+    async with async_session_maker() as session:
+        events = (await session.execute(select(OrderOutboxDB.event_type).where(
+            OrderOutboxDB.aggregate_id.in_(select(OrderDB.id).where(OrderDB.user_id.in_(user_ids)))))).all()
+    assert len(events) == 4
+
+
+@pytest.mark.asyncio
+async def test_a_request_that_cannot_be_applied_is_rejected_alone(seed, client, auth_headers, queued):
+    user_ids = [seed.user() for _ in range(3)]
+    hot, cold = await hot_and_cold(seed, stock=10)
+    pricey = await seed.product(name="order-intake-pricey", price=9_000_000_000, stock=10)
+    # The middle order's total overflows orders.total_amount, which fails the whole batch's INSERT.
+    carts = [[{"product_id": str(hot.id), "quantity": 1}],
+             [{"product_id": str(pricey.id), "quantity": 2}],
+             [{"product_id": str(cold.id), "quantity": 1}]]
+    requests = []
+    for user_id, items in zip(user_ids, carts):
+        response = await client.post("/orders", json={"items": items}, headers=auth_headers(user_id))
+        assert response.status_code == 202, response.text
+        requests.append(response.json()["id"])
+
+    assert await queued.process_batch() == 3
+
+    outcomes = [(await client.get(f"/orders/requests/{request_id}", headers=auth_headers(user_id))).json()
+                for user_id, request_id in zip(user_ids, requests)]
+    assert [outcome["status"] for outcome in outcomes] == ["CREATED", "REJECTED", "CREATED"]
+    assert outcomes[1]["error"]["error_code"] == "INTERNAL_ERROR"
+    assert await stock(seed) == {hot.id: 9, cold.id: 99, pricey.id: 10}
+
+
+@pytest.mark.asyncio
+async def test_a_replayed_queued_order_keeps_its_status_url(seed, client, auth_headers, queued):
+    user_id = seed.user()
+    hot, _ = await hot_and_cold(seed, stock=10)
+    headers = {**auth_headers(user_id), "Idempotency-Key": "queued-replay"}
+    body = {"items": [{"product_id": str(hot.id), "quantity": 1}]}
+    first = await client.post("/orders", json=body, headers=headers)
+    retry = await client.post("/orders", json=body, headers=headers)
+    assert first.status_code == retry.status_code == 202, retry.text
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert retry.headers["location"] == first.headers["location"] == f"/orders/requests/{first.json()['id']}"
+
+
+async def lock_promo(session, promo: PromoCodeDB):
+    await session.execute(select(PromoCodeDB.id).where(PromoCodeDB.id == promo.id).with_for_update())
+
+
+@pytest.mark.asyncio
+async def test_a_batch_locks_its_promo_codes_in_code_order(seed, client, auth_headers, queued, caplog):
+    first, second = sorted([await seed.promo(), await seed.promo()], key=lambda promo: promo.code)
+    hot, _ = await hot_and_cold(seed, stock=10)
+    # The batch redeems the codes in the opposite order to another worker, which holds the first code and is
+    # about to lock the second.
+    user_ids = [seed.user() for _ in range(2)]
+    for user_id, promo in zip(user_ids, (second, first)):
+        response = await client.post("/orders", json={"items": [{"product_id": str(hot.id), "quantity": 1}],
+                                                      "promo_code": promo.code}, headers=auth_headers(user_id))
+        assert response.status_code == 202, response.text
+
+    async with async_session_maker() as other_worker:
+        await other_worker.execute(text("SET LOCAL lock_timeout = '5s'"))
+        await lock_promo(other_worker, first)
+        holder = (await other_worker.execute(text("SELECT pg_backend_pid()"))).scalar_one()
+        batch = asyncio.create_task(queued.process_batch())
+        async with async_session_maker() as session:
+            while not (await session.execute(text(
+                    "SELECT count(*) FROM pg_locks WHERE NOT granted AND :holder = ANY(pg_blocking_pids(pid))"),
+                    {"holder": holder})).scalar_one():
+                await asyncio.sleep(0.01)
+        # The batch waits for the first code without holding the second.
+        await lock_promo(other_worker, second)
+        await other_worker.commit()
+
+    assert await batch == 2
+    # A deadlock would have failed the batch and had its requests applied one at a time.
+    assert "batch failed" not in caplog.text
+    async with async_session_maker() as session:
+        promo_ids = (await session.execute(select(OrderDB.promo_code_id).where(
+            OrderDB.user_id.in_(user_ids)))).scalars().all()
+    assert sorted(promo_ids) == sorted([first.id, second.id])
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from src.database import async_session_maker
+from src.models.db import OrderOutboxDB
+from src.models.generated import OrderCreate
+from src.routers.orders import place_order
+from src.services.order_cancellation import cancel_order_atomically
+from src.services.outbox import FileSink, OutboxRelay
+
+AGGREGATES = 60
+EVENTS_PER_AGGREGATE = 4
+RELAYS = 4
+
+
+def published(path, aggregate_ids):
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+    return [event for event in events if event["aggregate_id"] in aggregate_ids]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_relays_publish_each_order_in_sequence(db, tmp_path):
+    aggregate_ids = [uuid.uuid4() for _ in range(AGGREGATES)]
+    try:
+        async with async_session_maker() as session:
+            # Interleaved, as concurrent orders would write them.
+            await session.execute(insert(OrderOutboxDB), [
+                {"aggregate_id": aggregate_id, "event_type": "Test", "payload": {"seq": seq}}
+                for seq in range(EVENTS_PER_AGGREGATE) for aggregate_id in aggregate_ids])
+            await session.commit()
+
+        path = tmp_path / "events.ndjson"
+        relays = [OutboxRelay(FileSink(str(path)), enabled=True, batch_size=25, interval=0) for _ in range(RELAYS)]
+        while True:
+            relayed = await asyncio.gather(*(relay.relay() for relay in relays))
+            async with async_session_maker() as session:
+                pending = (await session.execute(select(OrderOutboxDB.id).where(
+                    OrderOutboxDB.aggregate_id.in_(aggregate_ids)))).first()
+            if pending is None and not any(relayed):
+                break
+
+        events = published(path, {str(aggregate_id) for aggregate_id in aggregate_ids})
+        assert len(events) == AGGREGATES * EVENTS_PER_AGGREGATE
+        assert len({event["event_id"] for event in events}) == len(events)
+        for aggregate_id in aggregate_ids:
+            sequence = [event["payload"]["seq"] for event in events if event["aggregate_id"] == str(aggregate_id)]
+            assert sequence == list(range(EVENTS_PER_AGGREGATE))
+    finally:
+        async with async_session_maker() as session:
+            await session.execute(delete(OrderOutboxDB).where(OrderOutboxDB.aggregate_id.in_(aggregate_ids)))
+            await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_order_events_are_written_with_the_order(seed):
+    user_id = seed.user()
+    product = await seed.product(name="outbox", stock=5)
+
+    async with async_session_maker() as session:
+        rejected = await place_order(OrderCreate.model_validate(
+            {"items": [{"product_id": str(product.id), "quantity": 6}]}), session, user_id)
+    async with async_session_maker() as session:
+        created = await place_order(OrderCreate.model_validate(
+            {"items": [{"product_id": str(product.id), "quantity": 2}]}), session, user_id)
+    order_id = uuid.UUID(json.loads(created.body)["details"]["id"])
+    async with async_session_maker() as session:
+        canceled, _ = await cancel_order_atomically(session, order_id)
+        await session.commit()
+
+    assert rejected.status_code == 409 and created.status_code == 201 and canceled
+    async with async_session_maker() as session:
+        events = (await session.execute(select(OrderOutboxDB).where(
+            OrderOutboxDB.payload["user_id"].astext == str(user_id)).order_by(OrderOutboxDB.id))).scalars().all()
+    assert [(event.aggregate_id, event.event_type) for event in events] == [
+        (order_id, "OrderCreated"), (order_id, "OrderCanceled")]
+    assert events[0].payload["items"] == [{"product_id": str(product.id), "quantity": 2, "price_at_order": 10.0}]
+    assert events[1].payload["reason"] == "CANCELED_BY_USER"
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import uuid
+
+import pytest
+import pytest_asyncio
+
+from src.routers import auth
+from src.services.password_hasher import HasherSaturatedError, PasswordHasher
+
+
+class BlockingContext:
+    # A CryptContext whose hashing waits for `release`, recording the threads it runs on.
+    def __init__(self):
+        self.release = threading.Event()
+        self.threads = set()
+
+    def hash(self, password: str) -> str:
+        self.threads.add(threading.current_thread().name)
+        self.release.wait(5)
+        return f"hashed:{password}"
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return self.hash(password) == password_hash
+
+
+@pytest_asyncio.fixture
+async def saturated():
+    # One worker busy and one call queued: the pool is full.
+    context = BlockingContext()
+    hasher = PasswordHasher(context, workers=1, max_queue=1)
+    pending = [asyncio.ensure_future(hasher.hash(f"password-{n}")) for n in range(2)]
+    while hasher.in_flight < 2:
+        await asyncio.sleep(0)
+    yield hasher, context
+    context.release.set()
+    await asyncio.gather(*pending)
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hashing_runs_in_the_pool_and_rejects_calls_beyond_it(saturated):
+    hasher, context = saturated
+    with pytest.raises(HasherSaturatedError):
+        await hasher.hash("one too many")
+    # The event loop keeps running while both calls wait.
+    await asyncio.sleep(0.01)
+    assert hasher.stats()["queue_depth"] == 1 and hasher.rejected == 1
+    assert context.threads and all(name.startswith("password-hasher") for name in context.threads)
+
+    context.release.set()
+    while hasher.in_flight:
+        await asyncio.sleep(0.01)
+    assert await hasher.hash("after the storm") == "hashed:after the storm"
+    assert hasher.completed == 3
+
+
+@pytest.mark.asyncio
+async def test_a_saturated_pool_answers_503_with_retry_after(db, client, saturated, monkeypatch):
+    hasher, _ = saturated
+    monkeypatch.setattr(auth, "password_hasher", hasher)
+    response = await client.post("/auth/register", json={
+        "username": f"hasher-{uuid.uuid4().hex[:8]}", "password": "secret", "role": "USER"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json()["error_code"] == "SERVICE_OVERLOADED"
@@ -0,0 +1,102 @@
+import asyncio
+import uuid
+
+import fakeredis
+import pytest
+
+from src.services import product_cache as product_cache_module
+from src.services.product_cache import INVALIDATION_CHANNEL, ProductCache, _key, product_cache
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    # One Redis shared by every ProductCache in the test, as by the workers of a deployment.
+    redis = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(product_cache_module, "get_redis", lambda: redis)
+    return redis
+
+
+def worker() -> ProductCache:
+    return ProductCache(maxsize=100, local_ttl=60, shared_ttl=300, invalidation_window=60)
+
+
+def product(product_id: uuid.UUID, name: str, updated_at: str) -> dict:
+    return {"id": str(product_id), "name": name, "updated_at": updated_at}
+
+
+@pytest.mark.asyncio
+async def test_a_fill_that_started_before_a_write_on_another_worker_is_refused(redis):
+    reader, writer = worker(), worker()
+    product_id = uuid.uuid4()
+
+    load = await reader.load_started(product_id)
+    await writer.invalidate(product_id)
+    await reader.set(product_id, product(product_id, "old", "2024-03-01T12:00:00Z"), load)
+    assert await redis.get(_key(product_id)) is None
+
+    load = await writer.load_started(product_id)
+    await writer.set(product_id, product(product_id, "new", "2024-03-01T12:00:01Z"), load)
+    assert await worker().get(product_id) == product(product_id, "new", "2024-03-01T12:00:01Z")
+
+
+@pytest.mark.asyncio
+async def test_a_replica_fill_is_refused_while_it_may_predate_the_last_write(redis):
+    reader, writer = worker(), worker()
+    product_id = uuid.uuid4()
+
+    await writer.invalidate(product_id)
+    # Same version, but a replica row up to a minute old may still be from before the write.
+    load = await reader.load_started(product_id)
+    await reader.set(product_id, product(product_id, "old", "2024-03-01T12:00:00Z"), load, staleness=60)
+    assert await redis.get(_key(product_id)) is None
+
+    await reader.set(product_id, product(product_id, "new", "2024-03-01T12:00:01Z"), load)
+    assert await redis.get(_key(product_id)) is not None
+
+
+@pytest.mark.asyncio
+async def test_invalidations_evict_the_local_copies_of_other_workers(redis):
+    reader, writer = worker(), worker()
+    product_id = uuid.uuid4()
+    listener = asyncio.create_task(reader.listen_for_invalidations())
+    try:
+        while (await redis.pubsub_numsub(INVALIDATION_CHANNEL))[0][1] == 0:
+            await asyncio.sleep(0.01)
+        load = await reader.load_started(product_id)
+        await reader.set(product_id, product(product_id, "old", "2024-03-01T12:00:00Z"), load)
+        assert reader.local.get(product_id) is not None
+
+        await writer.invalidate(product_id)
+        for _ in range(100):
+            if reader.local.get(product_id) is None:
+                break
+            await asyncio.sleep(0.01)
+        assert reader.local.get(product_id) is None
+        assert await reader.get(product_id) is None
+    finally:
+        listener.cancel()
+
+
+@pytest.mark.asyncio
+async def test_product_writes_invalidate_both_levels(redis, seed, client, auth_headers):
+    headers = auth_headers(role="ADMIN")
+    created = await seed.product(name="cached", stock=5)
+    product_id = created.id
+
+    first = await client.get(f"/products/{product_id}", headers=headers)
+    assert first.status_code == 200
+    assert product_cache.local.get(product_id) is not None
+    assert await redis.get(_key(product_id)) is not None
+
+    updated = await client.put(f"/products/{product_id}", headers=headers, json={
+        "name": "cached", "price": 11, "stock": 5, "category": seed.category, "status": "ACTIVE"})
+    assert updated.status_code == 200
+    assert product_cache.local.get(product_id) is None
+    assert await redis.get(_key(product_id)) is None
+    assert (await client.get(f"/products/{product_id}", headers=headers)).json()["price"] == 11
+
+    deleted = await client.delete(f"/products/{product_id}", headers=headers)
+    assert deleted.status_code == 204
+    assert product_cache.local.get(product_id) is None
+    assert await redis.get(_key(product_id)) is None
+    assert (await client.get(f"/products/{product_id}", headers=headers)).json()["status"] == "ARCHIVED"
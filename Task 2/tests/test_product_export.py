@@ -0,0 +1,63 @@
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.config import settings
+from src.models.generated import ProductStatus
+from src.services import product_export
+
+PRODUCTS = 7
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    # Several partitions per export, so every batch boundary is crossed.
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+
+
+async def add_products(seed):
+    # created_at one minute apart in list order, which is the export order.
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    return await seed.products(*({"name": f"export-{i}", "price": i + 1, "created_at": start + timedelta(minutes=i),
+                                  "status": ProductStatus.INACTIVE if i % 3 == 0 else ProductStatus.ACTIVE}
+                                 for i in range(PRODUCTS)))
+
+
+@pytest.mark.asyncio
+async def test_export_streams_every_matching_row(seed, client, auth_headers, small_batches):
+    products = await add_products(seed)
+    headers = auth_headers()
+
+    response = await client.get("/products/export", params={"category": seed.category}, headers=headers)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [str(product.id) for product in products]
+    assert {row["category"] for row in rows} == {seed.category}
+
+    response = await client.get("/products/export", params={"category": seed.category, "status": "INACTIVE",
+                                                            "format": "csv"}, headers=headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == [f"export-{i}" for i in range(PRODUCTS) if i % 3 == 0]
+    assert {row["status"] for row in rows} == {"INACTIVE"}
+
+
+@pytest.mark.asyncio
+async def test_export_is_routed_with_the_callers_key(seed, client, auth_headers, monkeypatch):
+    await add_products(seed)
+    session_maker = product_export.replica_router.session_maker
+    keys = []
+
+    def recording_session_maker(client_key=None):
+        keys.append(client_key)
+        return session_maker(client_key)
+
+    monkeypatch.setattr(product_export.replica_router, "session_maker", recording_session_maker)
+    headers = auth_headers()
+    response = await client.get("/products/export", params={"category": seed.category}, headers=headers)
+    assert len(response.text.splitlines()) == PRODUCTS
+    assert keys == [hashlib.sha256(headers["Authorization"].encode()).digest()]
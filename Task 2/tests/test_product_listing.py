@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.models.generated import ProductStatus
+
+PRICES = [19.99, 5.0, 120.5, 5.0, 49.99, 0.99, 75.0]
+
+
+async def add_products(seed):
+    # created_at one minute apart in list order.
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    products = await seed.products(*({"name": f"listing-{i}", "price": price,
+                                      "status": ProductStatus.ACTIVE if i % 3 else ProductStatus.INACTIVE,
+                                      "created_at": start + timedelta(minutes=i)} for i, price in enumerate(PRICES)))
+    return [(str(product.id), float(product.price), product.status.value) for product in products]
+
+
+async def walk(client, headers: dict, category: str, **params) -> list:
+    # Every page of the listing, following nextCursor.
+    ids, cursor = [], None
+    while True:
+        page = await client.get("/products", params={"category": category, "size": 2, **params,
+                                                     **({"cursor": cursor} if cursor else {})},
+                                headers=headers)
+        assert page.status_code == 200, page.text
+        ids.extend(item["id"] for item in page.json()["items"])
+        cursor = page.json()["nextCursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.asyncio
+async def test_price_filters_and_sorts_are_keyset_paged(seed, client, auth_headers):
+    headers = auth_headers()
+    products = await add_products(seed)
+    by_price = sorted(products, key=lambda p: (p[1], p[0]))
+    assert await walk(client, headers, seed.category) == [p[0] for p in products]
+    assert await walk(client, headers, seed.category, sort="newest") == [p[0] for p in products][::-1]
+    assert await walk(client, headers, seed.category, sort="price_asc") == [p[0] for p in by_price]
+    assert await walk(client, headers, seed.category, sort="price_desc") == [p[0] for p in by_price][::-1]
+    assert await walk(client, headers, seed.category, sort="price_asc", min_price=5, max_price=75) == \
+        [p[0] for p in by_price if 5 <= p[1] <= 75]
+
+    page = await client.get("/products", params={"category": seed.category, "min_price": 5, "max_price": 75},
+                            headers=headers)
+    assert page.json()["totalElements"] == sum(1 for p in products if 5 <= p[1] <= 75)
+    page = await client.get("/products", params={"category": seed.category, "status": "ACTIVE"}, headers=headers)
+    assert page.json()["totalElements"] == sum(1 for p in products if p[2] == "ACTIVE")
+
+    first = await client.get("/products", params={"category": seed.category, "size": 2, "sort": "newest"},
+                             headers=headers)
+    mismatched = await client.get("/products", params={"category": seed.category, "sort": "price_asc",
+                                                       "cursor": first.json()["nextCursor"]}, headers=headers)
+    assert mismatched.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_facet_counts_follow_product_writes(seed, client, auth_headers):
+    headers, admin = auth_headers(), auth_headers(role="ADMIN")
+
+    def counts(facets, name, value):
+        return next((facet["count"] for facet in facets[name] if facet["value"] == value), 0)
+
+    products = await add_products(seed)
+    facets = (await client.get("/products/facets", params={"category": seed.category}, headers=headers)).json()
+    assert counts(facets, "statuses", "ACTIVE") == 4
+    assert counts(facets, "statuses", "INACTIVE") == 3
+    active = (await client.get("/products/facets", params={"status": "ACTIVE"}, headers=headers)).json()
+    assert counts(active, "categories", seed.category) == 4
+
+    product_id, price, _ = products[0]
+    updated = await client.put(f"/products/{product_id}", headers=admin, json={
+        "name": "listing-0", "price": price, "stock": 1, "category": seed.category, "status": "ACTIVE"})
+    assert updated.status_code == 200, updated.text
+    deleted = await client.delete(f"/products/{products[1][0]}", headers=admin)
+    assert deleted.status_code == 204
+
+    facets = (await client.get("/products/facets", params={"category": seed.category}, headers=headers)).json()
+    assert counts(facets, "statuses", "ACTIVE") == 4
+    assert counts(facets, "statuses", "INACTIVE") == 2
+    assert counts(facets, "statuses", "ARCHIVED") == 1
+
+    await seed.cleanup()
+    facets = (await client.get("/products/facets", headers=headers)).json()
+    assert counts(facets, "categories", seed.category) == 0
@@ -0,0 +1,42 @@
+import uuid
+
+import pytest
+
+PAGE_SIZES = [1, 2, 3, 5]
+
+
+async def add_products(seed, token: str):
+    # Equal ranks (identical text) and close ones (one more occurrence among much filler), so page boundaries
+    # fall both inside runs of equal ranks and between ranks a float rounding could merge.
+    filler = " ".join(f"filler{n}" for n in range(200))
+    rows = [{"name": f"{token} plain", "description": None} for _ in range(4)]
+    rows += [{"name": f"{token} close {k}", "description": " ".join([token] * k) + " " + filler}
+             for k in (1, 1, 2, 2, 3, 40, 41, 42)]
+    return await seed.products(*rows)
+
+
+async def search(client, headers: dict, token: str, size: int, limit: int) -> list:
+    # Every page of the search, following nextCursor; fails instead of looping on a cursor that repeats rows.
+    ranked, cursor = [], None
+    while True:
+        assert len(ranked) <= limit, "pages repeat rows"
+        page = await client.get("/products/search", params={"q": token, "size": size,
+                                                            **({"cursor": cursor} if cursor else {})},
+                                headers=headers)
+        assert page.status_code == 200, page.text
+        ranked.extend(item["id"] for item in page.json()["items"])
+        cursor = page.json()["nextCursor"]
+        if cursor is None:
+            return ranked
+
+
+@pytest.mark.asyncio
+async def test_search_pages_never_skip_or_repeat_rows_with_equal_or_close_ranks(seed, client, auth_headers):
+    token = f"search{uuid.uuid4().hex[:12]}"
+    products = await add_products(seed, token)
+    headers = auth_headers()
+
+    everything = await search(client, headers, token, size=100, limit=len(products))
+    assert sorted(everything) == sorted(str(product.id) for product in products)
+    for size in PAGE_SIZES:
+        assert await search(client, headers, token, size, limit=len(products)) == everything
@@ -0,0 +1,79 @@
+import os
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+import yaml
+
+from src.config import settings
+from src.fast_json import PRODUCT_FIELDS, FastJSONResponse, product_items
+from src.models.generated import PaginatedProductResponse, ProductStatus
+
+OPENAPI_PATH = os.path.join(os.path.dirname(__file__), "..", "openapi", "openapi.yaml")
+
+# Same shape and value types as a PRODUCT_COLUMNS row coming back from asyncpg.
+ProductRow = namedtuple("ProductRow", PRODUCT_FIELDS)
+
+
+def sample_rows():
+    created = datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc)
+    return [
+        ProductRow(str(uuid.uuid4()), "Phone", "Dual SIM", 199.99, 3, "phones", ProductStatus.ACTIVE,
+                   created, created + timedelta(microseconds=123456)),
+        ProductRow(str(uuid.uuid4()), "Cable \"USB-C\" ✓", None, 5.0, 0, "accessories", ProductStatus.ARCHIVED,
+                   created + timedelta(seconds=1, microseconds=1), created + timedelta(days=2)),
+    ]
+
+
+def fast_body(rows, **page) -> bytes:
+    return FastJSONResponse({"items": product_items(rows), **page}).body
+
+
+def validated_body(rows, **page) -> dict:
+    # What FastAPI sends for the validated path: response_model serialization in JSON mode.
+    return PaginatedProductResponse.model_validate({"items": rows, **page}, from_attributes=True).model_dump(
+        mode="json")
+
+
+@pytest.mark.parametrize("page", [
+    {"totalElements": 2, "page": 0, "size": 20, "nextCursor": None},
+    {"totalElements": None, "page": 3, "size": 2, "nextCursor": "WyIyMDI0LTAzLTAxIl0"},
+])
+def test_fast_path_matches_validated_serialization(page):
+    rows = sample_rows()
+    body = fast_body(rows, **page)
+    assert orjson.loads(body) == validated_body(rows, **page)
+    PaginatedProductResponse.model_validate_json(body)
+
+
+def test_fast_path_matches_openapi_schema():
+    with open(OPENAPI_PATH) as f:
+        schemas = yaml.safe_load(f)["components"]["schemas"]
+    body = orjson.loads(fast_body(sample_rows(), totalElements=2, page=0, size=20, nextCursor=None))
+
+    page_schema = schemas["PaginatedProductResponse"]
+    assert set(page_schema["required"]) <= set(body) <= set(page_schema["properties"])
+    item_schema = schemas["ProductResponse"]
+    for item in body["items"]:
+        assert set(item_schema["required"]) <= set(item) <= set(item_schema["properties"])
+        assert item["status"] in schemas["ProductStatus"]["enum"]
+        assert item["created_at"].endswith("Z")
+
+
+@pytest.mark.asyncio
+async def test_list_products_fast_and_validated_responses_are_identical(db, client, auth_headers):
+    headers = auth_headers()
+    fast_json_responses = settings.fast_json_responses
+    try:
+        settings.fast_json_responses = True
+        fast = await client.get("/products?size=50&count=exact", headers=headers)
+        settings.fast_json_responses = False
+        validated = await client.get("/products?size=50&count=exact", headers=headers)
+    finally:
+        settings.fast_json_responses = fast_json_responses
+
+    assert fast.status_code == validated.status_code == 200
+    assert fast.headers["content-type"] == validated.headers["content-type"]
+    assert fast.json() == validated.json()
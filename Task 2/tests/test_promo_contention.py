@@ -0,0 +1,45 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from src.database import async_session_maker
+from src.models.db import OrderDB, ProductDB, PromoCodeDB
+from src.models.generated import OrderCreate
+from src.routers.orders import place_order
+
+CONCURRENT_ORDERS = 300
+MAX_USES = 50
+
+
+async def order_with_promo(product_id, code):
+    order_in = OrderCreate.model_validate({"items": [{"product_id": str(product_id), "quantity": 1}],
+                                           "promo_code": code})
+    async with async_session_maker() as session:
+        return await place_order(order_in, session, uuid.uuid4())
+
+
+@pytest.mark.asyncio
+async def test_promo_is_never_redeemed_more_than_max_uses(seed):
+    # One product per order, so the promo row is the only thing the orders contend on.
+    products = await seed.products(*({"name": f"promo-contention-{i}", "price": 100}
+                                     for i in range(CONCURRENT_ORDERS)))
+    promo = await seed.promo(max_uses=MAX_USES)
+
+    responses = await asyncio.gather(*(order_with_promo(product.id, promo.code) for product in products))
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(201) == MAX_USES
+    assert statuses.count(422) == CONCURRENT_ORDERS - MAX_USES
+
+    async with async_session_maker() as session:
+        current_uses = (await session.execute(
+            select(PromoCodeDB.current_uses).where(PromoCodeDB.id == promo.id))).scalar_one()
+        redeemed_orders = (await session.execute(
+            select(func.count()).where(OrderDB.promo_code_id == promo.id))).scalar_one()
+        stock = (await session.execute(
+            select(func.sum(ProductDB.stock)).where(ProductDB.category == seed.category))).scalar_one()
+    assert current_uses == MAX_USES
+    assert redeemed_orders == MAX_USES
+    # Rejected orders roll back their stock reservation together with the failed redemption.
+    assert stock == CONCURRENT_ORDERS - MAX_USES
@@ -0,0 +1,32 @@
+import pytest
+
+from src.database import engine
+from src.query_stats import QueryBudgetExceeded, query_budget
+
+# Orders and cancellations must cost the same number of statements whatever the cart size.
+CREATE_ORDER_BUDGET = 5
+CANCEL_ORDER_BUDGET = 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cart_size", [1, 25])
+async def test_order_paths_stay_within_query_budget(cart_size, seed, client, auth_headers):
+    headers = auth_headers(seed.user())
+    products = await seed.products(*({"name": f"query-budget-{i}", "stock": 100} for i in range(cart_size)))
+    items = [{"product_id": str(product.id), "quantity": 1} for product in products]
+    with query_budget(CREATE_ORDER_BUDGET):
+        created = await client.post("/orders", json={"items": items}, headers=headers)
+    assert created.status_code == 201, created.text
+
+    with query_budget(CANCEL_ORDER_BUDGET):
+        canceled = await client.post(f"/orders/{created.json()['details']['id']}/cancel", headers=headers)
+    assert canceled.status_code == 200, canceled.text
+
+
+@pytest.mark.asyncio
+async def test_query_budget_reports_repeated_statements(db):
+    with pytest.raises(QueryBudgetExceeded, match=r"3 queries, budget is 2:\n  3x SELECT 1"):
+        with query_budget(2):
+            async with engine.connect() as conn:
+                for _ in range(3):
+                    await conn.exec_driver_sql("SELECT 1")
@@ -0,0 +1,68 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from src.services import rate_limit
+from src.services.rate_limit import RedisTokenBucketRateLimiter, SlidingWindowRateLimiter
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(rate_limit, "get_redis", lambda: redis)
+    return redis
+
+
+async def hits(limiter, key: str, attempts: int) -> list:
+    return [await limiter.acquire(key) for _ in range(attempts)]
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_allows_limit_hits_per_window():
+    limiter = SlidingWindowRateLimiter(limit=2, window=0.05)
+    assert await hits(limiter, "user", 3) == [True, True, False]
+    assert await hits(limiter, "other", 1) == [True]
+
+    await limiter.release("user")
+    assert await hits(limiter, "user", 2) == [True, False]
+
+    await asyncio.sleep(0.06)
+    assert await hits(limiter, "user", 3) == [True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_prunes_idle_keys():
+    limiter = SlidingWindowRateLimiter(limit=1, window=0.05)
+    await limiter.acquire("idle")
+    await asyncio.sleep(0.06)
+    await limiter.acquire("active")
+    assert set(limiter._hits) == {"active"}
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_takes_and_refunds_tokens(redis):
+    limiter = RedisTokenBucketRateLimiter(limit=3, window=60, prefix="test")
+    assert await hits(limiter, "user", 4) == [True, True, True, False]
+    assert await hits(limiter, "other", 1) == [True]
+
+    await limiter.release("user")
+    assert await hits(limiter, "user", 2) == [True, False]
+    assert 0 < await redis.pttl("test:user") <= 60_000
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills_over_the_window_up_to_capacity(redis):
+    limiter = RedisTokenBucketRateLimiter(limit=4, window=60, prefix="test")
+    assert await hits(limiter, "user", 5) == [True] * 4 + [False]
+
+    # Half a window ago: half of the capacity is back.
+    ts = int(await redis.hget("test:user", "ts"))
+    await redis.hset("test:user", "ts", ts - 30_000)
+    assert await hits(limiter, "user", 3) == [True, True, False]
+
+    # Refunds and long idle periods never fill the bucket past capacity.
+    await redis.hset("test:user", "ts", ts - 600_000)
+    for _ in range(3):
+        await limiter.release("user")
+    assert await hits(limiter, "user", 5) == [True] * 4 + [False]
@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import json
+import time
+
+import pytest
+
+from src.database import ReplicaRouter, engine
+from src.routers import products
+
+REPLICA_URL = "postgresql+asyncpg://replica@localhost:1/marketplace_db"
+
+
+def router(replicas: int = 2, check_interval: float = 0.05, sticky_seconds: float = 60) -> ReplicaRouter:
+    return ReplicaRouter(engine, [REPLICA_URL] * replicas, max_lag=1.0, check_interval=check_interval,
+                         sticky_seconds=sticky_seconds)
+
+
+def stub_lag(replica_router: ReplicaRouter, lags: dict):
+    # Stands in for the lag query: a number per replica, or an exception for one that is unreachable.
+    async def measure(replica):
+        lag = lags[replica]
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+    replica_router._measure_lag = measure
+
+
+async def routed(replica_router: ReplicaRouter, client_key=None, reads: int = 4) -> set:
+    session_makers = {replica.session_maker: replica for replica in replica_router.replicas}
+    return {session_makers.get(replica_router.session_maker(client_key), "primary") for _ in range(reads)}
+
+
+@pytest.mark.asyncio
+async def test_reads_skip_replicas_that_lag_or_are_unreachable():
+    replica_router = router()
+    current, lagging = replica_router.replicas
+    assert await routed(replica_router) == {"primary"}
+
+    stub_lag(replica_router, {current: 0.2, lagging: 5.0})
+    await asyncio.gather(*(replica_router.check_lag(replica) for replica in replica_router.replicas))
+    assert await routed(replica_router) == {current}
+
+    stub_lag(replica_router, {current: ConnectionRefusedError(), lagging: 0.0})
+    await asyncio.gather(*(replica_router.check_lag(replica) for replica in replica_router.replicas))
+    assert current.lag is None
+    assert await routed(replica_router) == {lagging}
+
+    stub_lag(replica_router, {current: ConnectionRefusedError(), lagging: 1.5})
+    await replica_router.check_lag(lagging)
+    assert await routed(replica_router) == {"primary"}
+
+
+@pytest.mark.asyncio
+async def test_a_hanging_lag_check_takes_the_replica_out_within_the_interval():
+    replica_router = router(replicas=1)
+    [replica] = replica_router.replicas
+    replica.lag = 0.0
+
+    async def hang(replica):
+        await asyncio.sleep(60)
+    replica_router._measure_lag = hang
+
+    start = time.monotonic()
+    await replica_router.check_lag(replica)
+    assert time.monotonic() - start < 1
+    assert replica.lag is None
+    assert await routed(replica_router) == {"primary"}
+
+
+@pytest.mark.asyncio
+async def test_clients_read_their_own_writes_from_the_primary():
+    replica_router = router(replicas=1, sticky_seconds=0.05)
+    [replica] = replica_router.replicas
+    replica.lag = 0.0
+
+    replica_router.mark_write(b"writer")
+    assert await routed(replica_router, b"writer") == {"primary"}
+    assert await routed(replica_router, b"reader") == {replica}
+    assert await routed(replica_router) == {replica}
+
+    await asyncio.sleep(0.06)
+    assert await routed(replica_router, b"writer") == {replica}
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_marks_the_clients_write(seed, client, auth_headers, monkeypatch):
+    marked = []
+    monkeypatch.setattr(products.replica_router, "mark_write", marked.append)
+    headers = {**auth_headers(role="ADMIN"), "Content-Type": "application/x-ndjson"}
+    row = {"name": "replica-bulk", "price": 1, "stock": 1, "category": seed.category, "status": "ACTIVE"}
+
+    response = await client.post("/products:bulk", content=json.dumps(row).encode(), headers=headers)
+    assert response.json()["inserted"] == 1, response.text
+    assert marked == [hashlib.sha256(headers["Authorization"].encode()).digest()]
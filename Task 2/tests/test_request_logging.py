@@ -0,0 +1,64 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from src.main import log_writer
+from src.request_logging import BodyMasker, LogWriter
+
+BODY = {
+    "email": "a@example.com",
+    "password": {"value": "hunter2", "nested": ["x", {"password": "y"}], "brace": "}]"},
+    "profile": {"password": ["hunter2", 1, None], "name": "A"},
+    "items": [{"password": 12.5}, {"password": None}, {"password": "z"}],
+}
+MASKED = {
+    "email": "a@example.com",
+    "password": "***",
+    "profile": {"password": "***", "name": "A"},
+    "items": [{"password": "***"}, {"password": "***"}, {"password": "***"}],
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1000])
+def test_masks_sensitive_values_of_any_type_across_chunks(chunk_size):
+    body = json.dumps(BODY).encode()
+    masker = BodyMasker(limit=len(body))
+    for pos in range(0, len(body), chunk_size):
+        masker.feed(body[pos:pos + chunk_size])
+
+    assert json.loads(bytes(masker.out)) == MASKED
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_records_held_by_the_writer():
+    stream = io.StringIO()
+    writer = LogWriter(max_queue=100, batch_size=10, flush_interval=0.05, stream=stream)
+    writer.start()
+    for n in range(25):
+        writer.submit({"n": n, "timestamp": 0})
+    await asyncio.sleep(0)
+
+    await writer.stop()
+
+    assert [json.loads(line)["n"] for line in stream.getvalue().splitlines()] == list(range(25))
+
+
+@pytest.mark.asyncio
+async def test_records_carry_the_user_id_of_the_access_token(seed, client, auth_headers):
+    user_id = seed.user()
+    product = await seed.product(name="request-logging")
+    while not log_writer.queue.empty():
+        log_writer.queue.get_nowait()
+
+    path = f"/products/{product.id}"
+    assert (await client.get(path, headers=auth_headers(user_id))).status_code == 200
+    await client.get(path, headers={"Authorization": "Bearer forged"})
+    await client.get(path)
+
+    records = []
+    while not log_writer.queue.empty():
+        records.append(log_writer.queue.get_nowait())
+    assert [(record["endpoint"], record["user_id"]) for record in records] == [
+        (path, str(user_id)), (path, None), (path, None)]
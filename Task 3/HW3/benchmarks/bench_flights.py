@@ -0,0 +1,131 @@
+"""
+GET /flights latency: one gRPC channel per request (the old get_channel) vs. the shared channel pool.
+
+The booking app runs in-process (httpx ASGI transport) against an in-process Flight Service stub that
+answers SearchFlights from memory, so the numbers isolate the cost of the channel. Generate the stubs
+first, then run from the HW3 directory:
+    (cd booking-service && python -m grpc_tools.protoc -I. --python_out=. --grpc_python_out=. flight.proto)
+    python benchmarks/bench_flights.py --concurrency 32 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import grpc
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "booking-service"))
+
+import flight_pb2  # noqa: E402
+import flight_pb2_grpc  # noqa: E402
+import main  # noqa: E402
+from grpc_client import (  # noqa: E402
+    EndpointBalancer,
+    channel_options,
+    create_channel,
+    get_stub,
+)
+
+FLIGHTS = [
+    flight_pb2.Flight(
+        id=i,
+        flight_number=f"SU{1000 + i}",
+        airline="Aeroflot",
+        origin="SVO",
+        destination="LED",
+        total_seats=180,
+        available_seats=100,
+        price=5000.0,
+        status=flight_pb2.FlightStatus.Value("SCHEDULED"),
+    )
+    for i in range(10)
+]
+
+
+class FlightService(flight_pb2_grpc.FlightServiceServicer):
+    async def SearchFlights(self, request, context):
+        return flight_pb2.SearchFlightsResponse(flights=FLIGHTS)
+
+
+class PerRequestChannels:
+    # What every handler used to do: open a channel for the request and close it when the call is done.
+    def __init__(self, target: str, options: list):
+        self.target = target
+        self.options = options
+
+    async def call(self, method: str, request):
+        async with create_channel(self.target, self.options) as channel:
+            return await getattr(get_stub(channel), method)(request)
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def client_loop(client, deadline, latencies, statuses):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/flights", params={"origin": "SVO", "destination": "LED"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def run(mode: str, args, target: str) -> dict:
+    options = channel_options(30_000, 10_000)
+    if mode == "pooled":
+        flight_service = EndpointBalancer([target], "round_robin", args.pool_size, options)
+        await flight_service.start()
+    else:
+        flight_service = PerRequestChannels(target, options)
+    main.flight_service = flight_service
+
+    latencies, statuses = [], {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(
+                *(client_loop(client, deadline, latencies, statuses) for _ in range(args.concurrency))
+            )
+            elapsed = time.perf_counter() - start
+    finally:
+        if mode == "pooled":
+            await flight_service.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def main_async():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--modes", default="per-request,pooled")
+    args = parser.parse_args()
+
+    server = grpc.aio.server()
+    flight_pb2_grpc.add_FlightServiceServicer_to_server(FlightService(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    try:
+        results = {mode: await run(mode, args, f"127.0.0.1:{port}") for mode in args.modes.split(",")}
+        print(json.dumps({"config": vars(args), "results": results}, indent=2))
+    finally:
+        await server.stop(None)
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async())
@@ -1,6 +1,8 @@
 import asyncio
+import itertools
 import logging
 import os
+import socket
 import time
 from collections import deque
 
@@ -21,6 +23,20 @@ NO_RETRY_CODES = {
 MAX_RETRIES = 3
 BACKOFF_BASE = 0.1
 
+FLIGHT_SERVICE_HOST = os.environ.get("FLIGHT_SERVICE_HOST", "localhost")
+FLIGHT_SERVICE_PORT = os.environ.get("FLIGHT_SERVICE_PORT", "50051")
+FLIGHT_SERVICE_ENDPOINTS = os.environ.get(
+    "FLIGHT_SERVICE_ENDPOINTS", f"{FLIGHT_SERVICE_HOST}:{FLIGHT_SERVICE_PORT}"
+)
+
+GRPC_LB_POLICY = os.environ.get("GRPC_LB_POLICY", "round_robin")
+GRPC_DNS_REFRESH_SECONDS = float(os.environ.get("GRPC_DNS_REFRESH_SECONDS", 30))
+
+GRPC_CHANNEL_POOL_SIZE = int(os.environ.get("GRPC_CHANNEL_POOL_SIZE", 4))
+GRPC_KEEPALIVE_TIME_MS = int(os.environ.get("GRPC_KEEPALIVE_TIME_MS", 30_000))
+GRPC_KEEPALIVE_TIMEOUT_MS = int(os.environ.get("GRPC_KEEPALIVE_TIMEOUT_MS", 10_000))
+GRPC_SHUTDOWN_GRACE = float(os.environ.get("GRPC_SHUTDOWN_GRACE", 5))
+
 CB_FAILURE_THRESHOLD = int(os.environ.get("CB_FAILURE_THRESHOLD", 5))
 CB_RESET_TIMEOUT = int(os.environ.get("CB_RESET_TIMEOUT", 15))
 CB_WINDOW_SIZE = int(os.environ.get("CB_WINDOW_SIZE", 10))
@@ -74,12 +90,8 @@ class CircuitBreaker:
                     f"Circuit breaker -> OPEN (failures={self._failure_count()}/{len(self._events)})"
                 )
 
-
-circuit_breaker = CircuitBreaker(
-    failure_threshold=CB_FAILURE_THRESHOLD,
-    reset_timeout=CB_RESET_TIMEOUT,
-    window_size=CB_WINDOW_SIZE,
-)
+    def is_open(self) -> bool:
+        return self.state == "OPEN" and time.time() - self.last_failure_time < self.reset_timeout
 
 
 class ApiKeyInterceptor(
@@ -99,11 +111,24 @@ class ApiKeyInterceptor(
         return await continuation(client_call_details, request)
 
 
-def get_channel():
-    host = os.environ.get("FLIGHT_SERVICE_HOST", "localhost")
-    port = os.environ.get("FLIGHT_SERVICE_PORT", "50051")
+def channel_options(keepalive_time_ms: int, keepalive_timeout_ms: int) -> list:
+    return [
+        # Pings keep idle connections open through NATs/load balancers and detect dead peers
+        # before a request is sent on them.
+        ("grpc.keepalive_time_ms", keepalive_time_ms),
+        ("grpc.keepalive_timeout_ms", keepalive_timeout_ms),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+        # Channels to the same target share one connection by default; a local subchannel
+        # pool gives every pooled channel its own.
+        ("grpc.use_local_subchannel_pool", 1),
+    ]
+
+
+def create_channel(target: str, options: list):
     return grpc.aio.insecure_channel(
-        f"{host}:{port}",
+        target,
+        options=options,
         interceptors=[ApiKeyInterceptor()],
     )
 
@@ -112,25 +137,245 @@ def get_stub(channel):
     return flight_pb2_grpc.FlightServiceStub(channel)
 
 
-async def grpc_call_with_retry(fn, *args, **kwargs):
-    circuit_breaker.before_call()
+UNHEALTHY_STATES = {
+    grpc.ChannelConnectivity.TRANSIENT_FAILURE,
+    grpc.ChannelConnectivity.SHUTDOWN,
+}
+
 
+# Long-lived channels to the Flight Service, shared by all requests. Each channel is one HTTP/2
+# connection that multiplexes concurrent calls; calls are spread round-robin, skipping channels
+# that are currently failing to connect.
+class ChannelPool:
+    def __init__(self, target: str, size: int, options: list):
+        self.target = target
+        self.size = size
+        self.options = options
+        self._channels = []
+        self._stubs = []
+        self._next = itertools.count()
+
+    async def start(self):
+        self._channels = [create_channel(self.target, self.options) for _ in range(self.size)]
+        self._stubs = [get_stub(channel) for channel in self._channels]
+        for channel in self._channels:
+            # Connect in the background, so the first requests don't pay for the handshake.
+            channel.get_state(try_to_connect=True)
+        logger.info(f"gRPC channel pool started: target={self.target} size={self.size}")
+
+    def stub(self):
+        if not self._stubs:
+            raise RuntimeError("gRPC channel pool is not started")
+
+        start = next(self._next)
+        for i in range(len(self._channels)):
+            index = (start + i) % len(self._channels)
+            if self._channels[index].get_state() not in UNHEALTHY_STATES:
+                return self._stubs[index]
+
+        # Every channel is failing: let the call fail fast and the retry/circuit breaker handle it.
+        return self._stubs[start % len(self._stubs)]
+
+    def is_healthy(self) -> bool:
+        return any(channel.get_state() not in UNHEALTHY_STATES for channel in self._channels)
+
+    def health(self) -> dict:
+        states = [channel.get_state() for channel in self._channels]
+        return {
+            "target": self.target,
+            "healthy": sum(1 for state in states if state not in UNHEALTHY_STATES),
+            "channels": [state.name for state in states],
+        }
+
+    async def close(self, grace: float = None):
+        # In-flight calls get `grace` seconds to finish before they are cancelled.
+        channels, self._channels, self._stubs = self._channels, [], []
+        await asyncio.gather(*(channel.close(grace) for channel in channels))
+        logger.info("gRPC channel pool closed")
+
+
+LB_POLICIES = {"round_robin", "least_outstanding"}
+
+
+def parse_endpoints(value: str) -> list:
+    return [target.strip() for target in value.split(",") if target.strip()]
+
+
+class Endpoint:
+    # One Flight Service replica: its own channel pool and circuit breaker.
+    def __init__(self, address: str, pool_size: int, options: list):
+        self.address = address
+        self.pool = ChannelPool(address, pool_size, options)
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=CB_FAILURE_THRESHOLD,
+            reset_timeout=CB_RESET_TIMEOUT,
+            window_size=CB_WINDOW_SIZE,
+        )
+        self.outstanding = 0
+
+    def ejected(self) -> bool:
+        return self.circuit_breaker.is_open()
+
+    def health(self) -> dict:
+        return {
+            "address": self.address,
+            "healthy": not self.ejected() and self.pool.is_healthy(),
+            "circuit_breaker": self.circuit_breaker.state,
+            "outstanding": self.outstanding,
+            "channels": self.pool.health()["channels"],
+        }
+
+
+# Client-side load balancing over Flight Service replicas. Targets are "host:port" or
+# "dns:///host:port"; DNS targets expand to one endpoint per resolved address and are
+# re-resolved periodically. An endpoint whose circuit breaker opens is ejected until the
+# breaker's reset timeout has passed.
+class EndpointBalancer:
+    def __init__(
+        self,
+        targets: list,
+        policy: str,
+        pool_size: int,
+        options: list,
+        dns_refresh: float = GRPC_DNS_REFRESH_SECONDS,
+    ):
+        if policy not in LB_POLICIES:
+            raise ValueError(f"Unknown load balancing policy: {policy}")
+        self.targets = targets
+        self.policy = policy
+        self.pool_size = pool_size
+        self.options = options
+        self.dns_refresh = dns_refresh
+        self.endpoints = {}
+        self._resolved = {}
+        self._next = itertools.count()
+        self._refresh_task = None
+
+    async def resolve(self) -> list:
+        loop = asyncio.get_running_loop()
+        addresses = []
+        for target in self.targets:
+            if not target.startswith("dns:"):
+                addresses.append(target)
+                continue
+
+            host, port = target[len("dns:"):].lstrip("/").rsplit(":", 1)
+            try:
+                infos = await loop.getaddrinfo(host, int(port), type=socket.SOCK_STREAM)
+            except socket.gaierror as e:
+                # Keep the last known addresses until the name resolves again.
+                logger.warning(f"Cannot resolve {target}: {e}")
+            else:
+                self._resolved[target] = sorted(
+                    {
+                        f"[{sockaddr[0]}]:{port}" if family == socket.AF_INET6 else f"{sockaddr[0]}:{port}"
+                        for family, _, _, _, sockaddr in infos
+                    }
+                )
+            addresses.extend(self._resolved.get(target, []))
+
+        return list(dict.fromkeys(addresses))
+
+    async def refresh(self):
+        addresses = await self.resolve()
+
+        for address in addresses:
+            if address not in self.endpoints:
+                endpoint = Endpoint(address, self.pool_size, self.options)
+                await endpoint.pool.start()
+                self.endpoints[address] = endpoint
+                logger.info(f"Flight Service endpoint added: {address}")
+
+        for address in [address for address in self.endpoints if address not in addresses]:
+            endpoint = self.endpoints.pop(address)
+            await endpoint.pool.close(GRPC_SHUTDOWN_GRACE)
+            logger.info(f"Flight Service endpoint removed: {address}")
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.dns_refresh)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Flight Service endpoint refresh failed: {e}")
+
+    async def start(self):
+        await self.refresh()
+        if any(target.startswith("dns:") for target in self.targets):
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    def pick(self) -> Endpoint:
+        endpoints = list(self.endpoints.values())
+        start = next(self._next) % max(len(endpoints), 1)
+        candidates = [
+            endpoint for endpoint in endpoints[start:] + endpoints[:start] if not endpoint.ejected()
+        ]
+        if not candidates:
+            raise CircuitBreakerOpenError("No Flight Service endpoint available")
+
+        # Prefer replicas we are connected to; if none are, let the call fail fast and be retried.
+        candidates = [endpoint for endpoint in candidates if endpoint.pool.is_healthy()] or candidates
+
+        if self.policy == "least_outstanding":
+            return min(candidates, key=lambda endpoint: endpoint.outstanding)
+        return candidates[0]
+
+    async def _attempt(self, method: str, request):
+        endpoint = self.pick()
+        endpoint.circuit_breaker.before_call()
+        endpoint.outstanding += 1
+        try:
+            result = await getattr(endpoint.pool.stub(), method)(request)
+        except grpc.RpcError as e:
+            if e.code() in NO_RETRY_CODES:
+                endpoint.circuit_breaker.on_success()
+            else:
+                endpoint.circuit_breaker.on_failure()
+            raise
+        finally:
+            endpoint.outstanding -= 1
+
+        endpoint.circuit_breaker.on_success()
+        return result
+
+    async def call(self, method: str, request):
+        # Every attempt picks an endpoint, so a retry moves off a failing replica.
+        return await grpc_call_with_retry(self._attempt, method, request)
+
+    def health(self) -> dict:
+        endpoints = [endpoint.health() for endpoint in self.endpoints.values()]
+        return {
+            "policy": self.policy,
+            "healthy": sum(1 for endpoint in endpoints if endpoint["healthy"]),
+            "endpoints": endpoints,
+        }
+
+    async def close(self, grace: float = None):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        endpoints, self.endpoints = list(self.endpoints.values()), {}
+        await asyncio.gather(*(endpoint.pool.close(grace) for endpoint in endpoints))
+
+
+flight_service = EndpointBalancer(
+    targets=parse_endpoints(FLIGHT_SERVICE_ENDPOINTS),
+    policy=GRPC_LB_POLICY,
+    pool_size=GRPC_CHANNEL_POOL_SIZE,
+    options=channel_options(GRPC_KEEPALIVE_TIME_MS, GRPC_KEEPALIVE_TIMEOUT_MS),
+)
+
+
+async def grpc_call_with_retry(fn, *args, **kwargs):
     last_error = None
 
     for attempt in range(MAX_RETRIES):
         try:
-            result = await fn(*args, **kwargs)
-            circuit_breaker.on_success()
-            return result
+            return await fn(*args, **kwargs)
         except grpc.RpcError as e:
             code = e.code()
 
-            if code in NO_RETRY_CODES:
-                circuit_breaker.on_success()
-                raise
-
             if code not in RETRY_CODES:
-                circuit_breaker.on_failure()
                 raise
 
             last_error = e
@@ -146,6 +391,5 @@ async def grpc_call_with_retry(fn, *args, **kwargs):
             )
             await asyncio.sleep(wait)
 
-    circuit_breaker.on_failure()
     logger.error(f"gRPC call failed after {MAX_RETRIES} attempts")
     raise last_error
@@ -6,15 +6,15 @@ from typing import Optional
 import grpc
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 import flight_pb2
 from db import get_pool
 from grpc_client import (
+    GRPC_SHUTDOWN_GRACE,
     CircuitBreakerOpenError,
-    get_channel,
-    get_stub,
-    grpc_call_with_retry,
+    flight_service,
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -32,8 +32,10 @@ class CreateBookingRequest(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await get_pool()
+    await flight_service.start()
     logger.info("Booking Service started")
     yield
+    await flight_service.close(GRPC_SHUTDOWN_GRACE)
 
 
 app = FastAPI(title="Booking Service", lifespan=lifespan)
@@ -46,6 +48,15 @@ app.add_middleware(
 )
 
 
+@app.get("/health")
+async def health():
+    status = flight_service.health()
+    return JSONResponse(
+        status_code=200 if status["healthy"] else 503,
+        content={"flight_service": status},
+    )
+
+
 def parse_booking_uuid(booking_id: str) -> uuid.UUID:
     try:
         return uuid.UUID(booking_id)
@@ -71,40 +82,36 @@ def flight_to_dict(f: flight_pb2.Flight) -> dict:
 
 @app.get("/flights")
 async def search_flights(origin: str, destination: str, date: Optional[str] = None):
-    async with get_channel() as channel:
-        stub = get_stub(channel)
-        try:
-            response = await grpc_call_with_retry(
-                stub.SearchFlights,
-                flight_pb2.SearchFlightsRequest(
-                    origin=origin,
-                    destination=destination,
-                    date=date or "",
-                ),
-            )
-        except CircuitBreakerOpenError as e:
-            raise HTTPException(status_code=503, detail=str(e))
-        except grpc.RpcError as e:
-            raise HTTPException(status_code=502, detail=str(e.details()))
+    try:
+        response = await flight_service.call(
+            "SearchFlights",
+            flight_pb2.SearchFlightsRequest(
+                origin=origin,
+                destination=destination,
+                date=date or "",
+            ),
+        )
+    except CircuitBreakerOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=502, detail=str(e.details()))
 
     return {"flights": [flight_to_dict(f) for f in response.flights]}
 
 
 @app.get("/flights/{flight_id}")
 async def get_flight(flight_id: int):
-    async with get_channel() as channel:
-        stub = get_stub(channel)
-        try:
-            response = await grpc_call_with_retry(
-                stub.GetFlight,
-                flight_pb2.GetFlightRequest(flight_id=flight_id),
-            )
-        except CircuitBreakerOpenError as e:
-            raise HTTPException(status_code=503, detail=str(e))
-        except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.NOT_FOUND:
-                raise HTTPException(status_code=404, detail="Flight not found")
-            raise HTTPException(status_code=502, detail=str(e.details()))
+    try:
+        response = await flight_service.call(
+            "GetFlight",
+            flight_pb2.GetFlightRequest(flight_id=flight_id),
+        )
+    except CircuitBreakerOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.NOT_FOUND:
+            raise HTTPException(status_code=404, detail="Flight not found")
+        raise HTTPException(status_code=502, detail=str(e.details()))
 
     return flight_to_dict(response.flight)
 
@@ -113,39 +120,36 @@ async def get_flight(flight_id: int):
 async def create_booking(req: CreateBookingRequest):
     booking_id = str(uuid.uuid4())
 
-    async with get_channel() as channel:
-        stub = get_stub(channel)
-
-        try:
-            flight_resp = await grpc_call_with_retry(
-                stub.GetFlight,
-                flight_pb2.GetFlightRequest(flight_id=req.flight_id),
-            )
-        except CircuitBreakerOpenError as e:
-            raise HTTPException(status_code=503, detail=str(e))
-        except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.NOT_FOUND:
-                raise HTTPException(status_code=404, detail="Flight not found")
-            raise HTTPException(status_code=502, detail=str(e.details()))
+    try:
+        flight_resp = await flight_service.call(
+            "GetFlight",
+            flight_pb2.GetFlightRequest(flight_id=req.flight_id),
+        )
+    except CircuitBreakerOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.NOT_FOUND:
+            raise HTTPException(status_code=404, detail="Flight not found")
+        raise HTTPException(status_code=502, detail=str(e.details()))
 
-        flight = flight_resp.flight
-        total_price = req.seat_count * flight.price
+    flight = flight_resp.flight
+    total_price = req.seat_count * flight.price
 
-        try:
-            await grpc_call_with_retry(
-                stub.ReserveSeats,
-                flight_pb2.ReserveSeatsRequest(
-                    flight_id=req.flight_id,
-                    seat_count=req.seat_count,
-                    booking_id=booking_id,
-                ),
-            )
-        except CircuitBreakerOpenError as e:
-            raise HTTPException(status_code=503, detail=str(e))
-        except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
-                raise HTTPException(status_code=409, detail="Not enough seats available")
-            raise HTTPException(status_code=502, detail=str(e.details()))
+    try:
+        await flight_service.call(
+            "ReserveSeats",
+            flight_pb2.ReserveSeatsRequest(
+                flight_id=req.flight_id,
+                seat_count=req.seat_count,
+                booking_id=booking_id,
+            ),
+        )
+    except CircuitBreakerOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+            raise HTTPException(status_code=409, detail="Not enough seats available")
+        raise HTTPException(status_code=502, detail=str(e.details()))
 
     pool = await get_pool()
     async with pool.acquire() as conn:
@@ -217,17 +221,15 @@ async def cancel_booking(booking_id: str):
         if row["status"] != "CONFIRMED":
             raise HTTPException(status_code=409, detail="Booking is not CONFIRMED")
 
-        async with get_channel() as channel:
-            stub = get_stub(channel)
-            try:
-                await grpc_call_with_retry(
-                    stub.ReleaseReservation,
-                    flight_pb2.ReleaseReservationRequest(booking_id=booking_id),
-                )
-            except CircuitBreakerOpenError as e:
-                raise HTTPException(status_code=503, detail=str(e))
-            except grpc.RpcError as e:
-                raise HTTPException(status_code=502, detail=str(e.details()))
+        try:
+            await flight_service.call(
+                "ReleaseReservation",
+                flight_pb2.ReleaseReservationRequest(booking_id=booking_id),
+            )
+        except CircuitBreakerOpenError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except grpc.RpcError as e:
+            raise HTTPException(status_code=502, detail=str(e.details()))
 
         await conn.execute(
             "UPDATE bookings SET status = 'CANCELLED' WHERE id = $1",
@@ -313,7 +313,16 @@ class FlightServiceServicer(flight_pb2_grpc.FlightServiceServicer):
 async def serve():
     await get_redis()
 
-    server = grpc.aio.server(interceptors=[AuthInterceptor()])
+    server = grpc.aio.server(
+        interceptors=[AuthInterceptor()],
+        options=[
+            # Accept the Booking Service's keepalive pings on idle pooled channels
+            # instead of closing the connection with "too_many_pings".
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.min_ping_interval_without_data_ms", 10_000),
+            ("grpc.http2.max_ping_strikes", 0),
+        ],
+    )
     flight_pb2_grpc.add_FlightServiceServicer_to_server(FlightServiceServicer(), server)
 
     port = os.environ.get("GRPC_PORT", "50051")
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import socket
+import sys
+from unittest.mock import MagicMock, patch
+
+import grpc
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "booking-service"))
+
+from grpc_client import ChannelPool, channel_options  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def fake_channel(state):
+    channel = MagicMock()
+    channel.get_state.return_value = state
+    return channel
+
+
+def make_pool(target, size=3):
+    return ChannelPool(target=target, size=size, options=channel_options(30_000, 10_000))
+
+
+async def wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_pool_connects_every_channel_and_closes_them():
+    port = free_port()
+    server = grpc.aio.server()
+    server.add_insecure_port(f"localhost:{port}")
+    await server.start()
+    pool = make_pool(f"localhost:{port}")
+    try:
+        await pool.start()
+        channels = list(pool._channels)
+        # Connected eagerly, without any call having been made.
+        await asyncio.wait_for(asyncio.gather(*(c.channel_ready() for c in channels)), 5)
+        assert pool.health()["healthy"] == 3
+        assert pool.health()["channels"] == ["READY"] * 3
+
+        await pool.close(grace=1)
+        assert all(c.get_state() == grpc.ChannelConnectivity.SHUTDOWN for c in channels)
+        with pytest.raises(RuntimeError):
+            pool.stub()
+    finally:
+        await server.stop(None)
+
+
+@pytest.mark.asyncio
+async def test_pool_reports_unreachable_service():
+    pool = make_pool(f"localhost:{free_port()}", size=2)
+    await pool.start()
+    try:
+        await wait_for(lambda: pool.health()["healthy"] == 0)
+        assert pool.health()["channels"] == ["TRANSIENT_FAILURE"] * 2
+    finally:
+        await pool.close()
+
+
+def test_stub_round_robins_over_channels():
+    pool = make_pool("localhost:1")
+    pool._channels = [fake_channel(grpc.ChannelConnectivity.READY) for _ in range(3)]
+    pool._stubs = ["a", "b", "c"]
+
+    assert [pool.stub() for _ in range(6)] == ["a", "b", "c", "a", "b", "c"]
+
+
+def test_stub_skips_failing_channels():
+    pool = make_pool("localhost:1")
+    pool._channels = [
+        fake_channel(grpc.ChannelConnectivity.TRANSIENT_FAILURE),
+        fake_channel(grpc.ChannelConnectivity.IDLE),
+        fake_channel(grpc.ChannelConnectivity.SHUTDOWN),
+    ]
+    pool._stubs = ["a", "b", "c"]
+
+    assert {pool.stub() for _ in range(6)} == {"b"}
+
+
+def test_stub_falls_back_when_every_channel_fails():
+    pool = make_pool("localhost:1", size=2)
+    pool._channels = [fake_channel(grpc.ChannelConnectivity.TRANSIENT_FAILURE) for _ in range(2)]
+    pool._stubs = ["a", "b"]
+
+    assert [pool.stub() for _ in range(2)] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_channels_do_not_share_a_connection():
+    with patch("grpc_client.grpc.aio.insecure_channel") as insecure_channel:
+        pool = make_pool("localhost:1", size=2)
+        await pool.start()
+
+    assert insecure_channel.call_count == 2
+    options = dict(insecure_channel.call_args.kwargs["options"])
+    assert options["grpc.use_local_subchannel_pool"] == 1
+    assert options["grpc.keepalive_time_ms"] == 30_000
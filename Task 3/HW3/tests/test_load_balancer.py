@@ -0,0 +1,151 @@
+import asyncio
+import os
+import socket
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import grpc
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "booking-service"))
+
+from grpc_client import (  # noqa: E402
+    CB_FAILURE_THRESHOLD,
+    CB_WINDOW_SIZE,
+    CircuitBreakerOpenError,
+    Endpoint,
+    EndpointBalancer,
+)
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code):
+        super().__init__()
+        self._code = code
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return f"error: {self._code.name}"
+
+
+def make_endpoint(address, result=None, error=None, healthy=True):
+    endpoint = Endpoint(address, pool_size=1, options=[])
+    stub = MagicMock()
+    stub.GetFlight = AsyncMock(return_value=result or address, side_effect=error)
+    endpoint.pool = MagicMock()
+    endpoint.pool.stub.return_value = stub
+    endpoint.pool.is_healthy.return_value = healthy
+    return endpoint
+
+
+def make_balancer(endpoints, policy="round_robin"):
+    balancer = EndpointBalancer(targets=[], policy=policy, pool_size=1, options=[])
+    balancer.endpoints = {endpoint.address: endpoint for endpoint in endpoints}
+    return balancer
+
+
+@pytest.mark.asyncio
+async def test_round_robin_over_endpoints():
+    balancer = make_balancer([make_endpoint("a:1"), make_endpoint("b:1"), make_endpoint("c:1")])
+
+    results = [await balancer.call("GetFlight", None) for _ in range(6)]
+
+    assert results == ["a:1", "b:1", "c:1", "a:1", "b:1", "c:1"]
+
+
+def test_least_outstanding_picks_idlest_endpoint():
+    a, b, c = make_endpoint("a:1"), make_endpoint("b:1"), make_endpoint("c:1")
+    a.outstanding, b.outstanding, c.outstanding = 3, 1, 2
+    balancer = make_balancer([a, b, c], policy="least_outstanding")
+
+    assert {balancer.pick().address for _ in range(3)} == {"b:1"}
+
+
+def test_disconnected_endpoints_are_used_last():
+    balancer = make_balancer([make_endpoint("a:1", healthy=False), make_endpoint("b:1")])
+
+    assert {balancer.pick().address for _ in range(4)} == {"b:1"}
+
+
+@pytest.mark.asyncio
+async def test_retry_moves_to_another_endpoint():
+    failing = make_endpoint("a:1", error=FakeRpcError(grpc.StatusCode.UNAVAILABLE))
+    balancer = make_balancer([failing, make_endpoint("b:1")])
+
+    with patch("grpc_client.asyncio.sleep", new_callable=AsyncMock):
+        assert await balancer.call("GetFlight", None) == "b:1"
+
+    assert list(failing.circuit_breaker._events) == [False]
+
+
+@pytest.mark.asyncio
+async def test_failing_endpoint_is_ejected_until_cool_off():
+    failing = make_endpoint("a:1", error=FakeRpcError(grpc.StatusCode.UNAVAILABLE))
+    healthy = make_endpoint("b:1")
+    balancer = make_balancer([failing, healthy])
+    failing.circuit_breaker._events.extend([True] * (CB_WINDOW_SIZE - CB_FAILURE_THRESHOLD))
+
+    with patch("grpc_client.asyncio.sleep", new_callable=AsyncMock):
+        for _ in range(2 * CB_FAILURE_THRESHOLD):
+            assert await balancer.call("GetFlight", None) == "b:1"
+
+    assert failing.ejected()
+    assert failing.pool.stub.return_value.GetFlight.call_count == CB_FAILURE_THRESHOLD
+    assert balancer.health()["healthy"] == 1
+
+    failing.circuit_breaker.last_failure_time -= failing.circuit_breaker.reset_timeout
+    assert not failing.ejected()
+    assert {balancer.pick().address for _ in range(2)} == {"a:1", "b:1"}
+
+
+@pytest.mark.asyncio
+async def test_business_errors_do_not_eject():
+    endpoint = make_endpoint("a:1", error=FakeRpcError(grpc.StatusCode.NOT_FOUND))
+    balancer = make_balancer([endpoint])
+
+    for _ in range(CB_WINDOW_SIZE):
+        with pytest.raises(grpc.RpcError):
+            await balancer.call("GetFlight", None)
+
+    assert endpoint.circuit_breaker.state == "CLOSED"
+
+
+@pytest.mark.asyncio
+async def test_all_endpoints_ejected():
+    endpoint = make_endpoint("a:1")
+    endpoint.circuit_breaker.state = "OPEN"
+    endpoint.circuit_breaker.last_failure_time = float("inf")
+    balancer = make_balancer([endpoint])
+
+    with pytest.raises(CircuitBreakerOpenError):
+        await balancer.call("GetFlight", None)
+    assert endpoint.pool.stub.return_value.GetFlight.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_dns_targets_follow_resolved_addresses():
+    loop = asyncio.get_running_loop()
+    addresses = [("10.0.0.1", 50051), ("10.0.0.2", 50051)]
+
+    async def getaddrinfo(host, port, **kwargs):
+        assert (host, port) == ("flight-service", 50051)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", address) for address in addresses]
+
+    balancer = EndpointBalancer(
+        targets=["dns:///flight-service:50051", "static:50051"],
+        policy="round_robin",
+        pool_size=1,
+        options=[],
+    )
+    with patch.object(loop, "getaddrinfo", getaddrinfo), \
+            patch("grpc_client.ChannelPool.start", new_callable=AsyncMock), \
+            patch("grpc_client.ChannelPool.close", new_callable=AsyncMock) as close:
+        await balancer.refresh()
+        assert list(balancer.endpoints) == ["10.0.0.1:50051", "10.0.0.2:50051", "static:50051"]
+
+        addresses = [("10.0.0.2", 50051), ("10.0.0.3", 50051)]
+        await balancer.refresh()
+        assert list(balancer.endpoints) == ["10.0.0.2:50051", "static:50051", "10.0.0.3:50051"]
+        assert close.call_count == 1
@@ -10,7 +10,6 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "booking-servic
 from grpc_client import (  # noqa: E402
     BACKOFF_BASE,
     MAX_RETRIES,
-    circuit_breaker,
     grpc_call_with_retry,
 )
 
@@ -31,13 +30,6 @@ def make_rpc_error(code):
     return FakeRpcError(code)
 
 
-@pytest.fixture(autouse=True)
-def reset_cb():
-    circuit_breaker.state = "CLOSED"
-    circuit_breaker.last_failure_time = 0.0
-    circuit_breaker._events.clear()
-
-
 @pytest.mark.asyncio
 async def test_retry_on_unavailable():
     fn = AsyncMock(side_effect=make_rpc_error(grpc.StatusCode.UNAVAILABLE))